@@ -0,0 +1,145 @@
+"""
+Activity log utilities for ERP Cell system.
+Write paths append compact events to Activity_Log; recent-activity feeds read
+the newest N events for one user through the (user_role, ref_id, activity_id) index.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+# Events older than this are removed by trim_activity_log()
+ACTIVITY_RETENTION_DAYS = int(os.environ.get('ACTIVITY_RETENTION_DAYS', 180))
+
+# Upper bound on how many events a feed request may ask for
+MAX_FEED_SIZE = 50
+
+
+def log_activities(cursor, events):
+    """
+    Append several events in one multi-row INSERT.
+
+    Args:
+        cursor: Open MySQL cursor (the caller commits)
+        events (list): Tuples of (user_role, ref_id, event_type, title, message, icon)
+    """
+    if not events:
+        return
+    cursor.executemany("""
+        INSERT INTO Activity_Log (user_role, ref_id, event_type, title, message, icon)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, events)
+
+
+def log_activity(cursor, user_role, ref_id, event_type, title, message, icon='circle'):
+    """
+    Append a single event for one user.
+
+    Args:
+        cursor: Open MySQL cursor (the caller commits)
+        user_role (str): 'Student' or 'Faculty'
+        ref_id (int): student_id or faculty_id
+        event_type (str): Short machine-readable type, e.g. 'marks'
+        title (str): Short heading shown in feeds
+        message (str): One-line description
+        icon (str): Font Awesome icon name
+    """
+    log_activities(cursor, [(user_role, ref_id, event_type, title, message, icon)])
+
+
+def get_recent_activity(cursor, user_role, ref_id, limit=10):
+    """
+    Read the newest events for one user.
+
+    This is a bounded backward range scan on idx_activity_owner, so its cost
+    depends on `limit`, not on how much history the user has.
+
+    Args:
+        cursor: MySQL cursor created with dictionary=True
+        user_role (str): 'Student' or 'Faculty'
+        ref_id (int): student_id or faculty_id
+        limit (int): Number of events to return (capped at MAX_FEED_SIZE)
+
+    Returns:
+        list: Event dicts, newest first
+    """
+    limit = max(1, min(int(limit), MAX_FEED_SIZE))
+    cursor.execute("""
+        SELECT activity_id, event_type, title, message, icon, created_at
+        FROM Activity_Log
+        WHERE user_role = %s AND ref_id = %s
+        ORDER BY activity_id DESC
+        LIMIT %s
+    """, (user_role, ref_id, limit))
+    return cursor.fetchall()
+
+
+def time_ago(moment, now=None):
+    """
+    Format a datetime as a short relative string ("5 minutes ago").
+
+    Args:
+        moment (datetime): Past timestamp
+        now (datetime): Reference time, defaults to datetime.now()
+
+    Returns:
+        str: Human-readable relative time
+    """
+    seconds = int(((now or datetime.now()) - moment).total_seconds())
+    if seconds < 60:
+        return 'just now'
+    for unit, size in (('day', 86400), ('hour', 3600), ('minute', 60)):
+        if seconds >= size:
+            count = seconds // size
+            return f"{count} {unit}{'s' if count != 1 else ''} ago"
+
+
+def trim_activity_log(db, retention_days=ACTIVITY_RETENTION_DAYS, batch_size=5000, pause=0.05):
+    """
+    Delete events older than the retention window in small batches.
+
+    Args:
+        db: MySQL connection
+        retention_days (int): Events older than this many days are removed
+        batch_size (int): Rows deleted per transaction
+        pause (float): Seconds to sleep between batches
+
+    Returns:
+        int: Number of rows deleted
+    """
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    cursor = db.cursor()
+    deleted = 0
+    try:
+        while True:
+            cursor.execute(
+                "DELETE FROM Activity_Log WHERE created_at < %s ORDER BY created_at LIMIT %s",
+                (cutoff, batch_size)
+            )
+            db.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    finally:
+        cursor.close()
+    return deleted
+
+
+if __name__ == '__main__':
+    # Run from cron, e.g. nightly: python activity.py
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    conn = mysql.connector.connect(
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', ''),
+        host=os.environ.get('DB_HOST', 'localhost'),
+        database='erp_database'
+    )
+    removed = trim_activity_log(conn)
+    conn.close()
+    print(f"✓ Removed {removed} activity events older than {ACTIVITY_RETENTION_DAYS} days")
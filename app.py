@@ -1,14 +1,40 @@
 import mysql.connector
-from mysql.connector import errorcode
+from mysql.connector import errorcode, pooling
+import io
 import json
 import os
-from decimal import Decimal
-from flask import Flask, request, jsonify, g, render_template, send_from_directory, session, redirect
+from flask import Flask, request, jsonify, g, render_template, send_from_directory, session, redirect, Response
 from flask_cors import CORS
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from dotenv import load_dotenv
 import pathlib
-from auth import bcrypt, User, hash_password, verify_password, create_user_from_db
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from auth import (
+    User, hash_password, verify_password, create_user_from_db,
+    configure_bcrypt, needs_rehash, rehash_in_background
+)
+from activity import log_activity, log_activities, get_recent_activity, time_ago
+from notifications import activity_feed, broker, stream
+import transcripts
+import grading
+from gpa import GPAEngine
+from result_stats import ResultStats
+from search import SearchIndex
+import timetable
+import scheduler
+from attendance import get_latest_run, get_shortages
+import library
+from throttle import LoginThrottle
+import fields
+import changes
+from querycache import QueryCache
+from idempotency import IdempotencyStore, MAX_KEY_LENGTH, fingerprint
+from attendance_queue import AttendanceQueue, QueueFull, ATTENDANCE_GROUP_COMMIT
+from attendance_archive import TermCalendar, read_archive, summarize
+from attendance_bitmap import AttendanceBitmaps
 from validators import (
     validate_username, validate_password, validate_email_address,
     validate_name, sanitize_input
@@ -30,13 +56,20 @@ app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key-change-in-pr
 # Enable CORS for all routes
 CORS(app)
 
+# Number of reverse proxies (e.g. nginx) in front of the app; their X-Forwarded-For
+# gives request.remote_addr the real client IP that login throttling keys on
+PROXY_COUNT = int(os.environ.get('PROXY_COUNT', 0))
+if PROXY_COUNT:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_COUNT, x_proto=PROXY_COUNT)
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'index'  # Redirect to login page if not authenticated
 
-# Initialize Bcrypt
-bcrypt.init_app(app)
+# Initialize Bcrypt with a work factor calibrated for this host
+configure_bcrypt(app)
 
 # --- MySQL Database Configuration ---
 # BEST PRACTICE: Use environment variables for credentials
@@ -48,8 +81,52 @@ DB_CONFIG = {
     'raise_on_warnings': True
 }
 
+# Connections per worker process when serving under gunicorn (keep >= threads per worker)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+
+# Seconds a request waits for a free pooled connection before it is answered with 503
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+
+# Created lazily in each worker after fork (see init_db_pool); None = one connection per request
+_db_pool = None
+_db_pool_enabled = False
+_db_pool_lock = threading.Lock()
+
 BASE_DIR = os.path.dirname(__file__)
 
+# Academic term used for enrollment-based rosters (e.g. '2025-26')
+CURRENT_TERM = os.environ.get('CURRENT_TERM', '2025-26')
+
+# Cached GPA/CGPA/rank tables; results without an enrollment count toward CURRENT_TERM
+gpa_engine = GPAEngine(default_term=CURRENT_TERM)
+
+# Cached mark distributions per subject and department, invalidated per subject by save_marks
+result_stats = ResultStats()
+
+# In-process admin search over students, faculty and subjects
+search_index = SearchIndex()
+
+# Sorted interval lists used to reject double-booked timetable slots
+timetable_index = timetable.TimetableIndex()
+
+# Per-IP and per-username login token buckets (checked before any DB or bcrypt work)
+login_throttle = LoginThrottle()
+
+# Cached results of rarely-changing reads, invalidated per table (in Table_Version) by the write routes
+query_cache = QueryCache(connect=lambda: get_db())
+
+# Stored responses for retried requests carrying an Idempotency-Key header
+idempotency_store = IdempotencyStore()
+
+# Journaled, group-committed attendance writes (ATTENDANCE_GROUP_COMMIT); started per worker
+attendance_queue = AttendanceQueue()
+
+# Academic_Term date ranges; attendance reads filter on them so MySQL prunes to one partition
+term_calendar = TermCalendar()
+
+# Per-term packed attendance bits for streaks and heatmaps; updated by both attendance write paths
+attendance_bitmaps = AttendanceBitmaps()
+
 # --- Flask-Login User Loader ---
 
 @login_manager.user_loader
@@ -74,13 +151,52 @@ def load_user(user_id):
 
 # --- Database Initialization Functions ---
 
+def init_db_pool():
+    """
+    Enable pooled connections for this process.
+
+    Called from gunicorn's post_fork hook, so every worker builds its own pool
+    (on first use) and no socket opened by the master is ever shared.
+    """
+    global _db_pool, _db_pool_enabled
+    with _db_pool_lock:
+        _db_pool = None
+        _db_pool_enabled = True
+
+
+def _pool_connection():
+    """
+    Borrow a connection from this worker's pool, creating the pool on first use.
+
+    MySQLConnectionPool raises PoolError at once when every connection is out,
+    so wait up to DB_POOL_TIMEOUT for one to be returned before giving up.
+    """
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                _db_pool = pooling.MySQLConnectionPool(pool_name=f"erp_{os.getpid()}", pool_size=DB_POOL_SIZE,
+                                                       database=DB_NAME, **DB_CONFIG)
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    while True:
+        try:
+            return _db_pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.02)
+
+
 def get_db():
-    """Connects to the MySQL database."""
+    """Connects to the MySQL database (from the worker's pool when one is enabled)."""
     db = getattr(g, '_database', None)
     if db is None:
         try:
             # Try connecting to the specific database
-            db = g._database = mysql.connector.connect(database=DB_NAME, **DB_CONFIG)
+            if _db_pool_enabled:
+                db = g._database = _pool_connection()
+            else:
+                db = g._database = mysql.connector.connect(database=DB_NAME, **DB_CONFIG)
         except mysql.connector.Error as err:
             if err.errno == errorcode.ER_BAD_DB_ERROR:
                 # Database doesn't exist. Connect to server, create DB, then reconnect.
@@ -107,9 +223,42 @@ def get_db():
                 raise  # Re-raise other connection errors
     return db
 
+def connect_db():
+    """Opens a standalone connection for background jobs (not tied to a request)."""
+    return mysql.connector.connect(database=DB_NAME, **DB_CONFIG)
+
+@app.before_request
+def reserve_db_connection():
+    """
+    Borrow the request's pooled connection up front (before the user is loaded).
+
+    Routes catch their own errors and would turn an exhausted pool into a 500;
+    taking the connection here answers 503 with Retry-After instead. Requests
+    with an Idempotency-Key borrow in replay_idempotent_request() only if the
+    route actually runs, so a replay never touches MySQL.
+    """
+    # login borrows after its throttle check, so rejected attempts cost no connection
+    if request.endpoint in ('static', 'login') or idempotency_requested():
+        return None
+    return borrow_db_connection()
+
+
+def borrow_db_connection():
+    """Take the request's pooled connection now; a 503 response if the pool stays exhausted."""
+    if not _db_pool_enabled:
+        return None
+    try:
+        get_db()
+    except mysql.connector.errors.PoolError:
+        print(f"DB pool exhausted after {DB_POOL_TIMEOUT}s: {request.method} {request.path}")
+        response = jsonify({'success': False, 'message': 'Server is busy, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    return None
+
 @app.teardown_appcontext
 def close_connection(exception):
-    """Closes the database connection at the end of the request."""
+    """Closes the database connection (or returns it to the pool) at the end of the request."""
     db = getattr(g, '_database', None)
     if db is not None:
         db.close()
@@ -254,6 +403,166 @@ def admin_required(f):
     return decorated_function
 
 
+def enroll_student(cursor, student_id, subject_id, term=None):
+    """
+    Enroll a student in a subject and bump the subject's headcount.
+
+    Returns:
+        bool: True if a new enrollment was created, False if it already existed
+    """
+    term = term or CURRENT_TERM
+    try:
+        cursor.execute("""
+            INSERT INTO Enrollment (student_id, subject_id, term, enrolled_on)
+            VALUES (%s, %s, %s, CURDATE())
+        """, (student_id, subject_id, term))
+    except mysql.connector.IntegrityError as err:
+        # Unknown student or subject (foreign key) errors are left to the caller
+        if err.errno == errorcode.ER_DUP_ENTRY:
+            return False
+        raise
+    cursor.execute("""
+        INSERT INTO Subject_Headcount (subject_id, term, headcount)
+        VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE headcount = headcount + 1
+    """, (subject_id, term))
+    return True
+
+
+def unenroll_student(cursor, student_id, subject_id, term=None):
+    """
+    Remove a student's enrollment and decrement the subject's headcount.
+
+    Returns:
+        bool: True if an enrollment was removed
+    """
+    term = term or CURRENT_TERM
+    cursor.execute("""
+        DELETE FROM Enrollment
+        WHERE student_id = %s AND subject_id = %s AND term = %s
+    """, (student_id, subject_id, term))
+    if cursor.rowcount == 0:
+        return False
+    cursor.execute("""
+        UPDATE Subject_Headcount SET headcount = GREATEST(headcount - 1, 0)
+        WHERE subject_id = %s AND term = %s
+    """, (subject_id, term))
+    return True
+
+
+def get_subject_label(cursor, subject_id):
+    """Return (subject_code, subject_name) for a subject, or (None, None)."""
+    cursor.execute("SELECT subject_code, subject_name FROM Subjects WHERE subject_id = %s", (subject_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None, None
+    if isinstance(row, dict):
+        return row['subject_code'], row['subject_name']
+    return row[0], row[1]
+
+
+def attendance_term(db, term=None):
+    """Academic_Term row for `term` (default ?term=, then CURRENT_TERM), or None if unknown."""
+    return term_calendar.get(db, term or request.args.get('term', CURRENT_TERM))
+
+
+def unknown_term_response():
+    term = request.args.get('term', CURRENT_TERM)
+    return jsonify({'success': False, 'message': f'Unknown academic term: {term}'}), 404
+
+
+def subject_names(cursor, subject_ids):
+    """subject_id -> subject_name for some subjects (dictionary cursor)."""
+    subject_ids = tuple(subject_ids)
+    if not subject_ids:
+        return {}
+    cursor.execute(f"""
+        SELECT subject_id, subject_name FROM Subjects
+        WHERE subject_id IN ({', '.join(['%s'] * len(subject_ids))})
+    """, subject_ids)
+    return {row['subject_id']: row['subject_name'] for row in cursor.fetchall()}
+
+
+def bitmap_term(db):
+    """Academic_Term row for ?term= if attendance analytics can serve it, else (None, error response)."""
+    term = attendance_term(db)
+    if term is None:
+        return None, unknown_term_response()
+    if term['status'] == 'Archived':
+        return None, (jsonify({'success': False,
+                               'message': f"{term['term']} is archived; use attendance-detailed?term="}), 400)
+    return term, None
+
+
+def archived_attendance_summary(cursor, term, student_id):
+    """Subject-wise attendance of an archived term from its file, shaped like the live query's rows."""
+    counts = summarize(read_archive(term, student_id))
+    names = subject_names(cursor, counts)
+    summary = [{
+        'subject_id': subject_id,
+        'subject_name': names.get(subject_id, f'Subject {subject_id}'),
+        'total_classes': total,
+        'classes_attended': present,
+        'attendance_percentage': round(present * 100 / total, 2)
+    } for subject_id, (total, present) in counts.items()]
+    return sorted(summary, key=lambda row: row['subject_name'])
+
+
+def check_attendance_submission(db, subject_id, date, attendance_list):
+    """
+    Validate an attendance submission before it is written or queued.
+
+    Student_Attendance is partitioned, so it has no foreign keys: the subject
+    and student ids are checked here, and the date must fall in an Open term.
+
+    Returns:
+        str: Error message, or None if the submission is valid
+    """
+    try:
+        day = datetime.strptime(date, '%Y-%m-%d').date()
+        student_ids = {int(student['student_id']) for student in attendance_list}
+    except (KeyError, TypeError, ValueError):
+        return 'Invalid date (YYYY-MM-DD) or attendance rows'
+    term = term_calendar.for_date(db, day)
+    if term is None or term['status'] != 'Open':
+        return f'No open academic term covers {date}'
+
+    cursor = db.cursor()
+    try:
+        if get_subject_label(cursor, subject_id) == (None, None):
+            return 'Subject not found'
+        cursor.execute(f"""
+            SELECT student_id FROM Student_Info
+            WHERE student_id IN ({', '.join(['%s'] * len(student_ids))})
+        """, tuple(student_ids))
+        missing = student_ids - {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+    if missing:
+        return f"Unknown student id(s): {', '.join(str(i) for i in sorted(missing))}"
+    return None
+
+
+def notify(events):
+    """
+    Push committed activity events to the users' open live-update streams.
+
+    The events are already in Activity_Log, which every worker's feed tails;
+    waking this worker's feed delivers them here at once, other workers within
+    SSE_FEED_POLL_INTERVAL.
+    """
+    if events:
+        activity_feed.wake()
+
+
+def refresh_search(kind, entity_id):
+    """Re-index one student/faculty/subject after a committed write (never fails the request)."""
+    try:
+        search_index.refresh(get_db(), kind, entity_id)
+    except Exception as e:
+        print(f"Error refreshing search index for {kind} {entity_id}: {e}")
+
+
 # --- API Routes ---
 
 @app.route('/', methods=['GET'])
@@ -287,6 +596,16 @@ def login():
     if not is_valid:
         return jsonify({'success': False, 'message': error}), 400
 
+    retry_after = login_throttle.check(request.remote_addr, username)
+    if retry_after:
+        response = jsonify({'success': False,
+                            'message': f'Too many login attempts. Try again in {retry_after} seconds.'})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+
+    busy = borrow_db_connection()
+    if busy is not None:
+        return busy
     db = get_db()
     cursor = db.cursor(dictionary=True)
 
@@ -298,6 +617,10 @@ def login():
     cursor.close()
 
     if user_data and verify_password(user_data['password_hash'], password):
+        login_throttle.succeeded(username)
+        if needs_rehash(user_data['password_hash']):
+            rehash_in_background(user_data['user_id'], user_data['password_hash'], password, connect_db)
+
         # Create user object and log them in
         user = create_user_from_db(user_data)
         login_user(user)
@@ -335,31 +658,36 @@ def logout():
 
 @app.route('/api/profile/<int:user_id>/<string:role>', methods=['GET'])
 def get_profile(user_id, role):
-    """Fetches user profile data (Student or Faculty)."""
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
+    """Fetches user profile data (Student or Faculty); ?fields= selects columns."""
+    if role not in ('Student', 'Faculty'):
+        return jsonify({'message': 'Invalid role.'}), 400
+    columns = fields.STUDENT_PROFILE_FIELDS if role == 'Student' else fields.FACULTY_PROFILE_FIELDS
+    select, error = fields.select_list(columns, request.args.get('fields'))
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
 
     if role == 'Student':
-        cursor.execute(
-            """
-            SELECT s.*,
-                   (SELECT department FROM Student_Fees WHERE student_id = s.student_id LIMIT 1) as department_name
+        profile = query_cache.fetch(
+            get_db(),
+            f"""
+            SELECT {select}
             FROM Student_Info s
+            LEFT JOIN Departments d ON s.dept_id = d.dept_id
             WHERE s.student_id = %s
             """,
-            (user_id,)
-        )
-    elif role == 'Faculty':
-        cursor.execute(
-            "SELECT *, department as department_name FROM Faculty_Info WHERE faculty_id = %s",
-            (user_id,)
+            (user_id,), tables=('Student_Info', 'Departments'), name='profile', one=True
         )
     else:
-        cursor.close()
-        return jsonify({'message': 'Invalid role.'}), 400
-
-    profile = cursor.fetchone()
-    cursor.close()
+        profile = query_cache.fetch(
+            get_db(),
+            f"""
+            SELECT {select}
+            FROM Faculty_Info f
+            LEFT JOIN Departments d ON f.dept_id = d.dept_id
+            WHERE f.faculty_id = %s
+            """,
+            (user_id,), tables=('Faculty_Info', 'Departments'), name='profile', one=True
+        )
 
     if profile:
         profile_dict = dict(profile)
@@ -377,21 +705,20 @@ def get_profile(user_id, role):
 @app.route('/api/timetable/<int:user_id>/<string:role>', methods=['GET'])
 def get_timetable(user_id, role):
     """Fetches class timetable based on user role."""
-    db = get_db()
-    cursor = db.cursor(dictionary=True)
-
     if role == 'Student':
         query = """
             SELECT t.day_of_week, t.start_time, t.end_time, t.location,
                    s.subject_name,
                    CONCAT(f.first_name, ' ', f.last_name) AS faculty_name
-            FROM Class_Timetable t
+            FROM Enrollment e
+            JOIN Class_Timetable t ON t.subject_id = e.subject_id
             JOIN Subjects s ON t.subject_id = s.subject_id
             JOIN Faculty_Info f ON t.faculty_id = f.faculty_id
-            WHERE t.subject_id IN (SELECT subject_id FROM Student_Results WHERE student_id = %s)
+            WHERE e.student_id = %s AND e.term = %s
             ORDER BY FIELD(t.day_of_week, 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'), t.start_time
         """
-        params = (user_id,)
+        params = (user_id, CURRENT_TERM)
+        tables = ('Enrollment', 'Class_Timetable', 'Subjects', 'Faculty_Info')
     elif role == 'Faculty':
         query = """
             SELECT t.day_of_week, t.start_time, t.end_time, t.location,
@@ -404,13 +731,11 @@ def get_timetable(user_id, role):
             ORDER BY FIELD(t.day_of_week, 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'), t.start_time
         """
         params = (user_id,)
+        tables = ('Class_Timetable', 'Subjects', 'Faculty_Info')
     else:
-        cursor.close()
         return jsonify({'message': 'Invalid role.'}), 400
 
-    cursor.execute(query, params)
-    timetable = cursor.fetchall()  # Already a list of dicts
-    cursor.close()
+    timetable = query_cache.fetch(get_db(), query, params, tables=tables, name='timetable')
 
     # Convert time objects to strings
     for row in timetable:
@@ -422,16 +747,20 @@ def get_timetable(user_id, role):
 
 @app.route('/api/results/<int:student_id>', methods=['GET'])
 def get_results(student_id):
-    """Fetches student results."""
+    """Fetches student results; ?fields= selects columns."""
+    select, error = fields.select_list(fields.RESULT_FIELDS, request.args.get('fields'))
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+
     db = get_db()
     cursor = db.cursor(dictionary=True)
     cursor.execute(
-        """
-        SELECT result_id, subject_name, exam_date, theory_marks, practical_marks, 
-               credits, grade, status_exam, department
-        FROM Student_Results
-        WHERE student_id = %s
-        ORDER BY exam_date DESC
+        f"""
+        SELECT {select}
+        FROM Student_Results sr
+        JOIN Departments d ON sr.dept_id = d.dept_id
+        WHERE sr.student_id = %s
+        ORDER BY sr.exam_date DESC
         """,
         (student_id,)
     )
@@ -450,25 +779,34 @@ def get_results(student_id):
 
 @app.route('/api/attendance/<int:student_id>', methods=['GET'])
 def get_attendance(student_id):
-    """Calculates and fetches student attendance summary."""
+    """Calculates and fetches student attendance summary for the current (or ?term=) term."""
     db = get_db()
+    term = attendance_term(db)
+    if term is None:
+        return unknown_term_response()
     cursor = db.cursor(dictionary=True)
 
-    cursor.execute(
-        """
-        SELECT T1.subject_name,
-               COUNT(T2.status) AS total_classes,
-               SUM(CASE WHEN T2.status = 'Present' THEN 1 ELSE 0 END) AS classes_present
-        FROM Subjects T1
-        JOIN Student_Attendance T2 ON T1.subject_id = T2.subject_id
-        WHERE T2.student_id = %s
-        GROUP BY T1.subject_name
-        """,
-        (student_id,)
-    )
+    if term['status'] == 'Archived':
+        rows = [{'subject_name': row['subject_name'], 'total_classes': row['total_classes'],
+                 'classes_present': row['classes_attended']}
+                for row in archived_attendance_summary(cursor, term['term'], student_id)]
+    else:
+        cursor.execute(
+            """
+            SELECT T1.subject_name,
+                   COUNT(T2.status) AS total_classes,
+                   SUM(CASE WHEN T2.status = 'Present' THEN 1 ELSE 0 END) AS classes_present
+            FROM Subjects T1
+            JOIN Student_Attendance T2 ON T1.subject_id = T2.subject_id
+            WHERE T2.student_id = %s AND T2.attendance_date BETWEEN %s AND %s
+            GROUP BY T1.subject_name
+            """,
+            (student_id, term['start_date'], term['end_date'])
+        )
+        rows = cursor.fetchall()
 
     attendance_summary = []
-    for row in cursor.fetchall():
+    for row in rows:
         row_dict = dict(row)
         total = row_dict['total_classes']
         present = row_dict.get('classes_present') or 0
@@ -487,12 +825,16 @@ def get_attendance(student_id):
 
 @app.route('/api/fees/<int:student_id>', methods=['GET'])
 def get_fees(student_id):
-    """Fetches student fee information."""
+    """Fetches student fee information; ?fields= selects columns."""
+    select, error = fields.select_list(fields.FEE_FIELDS, request.args.get('fields'))
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+
     db = get_db()
     cursor = db.cursor(dictionary=True)
     cursor.execute(
-        """
-        SELECT *
+        f"""
+        SELECT {select}
         FROM Student_Fees
         WHERE student_id = %s
         ORDER BY status, paid_date DESC
@@ -503,37 +845,36 @@ def get_fees(student_id):
     cursor.close()
 
     # Convert decimals/dates to proper types
-    for row in fees:
-        for key, value in list(row.items()):
-            if isinstance(value, Decimal):  # Handle Decimal objects
-                row[key] = float(value)
-            elif isinstance(value, (bytes, bytearray)):
-                row[key] = value.decode('utf-8', errors='ignore')
-            elif hasattr(value, 'isoformat'):  # Handle dates
-                row[key] = value.isoformat()
+    fields.to_json_types(fees)
 
     return jsonify({'success': True, 'data': fees})
 
 
 @app.route('/api/library/<int:student_id>', methods=['GET'])
 def get_library(student_id):
-    """Fetches student library transactions."""
+    """Fetches student library transactions; ?fields= selects columns."""
+    select, error = fields.select_list(fields.LIBRARY_FIELDS, request.args.get('fields'))
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+
     db = get_db()
     cursor = db.cursor(dictionary=True)
     cursor.execute(
-        """
-        SELECT book_title, book_author, issue_date, due_date, return_date, status
+        f"""
+        SELECT {select}
         FROM Library_Transaction
-        WHERE student_id = %s
+        WHERE student_id = %(student_id)s
         ORDER BY issue_date DESC
         """,
-        (student_id,)
+        {'student_id': student_id, 'fine_per_day': library.FINE_PER_DAY}
     )
     transactions = cursor.fetchall()
     cursor.close()
 
-    # Convert dates
+    # Convert dates (status/fine are computed so loans are not stale between sweeps)
     for row in transactions:
+        if row.get('fine_amount') is not None:
+            row['fine_amount'] = float(row['fine_amount'])
         if row.get('issue_date'):
             row['issue_date'] = str(row['issue_date'])
         if row.get('due_date'):
@@ -544,6 +885,52 @@ def get_library(student_id):
     return jsonify({'success': True, 'data': transactions})
 
 
+@app.route('/api/library/books', methods=['GET'])
+@login_required
+def get_library_books():
+    """List the book catalog, or look up one book with ?isbn=."""
+    try:
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+
+        isbn = request.args.get('isbn')
+        if isbn:
+            book = library.get_book(cursor, isbn=isbn.strip())
+            books = [book] if book else []
+        else:
+            cursor.execute("""
+                SELECT book_id, isbn, title, author, total_copies, available_copies
+                FROM Library_Book
+                ORDER BY title
+            """)
+            books = cursor.fetchall()
+        cursor.close()
+
+        return jsonify({'success': True, 'books': books})
+    except Exception as e:
+        print(f"Error getting library books: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/library/books/<int:book_id>/availability', methods=['GET'])
+@login_required
+def get_book_availability(book_id):
+    """Get the number of copies of a book currently on the shelf."""
+    try:
+        db = get_db()
+        cursor = db.cursor()
+        available = library.available_copies(cursor, book_id)
+        cursor.close()
+
+        if available is None:
+            return jsonify({'success': False, 'message': 'Book not found'}), 404
+        return jsonify({'success': True, 'book_id': book_id,
+                        'available_copies': available, 'available': available > 0})
+    except Exception as e:
+        print(f"Error getting book availability: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 # ============================================
 # ADMIN API ENDPOINTS (Week 2)
 # ============================================
@@ -592,20 +979,80 @@ def get_admin_stats():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@app.route('/api/admin/login-throttle', methods=['GET'])
+@admin_required
+def get_login_throttle_stats():
+    """Login throttling counters for the worker process serving the request."""
+    return jsonify({'success': True, 'pid': os.getpid(), 'stats': login_throttle.stats()})
+
+
+def delta_response(name, select, source, alias, table):
+    """Answer the ?since=<token> variant of an admin list endpoint (see changes.read_delta)."""
+    try:
+        delta = changes.read_delta(get_db(), select, source, alias, table, request.args['since'],
+                                   changes.page_size(request.args.get('limit')))
+    except changes.TokenExpired as e:
+        return jsonify({'success': False, 'message': str(e)}), 410
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, name: fields.to_json_types(delta['rows']), 'deleted': delta['deleted'],
+                    'next_since': delta['next_since'], 'has_more': delta['has_more']})
+
+
+@app.route('/api/admin/changes', methods=['GET'])
+@admin_required
+def get_change_feed():
+    """
+    Row changes of the tracked tables in commit order, for sync clients.
+
+    Query: since (token of the last change processed, '0' to start), limit,
+    table (repeatable subset of changes.TRACKED_TABLES). Each change carries its
+    own token; resume from `next_since`. 410 means the token is past retention.
+    """
+    try:
+        feed = changes.read_feed(get_db(), request.args.get('since', '0'),
+                                 changes.page_size(request.args.get('limit')),
+                                 set(request.args.getlist('table')) or None)
+        return jsonify({'success': True, **feed})
+    except changes.TokenExpired as e:
+        return jsonify({'success': False, 'message': str(e)}), 410
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error reading change feed: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/query-cache', methods=['GET'])
+@admin_required
+def get_query_cache_stats():
+    """Query cache size, evictions and hit ratio per endpoint for this worker process."""
+    return jsonify({'success': True, 'pid': os.getpid(), 'stats': query_cache.stats()})
+
+
 @app.route('/api/admin/students', methods=['GET'])
 @admin_required
 def get_all_students():
-    """Get all students for admin panel. Faculty only."""
+    """Get all students for admin panel (?fields= selects columns). Faculty only."""
     try:
+        select, error = fields.select_list(fields.ADMIN_STUDENT_FIELDS, request.args.get('fields'))
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+
+        source = """
+            Student_Info s
+            LEFT JOIN Departments d ON s.dept_id = d.dept_id
+            LEFT JOIN User_Credentials u ON s.student_id = u.student_ref_id
+        """
+        if request.args.get('since'):
+            return delta_response('students', select, source, 's', 'Student_Info')
+
         db = get_db()
         cursor = db.cursor(dictionary=True)
         
-        cursor.execute("""
-            SELECT s.student_id, s.first_name, s.last_name, s.email, 
-                   s.phone_number, s.enrollment_date, s.date_of_birth, s.gender,
-                   u.username
-            FROM Student_Info s
-            LEFT JOIN User_Credentials u ON s.student_id = u.student_ref_id
+        cursor.execute(f"""
+            SELECT {select}
+            FROM {source}
             ORDER BY s.student_id DESC
         """)
         
@@ -627,6 +1074,7 @@ def get_all_students():
 
 @app.route('/api/admin/students', methods=['POST'])
 @admin_required
+@query_cache.invalidates('Student_Info', 'User_Credentials')
 def add_student():
     """Add a new student. Faculty only."""
     try:
@@ -648,7 +1096,11 @@ def add_student():
         if not is_valid:
             return jsonify({'success': False, 'message': error}), 400
         
-        is_valid, error = validate_email_address(data['email'])
+        # email_check: 'deliverable' adds a DNS lookup of the domain, 'syntax' skips it
+        try:
+            is_valid, error = validate_email_address(data['email'], mode=data.get('email_check'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         if not is_valid:
             return jsonify({'success': False, 'message': error}), 400
         
@@ -662,8 +1114,8 @@ def add_student():
         # Insert student
         cursor.execute("""
             INSERT INTO Student_Info 
-            (first_name, last_name, date_of_birth, email, phone_number, enrollment_date, gender)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            (first_name, last_name, date_of_birth, email, phone_number, enrollment_date, gender, dept_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """, (
             sanitize_input(data['first_name']),
             sanitize_input(data['last_name']),
@@ -671,7 +1123,8 @@ def add_student():
             sanitize_input(data['email']),
             sanitize_input(data['phone_number']),
             data['enrollment_date'],
-            data['gender']
+            data['gender'],
+            data.get('dept_id')
         ))
         
         student_id = cursor.lastrowid
@@ -685,6 +1138,7 @@ def add_student():
         
         db.commit()
         cursor.close()
+        refresh_search('student', student_id)
         
         return jsonify({
             'success': True, 
@@ -702,6 +1156,7 @@ def add_student():
 
 @app.route('/api/admin/students/<int:student_id>', methods=['PUT'])
 @admin_required
+@query_cache.invalidates('Student_Info', 'User_Credentials')
 def update_student(student_id):
     """Update student information. Faculty only."""
     try:
@@ -714,7 +1169,8 @@ def update_student(student_id):
         cursor.execute("""
             UPDATE Student_Info 
             SET first_name = %s, last_name = %s, date_of_birth = %s, 
-                email = %s, phone_number = %s, enrollment_date = %s, gender = %s
+                email = %s, phone_number = %s, enrollment_date = %s, gender = %s,
+                dept_id = %s
             WHERE student_id = %s
         """, (
             sanitize_input(data['first_name']),
@@ -724,6 +1180,7 @@ def update_student(student_id):
             sanitize_input(data['phone_number']),
             data['enrollment_date'],
             data['gender'],
+            data.get('dept_id'),
             student_id
         ))
         
@@ -735,8 +1192,12 @@ def update_student(student_id):
                 WHERE student_ref_id = %s
             """, (sanitize_input(data['username']), student_id))
         
+        log_activity(cursor, 'Student', student_id, 'profile', 'Profile Updated',
+                     'Your profile was updated by the administration', 'user-edit')
+        
         db.commit()
         cursor.close()
+        refresh_search('student', student_id)
         
         return jsonify({'success': True, 'message': 'Student updated successfully'})
     except mysql.connector.IntegrityError:
@@ -750,6 +1211,8 @@ def update_student(student_id):
 
 @app.route('/api/admin/students/<int:student_id>', methods=['DELETE'])
 @admin_required
+@query_cache.invalidates('Enrollment', 'Library_Book', 'Library_Transaction', 'Student_Attendance', 'Student_Fees',
+                         'Student_Info', 'Student_Results', 'Subject_Headcount', 'User_Credentials')
 def delete_student(student_id):
     """Delete a student and all related records. Faculty only."""
     try:
@@ -757,7 +1220,15 @@ def delete_student(student_id):
         cursor = db.cursor()
         
         # Delete all related records first (foreign key constraints)
-        # 1. Library transactions
+        # 1. Library transactions (return any copies still out to the shelf)
+        cursor.execute("""
+            UPDATE Library_Book b
+            JOIN (SELECT book_id, COUNT(*) AS copies
+                  FROM Library_Transaction
+                  WHERE student_id = %s AND return_date IS NULL AND book_id IS NOT NULL
+                  GROUP BY book_id) t ON t.book_id = b.book_id
+            SET b.available_copies = b.available_copies + t.copies
+        """, (student_id,))
         cursor.execute("DELETE FROM Library_Transaction WHERE student_id = %s", (student_id,))
         
         # 2. Student fees
@@ -769,14 +1240,28 @@ def delete_student(student_id):
         # 4. Student results
         cursor.execute("DELETE FROM Student_Results WHERE student_id = %s", (student_id,))
         
-        # 5. User credentials
+        # 5. Enrollments (keep denormalized headcounts in step)
+        cursor.execute("""
+            UPDATE Subject_Headcount h
+            JOIN Enrollment e ON e.subject_id = h.subject_id AND e.term = h.term
+            SET h.headcount = GREATEST(h.headcount - 1, 0)
+            WHERE e.student_id = %s
+        """, (student_id,))
+        cursor.execute("DELETE FROM Enrollment WHERE student_id = %s", (student_id,))
+        
+        # 6. User credentials
         cursor.execute("DELETE FROM User_Credentials WHERE student_ref_id = %s", (student_id,))
         
-        # 6. Finally delete student
+        # 7. Finally delete student
         cursor.execute("DELETE FROM Student_Info WHERE student_id = %s", (student_id,))
         
         db.commit()
         cursor.close()
+        refresh_search('student', student_id)
+        
+        gpa_engine.invalidate_all()
+        result_stats.invalidate_all()
+        attendance_bitmaps.invalidate_all()
         
         return jsonify({'success': True, 'message': 'Student and all related records deleted successfully'})
     except Exception as e:
@@ -788,17 +1273,26 @@ def delete_student(student_id):
 @app.route('/api/admin/faculty', methods=['GET'])
 @admin_required
 def get_all_faculty():
-    """Get all faculty for admin panel."""
+    """Get all faculty for admin panel (?fields= selects columns)."""
     try:
+        select, error = fields.select_list(fields.ADMIN_FACULTY_FIELDS, request.args.get('fields'))
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+
+        source = """
+            Faculty_Info f
+            JOIN Departments d ON f.dept_id = d.dept_id
+            LEFT JOIN User_Credentials u ON f.faculty_id = u.faculty_ref_id
+        """
+        if request.args.get('since'):
+            return delta_response('faculty', select, source, 'f', 'Faculty_Info')
+
         db = get_db()
         cursor = db.cursor(dictionary=True)
         
-        cursor.execute("""
-            SELECT f.faculty_id, f.faculty_code, f.first_name, f.last_name, 
-                   f.gender, f.department, f.email, f.phone_number, f.hire_date,
-                   u.username
-            FROM Faculty_Info f
-            LEFT JOIN User_Credentials u ON f.faculty_id = u.faculty_ref_id
+        cursor.execute(f"""
+            SELECT {select}
+            FROM {source}
             ORDER BY f.faculty_id DESC
         """)
         
@@ -818,6 +1312,7 @@ def get_all_faculty():
 
 @app.route('/api/admin/faculty', methods=['POST'])
 @admin_required
+@query_cache.invalidates('Faculty_Info', 'User_Credentials')
 def add_faculty():
     """Add a new faculty member."""
     try:
@@ -825,10 +1320,17 @@ def add_faculty():
         
         # Validate required fields
         required_fields = ['faculty_code', 'first_name', 'last_name', 'gender', 
-                          'department', 'email', 'phone_number', 'hire_date', 'username']
+                          'dept_id', 'email', 'phone_number', 'hire_date', 'username']
         for field in required_fields:
             if not data.get(field):
                 return jsonify({'success': False, 'message': f'{field} is required'}), 400
+
+        try:
+            is_valid, error = validate_email_address(data['email'], mode=data.get('email_check'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        if not is_valid:
+            return jsonify({'success': False, 'message': error}), 400
         
         db = get_db()
         cursor = db.cursor()
@@ -836,14 +1338,14 @@ def add_faculty():
         # Insert faculty
         cursor.execute("""
             INSERT INTO Faculty_Info 
-            (faculty_code, first_name, last_name, gender, department, email, phone_number, hire_date)
+            (faculty_code, first_name, last_name, gender, dept_id, email, phone_number, hire_date)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """, (
             sanitize_input(data['faculty_code']),
             sanitize_input(data['first_name']),
             sanitize_input(data['last_name']),
             data['gender'],
-            sanitize_input(data['department']),
+            data['dept_id'],
             sanitize_input(data['email']),
             sanitize_input(data['phone_number']),
             data['hire_date']
@@ -860,6 +1362,7 @@ def add_faculty():
         
         db.commit()
         cursor.close()
+        refresh_search('faculty', faculty_id)
         
         return jsonify({
             'success': True, 
@@ -877,6 +1380,7 @@ def add_faculty():
 
 @app.route('/api/admin/faculty/<int:faculty_id>', methods=['PUT'])
 @admin_required
+@query_cache.invalidates('Faculty_Info', 'User_Credentials')
 def update_faculty(faculty_id):
     """Update faculty information."""
     try:
@@ -889,7 +1393,7 @@ def update_faculty(faculty_id):
         cursor.execute("""
             UPDATE Faculty_Info 
             SET faculty_code = %s, first_name = %s, last_name = %s, 
-                gender = %s, department = %s, email = %s, 
+                gender = %s, dept_id = %s, email = %s, 
                 phone_number = %s, hire_date = %s
             WHERE faculty_id = %s
         """, (
@@ -897,7 +1401,7 @@ def update_faculty(faculty_id):
             sanitize_input(data['first_name']),
             sanitize_input(data['last_name']),
             data['gender'],
-            sanitize_input(data['department']),
+            data['dept_id'],
             sanitize_input(data['email']),
             sanitize_input(data['phone_number']),
             data['hire_date'],
@@ -912,8 +1416,12 @@ def update_faculty(faculty_id):
                 WHERE faculty_ref_id = %s
             """, (sanitize_input(data['username']), faculty_id))
         
+        log_activity(cursor, 'Faculty', faculty_id, 'profile', 'Profile Updated',
+                     'Your profile was updated by the administration', 'user-edit')
+        
         db.commit()
         cursor.close()
+        refresh_search('faculty', faculty_id)
         
         return jsonify({'success': True, 'message': 'Faculty updated successfully'})
     except mysql.connector.IntegrityError:
@@ -927,6 +1435,7 @@ def update_faculty(faculty_id):
 
 @app.route('/api/admin/faculty/<int:faculty_id>', methods=['DELETE'])
 @admin_required
+@query_cache.invalidates('Faculty_Info', 'User_Credentials')
 def delete_faculty(faculty_id):
     """Delete a faculty member."""
     try:
@@ -941,6 +1450,7 @@ def delete_faculty(faculty_id):
         
         db.commit()
         cursor.close()
+        refresh_search('faculty', faculty_id)
         
         return jsonify({'success': True, 'message': 'Faculty deleted successfully'})
     except Exception as e:
@@ -952,23 +1462,32 @@ def delete_faculty(faculty_id):
 @app.route('/api/admin/departments', methods=['GET'])
 @admin_required
 def get_all_departments():
-    """Get all departments with student/faculty counts."""
+    """Get all departments with student/faculty counts (?fields= selects columns)."""
     try:
-        db = get_db()
-        cursor = db.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT d.dept_id, d.dept_name,
-                   (SELECT COUNT(*) FROM Student_Results sr 
-                    WHERE sr.department = d.dept_id) as student_count,
-                   (SELECT COUNT(*) FROM Faculty_Info f 
-                    WHERE f.department = d.dept_name) as faculty_count
-            FROM Departments d
+        select, error = fields.select_list(fields.DEPARTMENT_FIELDS, request.args.get('fields'))
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+
+        # The count subqueries scan whole tables; skip them when no count is requested
+        student_counts = """
+            LEFT JOIN (SELECT dept_id, COUNT(*) as student_count
+                       FROM Student_Info GROUP BY dept_id) sc ON sc.dept_id = d.dept_id
+        """ if fields.references(select, 'sc') else ""
+        faculty_counts = """
+            LEFT JOIN (SELECT dept_id, COUNT(*) as faculty_count
+                       FROM Faculty_Info GROUP BY dept_id) fc ON fc.dept_id = d.dept_id
+        """ if fields.references(select, 'fc') else ""
+        source = f"Departments d {student_counts} {faculty_counts}"
+        if request.args.get('since'):
+            return delta_response('departments', select, source, 'd', 'Departments')
+
+        tables = ('Departments',) + (('Student_Info',) if student_counts else ()) \
+            + (('Faculty_Info',) if faculty_counts else ())
+        departments = query_cache.fetch(get_db(), f"""
+            SELECT {select}
+            FROM {source}
             ORDER BY d.dept_id
-        """)
-        
-        departments = cursor.fetchall()
-        cursor.close()
+        """, tables=tables, name='departments')
         
         return jsonify({'success': True, 'departments': departments})
     except Exception as e:
@@ -978,6 +1497,7 @@ def get_all_departments():
 
 @app.route('/api/admin/departments', methods=['POST'])
 @admin_required
+@query_cache.invalidates('Departments')
 def add_department():
     """Add a new department."""
     try:
@@ -1014,6 +1534,7 @@ def add_department():
 
 @app.route('/api/admin/departments/<int:dept_id>', methods=['PUT'])
 @admin_required
+@query_cache.invalidates('Departments')
 def update_department(dept_id):
     """Update department information."""
     try:
@@ -1040,6 +1561,7 @@ def update_department(dept_id):
 
 @app.route('/api/admin/departments/<int:dept_id>', methods=['DELETE'])
 @admin_required
+@query_cache.invalidates('Departments')
 def delete_department(dept_id):
     """Delete a department."""
     try:
@@ -1052,6 +1574,9 @@ def delete_department(dept_id):
         cursor.close()
         
         return jsonify({'success': True, 'message': 'Department deleted successfully'})
+    except mysql.connector.IntegrityError:
+        db.rollback()
+        return jsonify({'success': False, 'message': 'Department is still referenced by students, faculty or subjects'}), 400
     except Exception as e:
         db.rollback()
         print(f"Error deleting department: {e}")
@@ -1061,21 +1586,21 @@ def delete_department(dept_id):
 @app.route('/api/admin/subjects', methods=['GET'])
 @admin_required
 def get_all_subjects():
-    """Get all subjects/courses."""
+    """Get all subjects/courses (?fields= selects columns)."""
     try:
-        db = get_db()
-        cursor = db.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT s.subject_id, s.subject_code, s.subject_name, s.credits, 
-                   s.dept_id, d.dept_name
-            FROM Subjects s
-            LEFT JOIN Departments d ON s.dept_id = d.dept_id
+        select, error = fields.select_list(fields.SUBJECT_FIELDS, request.args.get('fields'))
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+
+        source = "Subjects s LEFT JOIN Departments d ON s.dept_id = d.dept_id"
+        if request.args.get('since'):
+            return delta_response('subjects', select, source, 's', 'Subjects')
+
+        subjects = query_cache.fetch(get_db(), f"""
+            SELECT {select}
+            FROM {source}
             ORDER BY s.subject_code
-        """)
-        
-        subjects = cursor.fetchall()
-        cursor.close()
+        """, tables=('Subjects', 'Departments'), name='subjects')
         
         return jsonify({'success': True, 'subjects': subjects})
     except Exception as e:
@@ -1085,6 +1610,7 @@ def get_all_subjects():
 
 @app.route('/api/admin/subjects', methods=['POST'])
 @admin_required
+@query_cache.invalidates('Subjects')
 def add_subject():
     """Add a new subject/course."""
     try:
@@ -1111,6 +1637,7 @@ def add_subject():
         subject_id = cursor.lastrowid
         db.commit()
         cursor.close()
+        refresh_search('subject', subject_id)
         
         return jsonify({
             'success': True, 
@@ -1128,6 +1655,7 @@ def add_subject():
 
 @app.route('/api/admin/subjects/<int:subject_id>', methods=['PUT'])
 @admin_required
+@query_cache.invalidates('Subjects')
 def update_subject(subject_id):
     """Update subject information."""
     try:
@@ -1150,6 +1678,7 @@ def update_subject(subject_id):
         
         db.commit()
         cursor.close()
+        refresh_search('subject', subject_id)
         
         return jsonify({'success': True, 'message': 'Subject updated successfully'})
     except Exception as e:
@@ -1160,16 +1689,29 @@ def update_subject(subject_id):
 
 @app.route('/api/admin/subjects/<int:subject_id>', methods=['DELETE'])
 @admin_required
+@query_cache.invalidates('Subjects', 'Enrollment', 'Subject_Headcount', 'Grading_Policy')
 def delete_subject(subject_id):
     """Delete a subject."""
     try:
         db = get_db()
         cursor = db.cursor()
         
+        # Student_Attendance is partitioned and has no foreign key to enforce this
+        cursor.execute("SELECT 1 FROM Student_Attendance WHERE subject_id = %s LIMIT 1", (subject_id,))
+        if cursor.fetchone():
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Subject has attendance records'}), 400
+        
+        # Remove enrollments and headcounts explicitly rather than by FK cascade,
+        # so enrollment bookkeeping never depends on cascades
+        cursor.execute("DELETE FROM Enrollment WHERE subject_id = %s", (subject_id,))
+        cursor.execute("DELETE FROM Subject_Headcount WHERE subject_id = %s", (subject_id,))
         cursor.execute("DELETE FROM Subjects WHERE subject_id = %s", (subject_id,))
+        cursor.execute("DELETE FROM Grading_Policy WHERE subject_id = %s", (subject_id,))
         
         db.commit()
         cursor.close()
+        refresh_search('subject', subject_id)
         
         return jsonify({'success': True, 'message': 'Subject deleted successfully'})
     except Exception as e:
@@ -1178,53 +1720,726 @@ def delete_subject(subject_id):
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
-@app.route('/api/admin/fees', methods=['GET'])
+@app.route('/api/admin/enrollments/<int:subject_id>', methods=['GET'])
 @admin_required
-def get_all_fees():
-    """Get all fee records with student names."""
+def get_subject_enrollments(subject_id):
+    """Get the roster and headcount for a subject in the current (or ?term=) term."""
     try:
+        term = request.args.get('term', CURRENT_TERM)
         db = get_db()
         cursor = db.cursor(dictionary=True)
-        
+
         cursor.execute("""
-            SELECT f.fee_id, f.student_id, f.department,
-                   f.tuition_fee, f.library_fee, f.lab_fee, f.exam_fee, 
-                   f.hostel_fee, f.other_charges, f.total_fee, f.status,
-                   CONCAT(s.first_name, ' ', s.last_name) as student_name
-            FROM Student_Fees f
-            JOIN Student_Info s ON f.student_id = s.student_id
-            ORDER BY f.student_id
-        """)
-        
-        fees = cursor.fetchall()
+            SELECT e.enrollment_id, e.student_id, e.enrolled_on,
+                   si.first_name, si.last_name, si.email
+            FROM Enrollment e
+            JOIN Student_Info si ON si.student_id = e.student_id
+            WHERE e.subject_id = %s AND e.term = %s
+            ORDER BY si.last_name, si.first_name
+        """, (subject_id, term))
+        enrollments = cursor.fetchall()
+
+        cursor.execute("""
+            SELECT headcount FROM Subject_Headcount
+            WHERE subject_id = %s AND term = %s
+        """, (subject_id, term))
+        row = cursor.fetchone()
         cursor.close()
-        
-        # Convert Decimal to float for JSON serialization
-        for fee in fees:
-            fee['tuition_fee'] = float(fee['tuition_fee'])
-            fee['library_fee'] = float(fee['library_fee'])
-            fee['lab_fee'] = float(fee['lab_fee'])
-            fee['exam_fee'] = float(fee['exam_fee'])
-            fee['hostel_fee'] = float(fee['hostel_fee'])
-            fee['other_charges'] = float(fee['other_charges'])
-            fee['total_fee'] = float(fee['total_fee'])
-        
-        return jsonify({'success': True, 'fees': fees})
+
+        for enrollment in enrollments:
+            enrollment['enrolled_on'] = str(enrollment['enrolled_on'])
+
+        return jsonify({
+            'success': True,
+            'term': term,
+            'headcount': row['headcount'] if row else 0,
+            'enrollments': enrollments
+        })
     except Exception as e:
-        print(f"Error getting fees: {e}")
+        print(f"Error getting enrollments: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
-# ============================================================================
-# FACULTY DASHBOARD ENDPOINTS (Week 3)
-# ============================================================================
+@app.route('/api/admin/enrollments', methods=['POST'])
+@admin_required
+@query_cache.invalidates('Enrollment', 'Subject_Headcount')
+def add_enrollment():
+    """Enroll a student in a subject."""
+    try:
+        data = request.get_json()
 
-@app.route('/faculty-dashboard')
-@login_required
-def faculty_dashboard_page():
-    """Faculty dashboard page - Faculty only."""
-    if current_user.user_role != 'Faculty':
-        return jsonify({
+        required_fields = ['student_id', 'subject_id']
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({'success': False, 'message': f'{field} is required'}), 400
+
+        db = get_db()
+        cursor = db.cursor()
+
+        created = enroll_student(cursor, data['student_id'], data['subject_id'], data.get('term'))
+        if created:
+            _, subject_name = get_subject_label(cursor, data['subject_id'])
+            log_activity(cursor, 'Student', data['student_id'], 'enrollment', 'Enrolled',
+                         f"Enrolled in {subject_name}", 'book-open')
+
+        db.commit()
+        cursor.close()
+
+        if not created:
+            return jsonify({'success': False, 'message': 'Student is already enrolled in this subject'}), 400
+        return jsonify({'success': True, 'message': 'Student enrolled successfully'})
+    except mysql.connector.IntegrityError:
+        db.rollback()
+        return jsonify({'success': False, 'message': 'Student or subject does not exist'}), 400
+    except Exception as e:
+        db.rollback()
+        print(f"Error adding enrollment: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/enrollments/<int:student_id>/<int:subject_id>', methods=['DELETE'])
+@admin_required
+@query_cache.invalidates('Enrollment', 'Subject_Headcount')
+def delete_enrollment(student_id, subject_id):
+    """Remove a student from a subject in the current (or ?term=) term."""
+    try:
+        db = get_db()
+        cursor = db.cursor()
+
+        removed = unenroll_student(cursor, student_id, subject_id, request.args.get('term'))
+
+        db.commit()
+        cursor.close()
+
+        if not removed:
+            return jsonify({'success': False, 'message': 'Enrollment not found'}), 404
+        return jsonify({'success': True, 'message': 'Enrollment removed successfully'})
+    except Exception as e:
+        db.rollback()
+        print(f"Error removing enrollment: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/fees', methods=['GET'])
+@admin_required
+def get_all_fees():
+    """Get all fee records with student names (?fields= selects columns)."""
+    try:
+        select, error = fields.select_list(fields.ADMIN_FEE_FIELDS, request.args.get('fields'))
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+
+        source = """
+            Student_Fees f
+            JOIN Student_Info s ON f.student_id = s.student_id
+            JOIN Departments d ON f.dept_id = d.dept_id
+        """
+        if request.args.get('since'):
+            return delta_response('fees', select, source, 'f', 'Student_Fees')
+
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+        
+        cursor.execute(f"""
+            SELECT {select}
+            FROM {source}
+            ORDER BY f.student_id
+        """)
+        
+        fees = cursor.fetchall()
+        cursor.close()
+        
+        # Convert Decimal to float for JSON serialization
+        fields.to_json_types(fees)
+        
+        return jsonify({'success': True, 'fees': fees})
+    except Exception as e:
+        print(f"Error getting fees: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/fees/<int:fee_id>', methods=['PUT'])
+@admin_required
+@query_cache.invalidates('Student_Fees')
+def update_fee_status(fee_id):
+    """Mark a fee record as Paid or Pending."""
+    try:
+        data = request.get_json()
+        status = data.get('status')
+
+        if status not in ('Paid', 'Pending'):
+            return jsonify({'success': False, 'message': "status must be 'Paid' or 'Pending'"}), 400
+
+        db = get_db()
+        cursor = db.cursor()
+
+        cursor.execute("SELECT student_id FROM Student_Fees WHERE fee_id = %s", (fee_id,))
+        row = cursor.fetchone()
+        if not row:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Fee record not found'}), 404
+
+        paid_date = (data.get('paid_date') or None) if status == 'Paid' else None
+        cursor.execute("""
+            UPDATE Student_Fees
+            SET status = %s, paid_date = COALESCE(%s, IF(%s = 'Paid', CURDATE(), NULL))
+            WHERE fee_id = %s
+        """, (status, paid_date, status, fee_id))
+
+        events = [('Student', row[0], 'fees', 'Fee Status Changed',
+                   f"Fee record #{fee_id} marked {status}", 'receipt')]
+        log_activities(cursor, events)
+
+        db.commit()
+        cursor.close()
+        notify(events)
+
+        return jsonify({'success': True, 'message': 'Fee status updated successfully'})
+    except Exception as e:
+        db.rollback()
+        print(f"Error updating fee status: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+def parse_timetable_entry(data, cursor):
+    """
+    Validate a timetable request body.
+
+    Returns:
+        tuple: (entry dict, None) or (None, error message)
+    """
+    required = ['faculty_id', 'subject_id', 'day_of_week', 'start_time', 'end_time']
+    if not all(data.get(field) for field in required):
+        return None, 'Missing required fields'
+    if data['day_of_week'] not in timetable.DAYS:
+        return None, 'day_of_week must be Monday to Saturday'
+    try:
+        start, end = timetable.to_minutes(data['start_time']), timetable.to_minutes(data['end_time'])
+    except ValueError:
+        return None, 'start_time and end_time must be HH:MM'
+    if end <= start:
+        return None, 'end_time must be after start_time'
+
+    dept_id = data.get('dept_id')
+    if not dept_id:
+        cursor.execute("SELECT dept_id FROM Subjects WHERE subject_id = %s", (data['subject_id'],))
+        row = cursor.fetchone()
+        if not row:
+            return None, 'Subject not found'
+        dept_id = row[0]
+
+    return {
+        'dept_id': int(dept_id),
+        'faculty_id': int(data['faculty_id']),
+        'subject_id': int(data['subject_id']),
+        'day_of_week': data['day_of_week'],
+        'start_time': timetable.format_minutes(start),
+        'end_time': timetable.format_minutes(end),
+        'location': (data.get('location') or '').strip() or None,
+    }, None
+
+
+@app.route('/api/admin/timetable', methods=['POST'])
+@admin_required
+def add_timetable_entry():
+    """Add a class to the timetable, rejecting faculty/room/department clashes."""
+    try:
+        db = get_db()
+        cursor = db.cursor()
+
+        entry, error = parse_timetable_entry(request.get_json(), cursor)
+        if error:
+            cursor.close()
+            return jsonify({'success': False, 'message': error}), 400
+
+        # Locks the timetable for writers on every worker until commit/rollback
+        version = timetable_index.lock_for_write(db)
+        with timetable_index.lock:
+            clashes = timetable_index.clashes(entry)
+            if clashes:
+                db.rollback()
+                cursor.close()
+                return jsonify({'success': False, 'message': 'Timetable clash', 'clashes': clashes}), 409
+
+            cursor.execute("""
+                INSERT INTO Class_Timetable (dept_id, faculty_id, subject_id, day_of_week, start_time, end_time, location)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (entry['dept_id'], entry['faculty_id'], entry['subject_id'], entry['day_of_week'],
+                  entry['start_time'], entry['end_time'], entry['location']))
+            timetable_id = cursor.lastrowid
+            db.commit()
+            timetable_index.add(timetable_id, entry, version)
+        cursor.close()
+
+        return jsonify({'success': True, 'message': 'Class added successfully', 'timetable_id': timetable_id})
+    except Exception as e:
+        db.rollback()
+        print(f"Error adding timetable entry: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/timetable/<int:timetable_id>', methods=['PUT'])
+@admin_required
+def update_timetable_entry(timetable_id):
+    """Move or edit a class, rejecting clashes with every other class."""
+    try:
+        db = get_db()
+        cursor = db.cursor()
+
+        entry, error = parse_timetable_entry(request.get_json(), cursor)
+        if error:
+            cursor.close()
+            return jsonify({'success': False, 'message': error}), 400
+
+        version = timetable_index.lock_for_write(db)
+        # rowcount of the UPDATE is 0 for unchanged values too, so check existence first
+        cursor.execute("SELECT timetable_id FROM Class_Timetable WHERE timetable_id = %s FOR UPDATE",
+                       (timetable_id,))
+        if cursor.fetchone() is None:
+            db.rollback()
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Timetable entry not found'}), 404
+
+        with timetable_index.lock:
+            clashes = timetable_index.clashes(entry, ignore_id=timetable_id)
+            if clashes:
+                db.rollback()
+                cursor.close()
+                return jsonify({'success': False, 'message': 'Timetable clash', 'clashes': clashes}), 409
+
+            cursor.execute("""
+                UPDATE Class_Timetable
+                SET dept_id = %s, faculty_id = %s, subject_id = %s, day_of_week = %s,
+                    start_time = %s, end_time = %s, location = %s
+                WHERE timetable_id = %s
+            """, (entry['dept_id'], entry['faculty_id'], entry['subject_id'], entry['day_of_week'],
+                  entry['start_time'], entry['end_time'], entry['location'], timetable_id))
+            db.commit()
+            timetable_index.add(timetable_id, entry, version)
+        cursor.close()
+
+        return jsonify({'success': True, 'message': 'Class updated successfully'})
+    except Exception as e:
+        db.rollback()
+        print(f"Error updating timetable entry: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/timetable/<int:timetable_id>', methods=['DELETE'])
+@admin_required
+def delete_timetable_entry(timetable_id):
+    """Remove a class from the timetable."""
+    try:
+        db = get_db()
+        cursor = db.cursor()
+
+        version = timetable_index.lock_for_write(db)
+        with timetable_index.lock:
+            cursor.execute("DELETE FROM Class_Timetable WHERE timetable_id = %s", (timetable_id,))
+            db.commit()
+            timetable_index.remove(timetable_id, version)
+        cursor.close()
+
+        return jsonify({'success': True, 'message': 'Class deleted successfully'})
+    except Exception as e:
+        db.rollback()
+        print(f"Error deleting timetable entry: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/timetable/validate', methods=['GET'])
+@admin_required
+def validate_timetable():
+    """Report every clash in the whole timetable (one sort-and-sweep pass)."""
+    try:
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute(timetable.TIMETABLE_QUERY)
+        rows = cursor.fetchall()
+        cursor.close()
+
+        report = timetable.validate(rows)
+        return jsonify({'success': True, 'valid': not report['clashes'] and not report['invalid'], **report})
+    except Exception as e:
+        print(f"Error validating timetable: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/timetable/generate', methods=['POST'])
+@admin_required
+def generate_timetable():
+    """
+    Start a background job that generates a clash-free weekly timetable.
+
+    Body (all optional): dept_id (only reschedule one department), assignments
+    ([{subject_id, faculty_id, hours?, room?}], defaults to the current pairs),
+    rooms, availability ({faculty_id: [{day, start, end}]}), time_limit and
+    write (replace Class_Timetable with the result). Poll
+    GET /api/admin/timetable/generate/<job_id> for the outcome.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        dept_id = int(data['dept_id']) if data.get('dept_id') else None
+        time_limit = float(data.get('time_limit') or scheduler.SCHEDULE_TIME_LIMIT)
+        state = scheduler.start_job(connect_db, dept_id, time_limit, data.get('write'),
+                                    {'assignments': data.get('assignments'), 'rooms': data.get('rooms'),
+                                     'availability': data.get('availability')},
+                                    writer=write_generated_timetable)
+        return jsonify({'success': True, 'job': state}), 202
+    except scheduler.JobBusy as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': f'Invalid request: {e}'}), 400
+    except Exception as e:
+        print(f"Error starting timetable job: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/timetable/generate/<string:job_id>', methods=['GET'])
+@admin_required
+def get_timetable_job(job_id):
+    """Get the state (and, once finished, the result) of a timetable generation job."""
+    state = scheduler.load_job(job_id, get_db())
+    if state is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    state['running'] = state['status'] in ('queued', 'running')
+    return jsonify({'success': True, 'job': state})
+
+
+def write_generated_timetable(db, rows, dept_id):
+    """Timetable job writer: replace the timetable; the clash index reloads on the next write."""
+    scheduler.write_schedule(db, rows, dept_id)
+    timetable_index.invalidate()
+
+
+@app.route('/api/admin/search', methods=['GET'])
+@admin_required
+def admin_search():
+    """Search students, faculty and subjects by name, email, username or code (?q=&limit=&type=)."""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'success': True, 'results': []})
+
+        kinds = set(request.args.getlist('type')) or None
+        search_index.ensure_fresh(get_db())
+        results = search_index.search(query, limit=request.args.get('limit', 10, type=int), kinds=kinds)
+
+        return jsonify({'success': True, 'results': results})
+    except Exception as e:
+        print(f"Error searching: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/library/books', methods=['POST'])
+@admin_required
+@query_cache.invalidates('Library_Book')
+def add_library_book():
+    """Add a book to the catalog, or add copies to an existing ISBN."""
+    try:
+        data = request.get_json()
+        isbn = (data.get('isbn') or '').strip()
+        title = (data.get('title') or '').strip()
+        copies = int(data.get('copies', 1))
+
+        if not isbn or not title:
+            return jsonify({'success': False, 'message': 'isbn and title are required'}), 400
+        if copies < 1:
+            return jsonify({'success': False, 'message': 'copies must be at least 1'}), 400
+
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+        library.add_copies(cursor, isbn, title, data.get('author'), copies)
+        db.commit()
+        book = library.get_book(cursor, isbn=isbn)
+        cursor.close()
+
+        return jsonify({'success': True, 'message': 'Book saved successfully', 'book': book})
+    except Exception as e:
+        db.rollback()
+        print(f"Error adding library book: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/library/issue', methods=['POST'])
+@admin_required
+@query_cache.invalidates('Library_Book', 'Library_Transaction')
+def issue_library_book():
+    """Issue a book (by book_id or isbn) to a student."""
+    try:
+        data = request.get_json()
+        student_id = data.get('student_id')
+        if not student_id or not (data.get('book_id') or data.get('isbn')):
+            return jsonify({'success': False, 'message': 'student_id and book_id or isbn are required'}), 400
+
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+
+        book = library.get_book(cursor, data.get('book_id'), data.get('isbn'))
+        if not book:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Book not found'}), 404
+
+        library_id = library.issue_book(cursor, student_id, book, due_date=data.get('due_date') or None)
+        events = [('Student', student_id, 'library', 'Book Issued',
+                   f"'{book['title']}' issued to you", 'book')]
+        log_activities(cursor, events)
+
+        db.commit()
+        cursor.close()
+        notify(events)
+
+        return jsonify({'success': True, 'message': 'Book issued successfully', 'library_id': library_id})
+    except library.BookUnavailable as e:
+        db.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 409
+    except Exception as e:
+        db.rollback()
+        print(f"Error issuing library book: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/library/return/<int:library_id>', methods=['POST'])
+@admin_required
+@query_cache.invalidates('Library_Book', 'Library_Transaction')
+def return_library_book(library_id):
+    """Record a book return and settle its fine."""
+    try:
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+
+        if not library.return_book(cursor, library_id):
+            db.rollback()
+            cursor.close()
+            return jsonify({'success': False, 'message': 'Open library transaction not found'}), 404
+
+        cursor.execute("SELECT student_id, book_title, fine_amount FROM Library_Transaction WHERE library_id = %s",
+                       (library_id,))
+        loan = cursor.fetchone()
+        events = [('Student', loan['student_id'], 'library', 'Book Returned',
+                   f"'{loan['book_title']}' returned", 'book')]
+        log_activities(cursor, events)
+
+        db.commit()
+        cursor.close()
+        notify(events)
+
+        return jsonify({'success': True, 'message': 'Book returned successfully',
+                        'fine_amount': float(loan['fine_amount'])})
+    except Exception as e:
+        db.rollback()
+        print(f"Error returning library book: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/rankings', methods=['GET'])
+@admin_required
+def get_department_rankings():
+    """Get GPA ranking of a department for a term (?dept_id=&term=&limit=)."""
+    try:
+        dept_id = request.args.get('dept_id', type=int)
+        if not dept_id:
+            return jsonify({'success': False, 'message': 'dept_id is required'}), 400
+        term = request.args.get('term', CURRENT_TERM)
+
+        ranking = gpa_engine.department_ranking(get_db(), dept_id, term,
+                                                limit=request.args.get('limit', type=int))
+        return jsonify({'success': True, 'term': term, 'dept_id': dept_id, 'ranking': ranking})
+    except Exception as e:
+        print(f"Error getting rankings: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/attendance-shortages', methods=['GET'])
+@admin_required
+def get_attendance_shortages():
+    """Get the latest nightly attendance shortage list (?page=&per_page=&dept_id=&date=)."""
+    snapshot_date = request.args.get('date')
+    if snapshot_date:
+        try:
+            snapshot_date = datetime.strptime(snapshot_date, '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'success': False, 'message': 'date must be YYYY-MM-DD'}), 400
+
+    try:
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+
+        run = get_latest_run(cursor, snapshot_date)
+        if not run:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'No attendance shortage snapshot found'}), 404
+
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
+        shortages, total = get_shortages(cursor, run['snapshot_date'], page, per_page,
+                                         request.args.get('dept_id', type=int))
+        cursor.close()
+
+        return jsonify({
+            'success': True,
+            'snapshot_date': run['snapshot_date'].isoformat(),
+            'threshold': float(run['threshold']),
+            'generated_at': run['finished_at'].isoformat(),
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'shortages': shortages
+        })
+    except Exception as e:
+        print(f"Error getting attendance shortages: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+def department_cohort(db, dept_id):
+    """Student ids of a department for the bitmap queries (None = everyone)."""
+    if not dept_id:
+        return None
+    cursor = db.cursor()
+    cursor.execute("SELECT student_id FROM Student_Info WHERE dept_id = %s", (dept_id,))
+    ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return ids
+
+
+@app.route('/api/admin/attendance/absence-streaks', methods=['GET'])
+@admin_required
+def get_absence_streaks():
+    """Students absent from the last N or more sessions of a subject (?min_run=3&dept_id=&term=)."""
+    try:
+        db = get_db()
+        term, error = bitmap_term(db)
+        if error:
+            return error
+        min_run = max(1, request.args.get('min_run', 3, type=int))
+        
+        streaks = attendance_bitmaps.absence_streaks(
+            db, term, min_run, department_cohort(db, request.args.get('dept_id', type=int)))
+        
+        cursor = db.cursor(dictionary=True)
+        names = subject_names(cursor, {row['subject_id'] for row in streaks})
+        student_ids = tuple({row['student_id'] for row in streaks})
+        students = {}
+        if student_ids:
+            cursor.execute(f"""
+                SELECT student_id, CONCAT(first_name, ' ', last_name) AS student_name
+                FROM Student_Info
+                WHERE student_id IN ({', '.join(['%s'] * len(student_ids))})
+            """, student_ids)
+            students = {row['student_id']: row['student_name'] for row in cursor.fetchall()}
+        cursor.close()
+        for row in streaks:
+            row['student_name'] = students.get(row['student_id'])
+            row['subject_name'] = names.get(row['subject_id'])
+            row['last_present'] = row['last_present'].isoformat() if row['last_present'] else None
+        
+        return jsonify({'success': True, 'term': term['term'], 'min_run': min_run, 'data': streaks})
+    except Exception as e:
+        print(f"Error getting absence streaks: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/attendance/heatmap', methods=['GET'])
+@admin_required
+def get_attendance_heatmap():
+    """Percentage present per subject and week of term for a cohort (?dept_id=&subject_id=&term=)."""
+    try:
+        db = get_db()
+        term, error = bitmap_term(db)
+        if error:
+            return error
+        subject_ids = request.args.getlist('subject_id', type=int) or None
+        
+        heatmap = attendance_bitmaps.heatmap(
+            db, term, department_cohort(db, request.args.get('dept_id', type=int)), subject_ids)
+        
+        cursor = db.cursor(dictionary=True)
+        names = subject_names(cursor, heatmap['subjects'])
+        cursor.close()
+        
+        return jsonify({
+            'success': True,
+            'term': term['term'],
+            'weeks': [week.isoformat() for week in heatmap['weeks']],
+            'subjects': [{'subject_id': subject_id, 'subject_name': names.get(subject_id)}
+                         for subject_id in heatmap['subjects']],
+            'rates': heatmap['rates'],
+            'sessions': heatmap['sessions']
+        })
+    except Exception as e:
+        print(f"Error getting attendance heatmap: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/transcripts', methods=['POST'])
+@admin_required
+def start_transcript_job():
+    """Start a batch transcript job for a department (or every student)."""
+    try:
+        data = request.get_json() or {}
+        state = transcripts.start_job(connect_db,
+                                      fmt=data.get('format', 'html'),
+                                      dept_id=data.get('dept_id'))
+        return jsonify({'success': True, 'job': state}), 202
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f"Error starting transcript job: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/transcripts/<string:job_id>', methods=['GET'])
+@admin_required
+def get_transcript_job(job_id):
+    """Get progress of a transcript job."""
+    state = transcripts.load_checkpoint(job_id)
+    if state is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+
+    total = state['total'] or 0
+    state['percent'] = round(state['done'] / total * 100, 2) if total else 0
+    state['running'] = transcripts.is_running(job_id)
+    return jsonify({'success': True, 'job': state})
+
+
+@app.route('/api/admin/transcripts/<string:job_id>/resume', methods=['POST'])
+@admin_required
+def resume_transcript_job(job_id):
+    """Resume an interrupted transcript job from its last checkpoint."""
+    try:
+        state = transcripts.start_job(connect_db, job_id=job_id)
+        return jsonify({'success': True, 'job': state}), 202
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+
+@app.route('/api/admin/transcripts/<string:job_id>/download', methods=['GET'])
+@admin_required
+def download_transcripts(job_id):
+    """Stream all transcripts of a completed job as one zip archive."""
+    state = transcripts.load_checkpoint(job_id)
+    if state is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    if state['status'] != 'completed':
+        return jsonify({'success': False, 'message': f"Job is {state['status']}"}), 409
+
+    return Response(
+        transcripts.stream_zip(job_id),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename=transcripts_{job_id}.zip'}
+    )
+
+
+# ============================================================================
+# FACULTY DASHBOARD ENDPOINTS (Week 3)
+# ============================================================================
+
+@app.route('/faculty-dashboard')
+@login_required
+def faculty_dashboard_page():
+    """Faculty dashboard page - Faculty only."""
+    if current_user.user_role != 'Faculty':
+        return jsonify({
             'success': False,
             'message': 'Faculty access required.'
         }), 403
@@ -1254,11 +2469,12 @@ def get_faculty_dashboard_stats(faculty_id):
         
         # Get total students taught (unique students in all classes)
         cursor.execute("""
-            SELECT COUNT(DISTINCT sr.student_id) as total_students
-            FROM Student_Results sr
-            JOIN Class_Timetable ct ON sr.subject_id = ct.subject_id
-            WHERE ct.faculty_id = %s
-        """, (faculty_id,))
+            SELECT COUNT(DISTINCT e.student_id) as total_students
+            FROM Enrollment e
+            JOIN (SELECT DISTINCT subject_id FROM Class_Timetable WHERE faculty_id = %s) ct
+              ON e.subject_id = ct.subject_id
+            WHERE e.term = %s
+        """, (faculty_id, CURRENT_TERM))
         students_result = cursor.fetchone()
         total_students = students_result['total_students'] if students_result else 0
         
@@ -1292,10 +2508,10 @@ def get_faculty_dashboard_stats(faculty_id):
         # Calculate average attendance (placeholder - will implement fully)
         avg_attendance = 85  # Default placeholder
         
-        # Recent activities (placeholder)
+        # Recent activities from the activity log
         recent_activities = [
-            {'title': 'Attendance Marked', 'description': 'CSE101 - 25 students', 'time': '2 hours ago'},
-            {'title': 'Marks Entered', 'description': 'CSE102 - Mid-term exam', 'time': '1 day ago'}
+            {'title': a['title'], 'description': a['message'], 'time': time_ago(a['created_at'])}
+            for a in get_recent_activity(cursor, 'Faculty', faculty_id, limit=5)
         ]
         
         cursor.close()
@@ -1319,23 +2535,28 @@ def get_faculty_dashboard_stats(faculty_id):
 @app.route('/api/faculty/classes/<int:faculty_id>', methods=['GET'])
 @login_required
 def get_faculty_classes(faculty_id):
-    """Get all classes/subjects taught by a faculty member."""
+    """Get all classes/subjects taught by a faculty member (?fields= selects columns)."""
     try:
+        select, error = fields.select_list(fields.FACULTY_CLASS_FIELDS, request.args.get('fields'))
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+
         db = get_db()
         cursor = db.cursor(dictionary=True)
         
-        cursor.execute("""
-            SELECT DISTINCT s.subject_id, s.subject_code, s.subject_name, 
-                   s.credits, d.dept_name,
-                   (SELECT COUNT(DISTINCT sr.student_id) 
-                    FROM Student_Results sr 
-                    WHERE sr.subject_id = s.subject_id) as student_count
+        # Both LEFT JOINs match at most one row, so they can be dropped when unused
+        dept_join = "LEFT JOIN Departments d ON s.dept_id = d.dept_id" if fields.references(select, 'd') else ""
+        headcount_join = ("LEFT JOIN Subject_Headcount h ON h.subject_id = s.subject_id AND h.term = %s"
+                          if fields.references(select, 'h') else "")
+        cursor.execute(f"""
+            SELECT {select}
             FROM Subjects s
-            JOIN Class_Timetable ct ON s.subject_id = ct.subject_id
-            LEFT JOIN Departments d ON s.dept_id = d.dept_id
-            WHERE ct.faculty_id = %s
+            JOIN (SELECT DISTINCT subject_id FROM Class_Timetable WHERE faculty_id = %s) ct
+              ON s.subject_id = ct.subject_id
+            {dept_join}
+            {headcount_join}
             ORDER BY s.subject_code
-        """, (faculty_id,))
+        """, (faculty_id, CURRENT_TERM) if headcount_join else (faculty_id,))
         
         subjects = cursor.fetchall()
         cursor.close()
@@ -1355,13 +2576,13 @@ def get_students_in_class(subject_id):
         cursor = db.cursor(dictionary=True)
         
         cursor.execute("""
-            SELECT DISTINCT si.student_id, 
+            SELECT si.student_id, 
                    si.first_name, si.last_name, si.email
-            FROM Student_Info si
-            JOIN Student_Results sr ON si.student_id = sr.student_id
-            WHERE sr.subject_id = %s
+            FROM Enrollment e
+            JOIN Student_Info si ON si.student_id = e.student_id
+            WHERE e.subject_id = %s AND e.term = %s
             ORDER BY si.last_name, si.first_name
-        """, (subject_id,))
+        """, (subject_id, CURRENT_TERM))
         
         students = cursor.fetchall()
         cursor.close()
@@ -1374,6 +2595,7 @@ def get_students_in_class(subject_id):
 
 @app.route('/api/faculty/attendance', methods=['POST'])
 @login_required
+@query_cache.invalidates('Student_Attendance')
 def mark_attendance():
     """Mark attendance for students (bulk operation)."""
     try:
@@ -1384,9 +2606,17 @@ def mark_attendance():
         
         if not subject_id or not date or not attendance_list:
             return jsonify({'success': False, 'message': 'Missing required fields'}), 400
-        
+
         db = get_db()
+        error = check_attendance_submission(db, subject_id, date, attendance_list)
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
+
+        if ATTENDANCE_GROUP_COMMIT:
+            return queue_attendance(subject_id, date, attendance_list)
+        
         cursor = db.cursor()
+        subject_code, subject_name = get_subject_label(cursor, subject_id)
         
         # Check if attendance already exists for this date
         cursor.execute("""
@@ -1422,15 +2652,91 @@ def mark_attendance():
                     'Present' if student['present'] else 'Absent'
                 ))
         
+        events = [
+            ('Student', student['student_id'], 'attendance', 'Attendance Marked',
+             f"{subject_name}: marked {'Present' if student['present'] else 'Absent'} on {date}",
+             'calendar-check')
+            for student in attendance_list
+        ]
+        events.append(('Faculty', current_user.ref_id, 'attendance', 'Attendance Marked',
+                       f"{subject_code} - {len(attendance_list)} students", 'clipboard-check'))
+        log_activities(cursor, events)
+        
         db.commit()
         cursor.close()
-        
-        return jsonify({'success': True, 'message': 'Attendance saved successfully'})
     except Exception as e:
         db.rollback()
         print(f"Error marking attendance: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+    # Attendance is committed from here on; nothing below may turn it into an error
+    notify(events)
+    record_attendance_bitmaps(subject_id, date,
+                              ((student['student_id'], student['present']) for student in attendance_list))
+    return jsonify({'success': True, 'message': 'Attendance saved successfully'})
+
+
+def record_attendance_bitmaps(subject_id, date, entries):
+    """Apply committed attendance to the bitmaps; on failure drop them so the next read rebuilds."""
+    try:
+        attendance_bitmaps.record(subject_id, datetime.strptime(date, '%Y-%m-%d').date(), entries)
+    except Exception as e:
+        print(f"Error updating attendance bitmaps for subject {subject_id} on {date}: {e}")
+        attendance_bitmaps.invalidate_all()
+
+
+def on_attendance_committed(records, events):
+    """Flush-thread callback: update the bitmaps and push live updates (the flush bumped the cache versions)."""
+    for record in records:
+        record_attendance_bitmaps(record['subject_id'], record['date'],
+                                  ((student_id, status == 'Present') for student_id, status in record['rows']))
+    notify(events)
+
+
+def start_attendance_queue():
+    """Start this worker's attendance flush thread (and replay any orphaned journal)."""
+    if ATTENDANCE_GROUP_COMMIT:
+        attendance_queue.start(connect_db, on_attendance_committed)
+
+
+def queue_attendance(subject_id, date, attendance_list):
+    """Validate a submission and hand it to the group-commit queue; 202 once it is journaled."""
+    try:
+        subject_id = int(subject_id)
+        date = datetime.strptime(date, '%Y-%m-%d').date().isoformat()
+        rows = [(int(student['student_id']), 'Present' if student['present'] else 'Absent')
+                for student in attendance_list]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid subject_id, date (YYYY-MM-DD) or attendance rows'}), 400
+
+    start_attendance_queue()
+    try:
+        submission_id = attendance_queue.submit(current_user.ref_id, subject_id, date, rows)
+    except QueueFull as e:
+        response = jsonify({'success': False, 'message': f'{e}. Please retry shortly.'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return jsonify({'success': True, 'message': 'Attendance queued', 'submission_id': submission_id,
+                    'status_url': f'/api/faculty/attendance/submissions/{submission_id}'}), 202
+
+
+@app.route('/api/faculty/attendance/submissions/<string:submission_id>', methods=['GET'])
+@login_required
+def get_attendance_submission(submission_id):
+    """Status of a queued attendance submission: queued, committed or failed."""
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Access denied. Faculty only.'}), 403
+    if len(submission_id) != 32 or not submission_id.isalnum():
+        return jsonify({'success': False, 'message': 'Invalid submission id'}), 400
+    try:
+        submission = attendance_queue.status(submission_id, get_db())
+    except Exception as e:
+        print(f"Error getting attendance submission {submission_id}: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    if submission is None:
+        return jsonify({'success': False, 'message': 'Submission not found'}), 404
+    return jsonify({'success': True, 'submission': submission})
+
 
 @app.route('/api/faculty/marks/<int:subject_id>', methods=['GET'])
 @login_required
@@ -1443,23 +2749,220 @@ def get_marks_for_subject(subject_id):
         cursor.execute("""
             SELECT si.student_id, si.first_name, si.last_name,
                    sr.theory_marks, sr.practical_marks, sr.grade
-            FROM Student_Info si
-            JOIN Student_Results sr ON si.student_id = sr.student_id
-            WHERE sr.subject_id = %s
+            FROM Enrollment e
+            JOIN Student_Info si ON si.student_id = e.student_id
+            LEFT JOIN Student_Results sr
+              ON sr.student_id = e.student_id AND sr.subject_id = e.subject_id
+            WHERE e.subject_id = %s AND e.term = %s
             ORDER BY si.last_name, si.first_name
-        """, (subject_id,))
+        """, (subject_id, CURRENT_TERM))
         
         students = cursor.fetchall()
         cursor.close()
         
-        return jsonify({'success': True, 'students': students})
+        policy_cursor = db.cursor()
+        policy = grading.resolve(grading.load_policies(policy_cursor), subject_id, CURRENT_TERM)
+        policy_cursor.close()
+        
+        return jsonify({'success': True, 'students': students, 'grading_policy': policy})
     except Exception as e:
         print(f"Error getting marks: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@app.route('/api/faculty/marks/<int:subject_id>/stats', methods=['GET'])
+@login_required
+def get_subject_result_stats(subject_id):
+    """Get mean, median, std, percentiles, grade histogram and pass rate of a subject's marks."""
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Access denied. Faculty only.'}), 403
+    try:
+        stats = result_stats.subject(get_db(), subject_id)
+    except Exception as e:
+        print(f"Error getting result stats for subject {subject_id}: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    if stats is None:
+        return jsonify({'success': False, 'message': 'No results recorded for this subject'}), 404
+    return jsonify({'success': True, 'subject_id': subject_id, 'stats': stats})
+
+
+@app.route('/api/faculty/departments/<int:dept_id>/result-stats', methods=['GET'])
+@login_required
+def get_department_result_stats(dept_id):
+    """Get result statistics of a department overall and for each of its subjects."""
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Access denied. Faculty only.'}), 403
+    try:
+        stats = result_stats.department(get_db(), dept_id)
+    except Exception as e:
+        print(f"Error getting result stats for department {dept_id}: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+    if stats is None:
+        return jsonify({'success': False, 'message': 'No results recorded for this department'}), 404
+    return jsonify({'success': True, 'dept_id': dept_id, 'stats': stats})
+
+
+def grading_scope(data):
+    """(subject_id, term) of a policy from a body or query string; 0 and '' mean any."""
+    try:
+        subject_id = int(data.get('subject_id') or 0)
+    except (TypeError, ValueError):
+        raise grading.PolicyError('subject_id must be an integer')
+    term = str(data.get('term') or '').strip()
+    if subject_id < 0:
+        raise grading.PolicyError('subject_id must be positive')
+    return subject_id, term
+
+
+def check_grading_scope(db, subject_id, term):
+    """Error message if the scope names an unknown subject or term, else None."""
+    if term and term_calendar.get(db, term) is None:
+        return f'Unknown academic term: {term}'
+    if subject_id:
+        cursor = db.cursor()
+        cursor.execute("SELECT 1 FROM Subjects WHERE subject_id = %s", (subject_id,))
+        found = cursor.fetchone()
+        cursor.close()
+        if not found:
+            return 'Subject not found'
+    return None
+
+
+def regrade(db, subject_id, term):
+    """Re-grade results of a scope (0 / '' = any); call invalidate_results(outcome['subjects']) after the commit."""
+    return grading.recompute(db, CURRENT_TERM, subject_id=subject_id or None, term=term or None)
+
+
+def invalidate_results(subject_ids):
+    """
+    Drop cached GPA and mark statistics of subjects whose results changed.
+
+    Call it after db.commit(): a read in between would reload the old rows and
+    clear the dirty flag, leaving the caches stale until their TTL.
+    """
+    for subject_id in subject_ids:
+        gpa_engine.invalidate_subject(subject_id)
+        result_stats.invalidate_subject(subject_id)
+
+
+@app.route('/api/admin/grading/policies', methods=['GET'])
+@admin_required
+def get_grading_policies():
+    """List stored grading policies and the built-in default."""
+    try:
+        db = get_db()
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT gp.subject_id, s.subject_name, gp.term, gp.kind, gp.params, gp.updated_by, gp.updated_at
+            FROM Grading_Policy gp
+            LEFT JOIN Subjects s ON s.subject_id = gp.subject_id
+            ORDER BY gp.subject_id, gp.term
+        """)
+        policies = cursor.fetchall()
+        cursor.close()
+        for policy in policies:
+            params = policy.pop('params')
+            policy.update(json.loads(params) if isinstance(params, (str, bytes)) else params)
+        return jsonify({'success': True, 'default': grading.DEFAULT_POLICY, 'policies': policies})
+    except Exception as e:
+        print(f"Error getting grading policies: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/grading/policies', methods=['PUT'])
+@admin_required
+@query_cache.invalidates('Grading_Policy', 'Student_Results')
+def save_grading_policy():
+    """Set the grading policy of a subject and/or term (or the default) and re-grade affected results."""
+    data = request.get_json() or {}
+    try:
+        subject_id, term = grading_scope(data)
+        policy = grading.validate_policy(data)
+    except grading.PolicyError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    try:
+        db = get_db()
+        error = check_grading_scope(db, subject_id, term)
+        if error:
+            return jsonify({'success': False, 'message': error}), 404
+        cursor = db.cursor()
+        grading.save_policy(cursor, subject_id, term, policy, current_user.ref_id)
+        outcome = regrade(db, subject_id, term)
+        log_activity(cursor, 'Faculty', current_user.ref_id, 'marks', 'Grading Policy Updated',
+                     f"{policy['kind']} grading for subject {subject_id or 'all'}, term {term or 'all'}; "
+                     f"{outcome['changed']} results re-graded", 'sliders-h')
+        db.commit()
+        cursor.close()
+        invalidate_results(outcome['subjects'])
+        return jsonify({'success': True, 'message': 'Grading policy saved',
+                        'subject_id': subject_id, 'term': term, 'policy': policy,
+                        'graded': outcome['rows'], 'changed': outcome['changed']})
+    except Exception as e:
+        db.rollback()
+        print(f"Error saving grading policy: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/grading/policies', methods=['DELETE'])
+@admin_required
+@query_cache.invalidates('Grading_Policy', 'Student_Results')
+def delete_grading_policy():
+    """Remove the policy of ?subject_id= and/or ?term= and re-grade under the next most specific one."""
+    try:
+        subject_id, term = grading_scope(request.args)
+    except grading.PolicyError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    try:
+        db = get_db()
+        cursor = db.cursor()
+        cursor.execute("DELETE FROM Grading_Policy WHERE subject_id = %s AND term = %s", (subject_id, term))
+        if cursor.rowcount == 0:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'No grading policy for this scope'}), 404
+        outcome = regrade(db, subject_id, term)
+        db.commit()
+        cursor.close()
+        invalidate_results(outcome['subjects'])
+        return jsonify({'success': True, 'message': 'Grading policy removed',
+                        'graded': outcome['rows'], 'changed': outcome['changed']})
+    except Exception as e:
+        db.rollback()
+        print(f"Error deleting grading policy: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/grading/recompute', methods=['POST'])
+@admin_required
+@query_cache.invalidates('Student_Results')
+def recompute_grades():
+    """Re-grade every result of a subject and/or term (everything if neither is given)."""
+    data = request.get_json() or {}
+    try:
+        subject_id, term = grading_scope(data)
+    except grading.PolicyError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    try:
+        db = get_db()
+        error = check_grading_scope(db, subject_id, term)
+        if error:
+            return jsonify({'success': False, 'message': error}), 404
+        outcome = regrade(db, subject_id, term)
+        db.commit()
+        invalidate_results(outcome['subjects'])
+        return jsonify({'success': True, 'message': f"{outcome['changed']} results re-graded",
+                        'graded': outcome['rows'], 'changed': outcome['changed']})
+    except Exception as e:
+        db.rollback()
+        print(f"Error recomputing grades: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @app.route('/api/faculty/marks', methods=['POST'])
 @login_required
+@query_cache.invalidates('Student_Results')
 def save_marks():
     """Save/update marks for students."""
     try:
@@ -1470,45 +2973,78 @@ def save_marks():
         if not subject_id or not marks_list:
             return jsonify({'success': False, 'message': 'Missing required fields'}), 400
         
+        try:
+            student_ids = {int(student_marks['student_id']) for student_marks in marks_list}
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Every mark entry needs a numeric student_id'}), 400
+        
         db = get_db()
         cursor = db.cursor()
+        # Serialise mark saves per subject: the re-grade below reads the whole class
+        grading.lock_subjects(cursor, subject_id)
+        subject_code, subject_name = get_subject_label(cursor, subject_id)
+        
+        # Only students enrolled in the subject this term can get results for it
+        cursor.execute(f"""
+            SELECT student_id FROM Enrollment
+            WHERE subject_id = %s AND term = %s AND student_id IN ({', '.join(['%s'] * len(student_ids))})
+        """, (subject_id, CURRENT_TERM, *student_ids))
+        enrolled = {row[0] for row in cursor.fetchall()}
+        rejected = sorted(student_ids - enrolled)
+        if not enrolled:
+            cursor.close()
+            return jsonify({'success': False, 'message': 'None of these students are enrolled in this subject',
+                            'rejected': rejected}), 400
+        events = []
         
         for student_marks in marks_list:
+            if int(student_marks['student_id']) not in enrolled:
+                continue
             theory = int(student_marks.get('theory_marks', 0))
             practical = int(student_marks.get('practical_marks', 0))
             total = theory + practical
             
-            # Calculate grade
-            if total >= 90:
-                grade = 'A+'
-            elif total >= 80:
-                grade = 'A'
-            elif total >= 70:
-                grade = 'B+'
-            elif total >= 60:
-                grade = 'B'
-            elif total >= 50:
-                grade = 'C'
-            else:
-                grade = 'F'
-            
-            # Update marks in Student_Results
+            # Upsert marks in Student_Results; enrolled students may not have a result row yet.
+            # New rows start as F/FAIL until the subject is re-graded below.
             cursor.execute("""
-                UPDATE Student_Results
-                SET theory_marks = %s, practical_marks = %s, grade = %s
-                WHERE student_id = %s AND subject_id = %s
+                INSERT INTO Student_Results
+                (student_id, subject_id, dept_id, exam_date, subject_name, credits,
+                 theory_marks, practical_marks, grade, status_exam)
+                SELECT e.student_id, s.subject_id, s.dept_id, CURDATE(), s.subject_name, s.credits,
+                       %s, %s, 'F', 'FAIL'
+                FROM Subjects s
+                JOIN Enrollment e ON e.subject_id = s.subject_id AND e.student_id = %s AND e.term = %s
+                WHERE s.subject_id = %s
+                ON DUPLICATE KEY UPDATE theory_marks = %s, practical_marks = %s
             """, (
                 theory,
                 practical,
-                grade,
                 student_marks['student_id'],
-                subject_id
+                CURRENT_TERM,
+                subject_id,
+                theory,
+                practical
             ))
+            events.append(('Student', student_marks['student_id'], 'marks', 'Marks Updated',
+                           f"Marks updated for {subject_name}: {total}/200", 'chart-line'))
+        
+        # Grade the whole subject under its policy; curved and relative grades of
+        # classmates move with the new marks
+        grading.recompute(db, CURRENT_TERM, subject_id=subject_id)
+        
+        events.append(('Faculty', current_user.ref_id, 'marks', 'Marks Entered',
+                       f"{subject_code} - {len(events)} students", 'pen'))
+        log_activities(cursor, events)
         
         db.commit()
         cursor.close()
+        invalidate_results([subject_id])
+        notify(events)
         
-        return jsonify({'success': True, 'message': 'Marks saved successfully'})
+        message = 'Marks saved successfully'
+        if rejected:
+            message += f"; skipped {len(rejected)} student(s) not enrolled in this subject"
+        return jsonify({'success': True, 'message': message, 'rejected': rejected})
     except Exception as e:
         db.rollback()
         print(f"Error saving marks: {e}")
@@ -1526,13 +3062,15 @@ def get_all_faculty_students(faculty_id):
         cursor.execute("""
             SELECT DISTINCT si.student_id, 
                    si.first_name, si.last_name, si.email,
-                   sr.department
-            FROM Student_Info si
-            JOIN Student_Results sr ON si.student_id = sr.student_id
-            JOIN Class_Timetable ct ON sr.subject_id = ct.subject_id
-            WHERE ct.faculty_id = %s
+                   d.dept_name as department
+            FROM Enrollment e
+            JOIN (SELECT DISTINCT subject_id FROM Class_Timetable WHERE faculty_id = %s) ct
+              ON e.subject_id = ct.subject_id
+            JOIN Student_Info si ON si.student_id = e.student_id
+            LEFT JOIN Departments d ON si.dept_id = d.dept_id
+            WHERE e.term = %s
             ORDER BY si.last_name, si.first_name
-        """, (faculty_id,))
+        """, (faculty_id, CURRENT_TERM))
         
         students = cursor.fetchall()
         
@@ -1615,20 +3153,24 @@ def get_student_quick_stats(student_id):
         
         # Total subjects
         cursor.execute("""
-            SELECT COUNT(DISTINCT subject_id) as total_subjects
-            FROM Student_Results
-            WHERE student_id = %s
-        """, (student_id,))
+            SELECT COUNT(*) as total_subjects
+            FROM Enrollment
+            WHERE student_id = %s AND term = %s
+        """, (student_id, CURRENT_TERM))
         subjects_count = cursor.fetchone()['total_subjects'] or 0
         
-        # Overall attendance percentage
+        # Overall attendance percentage this term (reads only the term's partition)
+        term = attendance_term(db, CURRENT_TERM)
+        if term is None:
+            cursor.close()
+            return unknown_term_response()
         cursor.execute("""
             SELECT 
                 COUNT(CASE WHEN status = 'Present' THEN 1 END) as present,
                 COUNT(*) as total
             FROM Student_Attendance
-            WHERE student_id = %s
-        """, (student_id,))
+            WHERE student_id = %s AND attendance_date BETWEEN %s AND %s
+        """, (student_id, term['start_date'], term['end_date']))
         attendance_data = cursor.fetchone()
         attendance_percentage = round((attendance_data['present'] / attendance_data['total'] * 100), 2) if attendance_data['total'] > 0 else 0
         
@@ -1645,7 +3187,7 @@ def get_student_quick_stats(student_id):
         cursor.execute("""
             SELECT COUNT(*) as books_issued
             FROM Library_Transaction
-            WHERE student_id = %s AND status = 'Issued'
+            WHERE student_id = %s AND return_date IS NULL
         """, (student_id,))
         books_issued = cursor.fetchone()['books_issued'] or 0
         
@@ -1668,58 +3210,45 @@ def get_student_quick_stats(student_id):
 @app.route('/api/student/recent-activity/<int:student_id>', methods=['GET'])
 @login_required
 def get_student_recent_activity(student_id):
-    """Get recent activities for student."""
+    """Get recent activities for student from the activity log (?limit=, default 5)."""
     try:
-        activities = []
-        
-        # This is a simplified version - you can expand with real activity tracking
         db = get_db()
         cursor = db.cursor(dictionary=True)
         
-        # Recent marks added
-        cursor.execute("""
-            SELECT s.subject_name, sr.theory_marks, sr.practical_marks
-            FROM Student_Results sr
-            JOIN Subjects s ON sr.subject_id = s.subject_id
-            WHERE sr.student_id = %s AND (sr.theory_marks IS NOT NULL OR sr.practical_marks IS NOT NULL)
-            ORDER BY sr.exam_date DESC
-            LIMIT 3
-        """, (student_id,))
-        recent_marks = cursor.fetchall()
-        
-        for mark in recent_marks:
-            theory = mark['theory_marks'] or 0
-            practical = mark['practical_marks'] or 0
-            total = theory + practical
-            activities.append({
-                'icon': 'chart-line',
-                'message': f"Marks updated for {mark['subject_name']}: {total}/200"
-            })
-        
-        # Recent attendance
-        cursor.execute("""
-            SELECT sa.attendance_date, sa.status
-            FROM Student_Attendance sa
-            WHERE sa.student_id = %s
-            ORDER BY sa.attendance_date DESC
-            LIMIT 2
-        """, (student_id,))
-        recent_attendance = cursor.fetchall()
-        
-        for att in recent_attendance:
-            activities.append({
-                'icon': 'calendar-check',
-                'message': f"Attendance marked {att['status']} on {att['attendance_date']}"
-            })
-        
+        events = get_recent_activity(cursor, 'Student', student_id,
+                                     limit=request.args.get('limit', 5, type=int))
         cursor.close()
         
+        activities = [{
+            'icon': event['icon'],
+            'title': event['title'],
+            'message': event['message'],
+            'time': time_ago(event['created_at'])
+        } for event in events]
+        
         return jsonify({'success': True, 'data': activities})
         
     except Exception as e:
         print(f"Error getting recent activity: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/student/gpa/<int:student_id>', methods=['GET'])
+@login_required
+def get_student_gpa(student_id):
+    """Get per-term GPA, CGPA, department rank and percentile for a student."""
+    try:
+        terms = gpa_engine.student_summary(get_db(), student_id)
+        return jsonify({
+            'success': True,
+            'data': {
+                'terms': terms,
+                'cgpa': terms[-1]['cgpa'] if terms else None
+            }
+        })
+    except Exception as e:
+        print(f"Error getting GPA: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/student/subjects/<int:student_id>', methods=['GET'])
 @login_required
 def get_student_subjects(student_id):
@@ -1735,14 +3264,14 @@ def get_student_subjects(student_id):
                 s.subject_code,
                 s.credits,
                 GROUP_CONCAT(DISTINCT CONCAT(f.first_name, ' ', f.last_name) SEPARATOR ', ') as faculty_name
-            FROM Subjects s
-            JOIN Student_Results sr ON s.subject_id = sr.subject_id
+            FROM Enrollment e
+            JOIN Subjects s ON s.subject_id = e.subject_id
             LEFT JOIN Class_Timetable ct ON s.subject_id = ct.subject_id
             LEFT JOIN Faculty_Info f ON ct.faculty_id = f.faculty_id
-            WHERE sr.student_id = %s
+            WHERE e.student_id = %s AND e.term = %s
             GROUP BY s.subject_id, s.subject_name, s.subject_code, s.credits
             ORDER BY s.subject_name
-        """, (student_id,))
+        """, (student_id, CURRENT_TERM))
         
         subjects = cursor.fetchall()
         cursor.close()
@@ -1756,11 +3285,19 @@ def get_student_subjects(student_id):
 @app.route('/api/student/attendance-detailed/<int:student_id>', methods=['GET'])
 @login_required
 def get_student_attendance_detailed(student_id):
-    """Get subject-wise detailed attendance for student."""
+    """Get subject-wise detailed attendance for student in the current (or ?term=) term."""
     try:
         db = get_db()
+        term = attendance_term(db)
+        if term is None:
+            return unknown_term_response()
         cursor = db.cursor(dictionary=True)
         
+        if term['status'] == 'Archived':
+            attendance = archived_attendance_summary(cursor, term['term'], student_id)
+            cursor.close()
+            return jsonify({'success': True, 'data': attendance})
+        
         cursor.execute("""
             SELECT 
                 s.subject_id,
@@ -1770,10 +3307,10 @@ def get_student_attendance_detailed(student_id):
                 ROUND((SUM(CASE WHEN sa.status = 'Present' THEN 1 ELSE 0 END) / COUNT(*)) * 100, 2) as attendance_percentage
             FROM Student_Attendance sa
             JOIN Subjects s ON sa.subject_id = s.subject_id
-            WHERE sa.student_id = %s
+            WHERE sa.student_id = %s AND sa.attendance_date BETWEEN %s AND %s
             GROUP BY sa.subject_id, s.subject_name
             ORDER BY s.subject_name
-        """, (student_id,))
+        """, (student_id, term['start_date'], term['end_date']))
         
         attendance = cursor.fetchall()
         cursor.close()
@@ -1787,11 +3324,25 @@ def get_student_attendance_detailed(student_id):
 @app.route('/api/student/attendance-breakdown/<int:student_id>/<int:subject_id>', methods=['GET'])
 @login_required
 def get_student_attendance_breakdown(student_id, subject_id):
-    """Get day-by-day attendance breakdown for a specific subject."""
+    """Get day-by-day attendance breakdown for a specific subject in the current (or ?term=) term."""
     try:
         db = get_db()
+        term = attendance_term(db)
+        if term is None:
+            return unknown_term_response()
         cursor = db.cursor(dictionary=True)
         
+        if term['status'] == 'Archived':
+            _code, subject_name = get_subject_label(cursor, subject_id)
+            cursor.close()
+            breakdown = [{
+                'subject_name': subject_name,
+                'attendance_date': row['attendance_date'],
+                'status': row['status'],
+                'day_name': row['attendance_date'].strftime('%A')
+            } for row in reversed(read_archive(term['term'], student_id, subject_id))]
+            return jsonify({'success': True, 'data': breakdown})
+        
         cursor.execute("""
             SELECT 
                 s.subject_name,
@@ -1801,8 +3352,9 @@ def get_student_attendance_breakdown(student_id, subject_id):
             FROM Student_Attendance sa
             JOIN Subjects s ON sa.subject_id = s.subject_id
             WHERE sa.student_id = %s AND sa.subject_id = %s
+              AND sa.attendance_date BETWEEN %s AND %s
             ORDER BY sa.attendance_date DESC
-        """, (student_id, subject_id))
+        """, (student_id, subject_id, term['start_date'], term['end_date']))
         
         breakdown = cursor.fetchall()
         cursor.close()
@@ -1813,8 +3365,32 @@ def get_student_attendance_breakdown(student_id, subject_id):
         print(f"Error getting attendance breakdown: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/student/attendance-analytics/<int:student_id>', methods=['GET'])
+@login_required
+def get_student_attendance_analytics(student_id):
+    """Get per-subject attendance percentage and absence/present streaks from the attendance bitmaps."""
+    try:
+        db = get_db()
+        term, error = bitmap_term(db)
+        if error:
+            return error
+        
+        analytics = attendance_bitmaps.student_summary(db, term, student_id)
+        cursor = db.cursor(dictionary=True)
+        names = subject_names(cursor, (row['subject_id'] for row in analytics))
+        cursor.close()
+        for row in analytics:
+            row['subject_name'] = names.get(row['subject_id'])
+        
+        return jsonify({'success': True, 'term': term['term'], 'data': analytics})
+        
+    except Exception as e:
+        print(f"Error getting attendance analytics: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/student/change-password', methods=['POST'])
 @login_required
+@query_cache.invalidates('User_Credentials')
 def change_student_password():
     """Change student password."""
     try:
@@ -1848,7 +3424,7 @@ def change_student_password():
             return jsonify({'success': False, 'message': 'User not found'}), 404
         
         # Verify current password
-        if not verify_password(current_password, user['password_hash']):
+        if not verify_password(user['password_hash'], current_password):
             cursor.close()
             return jsonify({'success': False, 'message': 'Current password is incorrect'}), 401
         
@@ -1871,6 +3447,175 @@ def change_student_password():
             db.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/stream', methods=['GET'])
+@login_required
+def event_stream():
+    """Server-Sent Events stream of change notifications for the logged-in user."""
+    activity_feed.start(connect_db)
+    sub = broker.subscribe(current_user.user_role, current_user.ref_id)
+    if sub is None:
+        response = jsonify({'success': False, 'message': 'Too many open live-update streams'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+
+    # The generator does not use the request context, so the request's DB
+    # connection is released as soon as the response starts streaming
+    response = Response(
+        stream(broker, sub),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # The generator's own cleanup only runs once it has started; a client that
+    # disconnects before the body is iterated must not keep holding a stream slot
+    response.call_on_close(lambda: broker.unsubscribe(sub))
+    return response
+
+# Sub-requests accepted by one /api/batch call
+MAX_BATCH_REQUESTS = 20
+
+# Endpoints that cannot be answered inside a batch (streams and the batch itself)
+BATCH_EXCLUDED_PATHS = ('/api/batch', '/api/stream')
+
+
+def run_sub_request(path):
+    """
+    Dispatch one GET inside the current app context.
+
+    The sub-request gets its own request context but shares `g`, so it reuses
+    the batch's DB connection and the user already loaded by Flask-Login.
+
+    Returns:
+        tuple: (HTTP status, parsed JSON body or None)
+    """
+    parts = urlsplit(path)
+    environ = dict(request.environ)
+    environ.update({'REQUEST_METHOD': 'GET', 'PATH_INFO': parts.path, 'QUERY_STRING': parts.query,
+                    'CONTENT_LENGTH': '0', 'wsgi.input': io.BytesIO()})
+    environ.pop('CONTENT_TYPE', None)
+    with app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            print(f"Error in batched request {path}: {e}")
+            return 500, {'success': False, 'message': str(e)}
+        return response.status_code, response.get_json(silent=True)
+
+
+@app.route('/api/batch', methods=['POST'])
+@login_required
+def batch_requests():
+    """
+    Run several GET API calls in one HTTP request.
+
+    Body: {"requests": ["/api/profile/3/Student?fields=email", ...]} (or
+    {"path": ...} objects). Identical paths (same query parameters in any
+    order) are executed once. Each sub-request is authorised as usual.
+
+    Returns:
+        {"success": true, "responses": [{"path", "status", "body"}, ...]} in request order
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'message': 'requests must be a non-empty list'}), 400
+    if len(items) > MAX_BATCH_REQUESTS:
+        return jsonify({'success': False, 'message': f'At most {MAX_BATCH_REQUESTS} requests per batch'}), 400
+
+    keys = []
+    for item in items:
+        path = item.get('path') if isinstance(item, dict) else item
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            return jsonify({'success': False, 'message': f'Invalid path: {path!r}'}), 400
+        parts = urlsplit(path)
+        if parts.path.rstrip('/') in BATCH_EXCLUDED_PATHS:
+            return jsonify({'success': False, 'message': f'{parts.path} cannot be batched'}), 400
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        keys.append((path, f"{parts.path}?{query}" if query else parts.path))
+
+    results = {}
+    for _path, key in keys:
+        if key not in results:
+            results[key] = run_sub_request(key)
+
+    return jsonify({'success': True, 'responses': [
+        {'path': path, 'status': results[key][0], 'body': results[key][1]} for path, key in keys
+    ]})
+
+
+IDEMPOTENT_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+# Mutating routes where an Idempotency-Key is ignored (session changes, read-only batch)
+IDEMPOTENCY_EXCLUDED_PATHS = {'/login', '/logout', '/api/batch'}
+
+
+def idempotency_requested():
+    """True for a mutating request that carries an Idempotency-Key the store should handle."""
+    return (bool(request.headers.get('Idempotency-Key')) and request.method in IDEMPOTENT_METHODS
+            and request.path not in IDEMPOTENCY_EXCLUDED_PATHS)
+
+
+@app.before_request
+def replay_idempotent_request():
+    """
+    Answer a retried mutating request from the idempotency store.
+
+    A request with an Idempotency-Key header claims the key (waiting for an
+    in-flight request with the same key) and either gets the stored response
+    or runs normally, with store_idempotent_response() saving its result.
+    The key is scoped by the session's user id rather than current_user, so
+    answering from the store neither loads the user nor borrows a connection.
+    """
+    if not idempotency_requested():
+        return None
+    key = request.headers['Idempotency-Key']
+    # Signed session cookie; the route still checks the user when it runs
+    user_id = session.get('_user_id')
+    if user_id is None:
+        return borrow_db_connection()  # The route answers 401 itself; nothing worth storing
+    if len(key) > MAX_KEY_LENGTH:
+        return jsonify({'success': False, 'message': 'Idempotency-Key is too long'}), 400
+
+    scope = f"user:{user_id} {request.method} {request.path}"
+    outcome, value = idempotency_store.begin(scope, key, fingerprint(request.get_data(cache=True)))
+    if outcome == 'run':
+        busy = borrow_db_connection()
+        if busy is not None:
+            idempotency_store.abandon(value)
+            return busy
+        g.idempotency_token = value
+        return None
+    if outcome == 'replay':
+        status, content_type, body = value
+        response = Response(body, status=status, content_type=content_type)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+    if outcome == 'mismatch':
+        return jsonify({'success': False,
+                        'message': 'Idempotency-Key was already used for a different request'}), 422
+    return jsonify({'success': False, 'message': 'A request with this Idempotency-Key is still in progress'}), 409
+
+
+@app.after_request
+def store_idempotent_response(response):
+    """Save the response of a request that claimed an Idempotency-Key."""
+    token = g.pop('idempotency_token', None) if request.method in IDEMPOTENT_METHODS else None
+    if token is not None:
+        try:
+            idempotency_store.finish(token, response.status_code, response.content_type, response.get_data())
+        except Exception as e:
+            print(f"Error storing idempotent response: {e}")
+            idempotency_store.abandon(token)
+    return response
+
+
+@app.teardown_request
+def release_idempotency_key(exception):
+    """Release a claimed key if the request ended without a response."""
+    token = g.pop('idempotency_token', None)
+    if token is not None:
+        idempotency_store.abandon(token)
+
+
 @app.after_request
 def add_header(response):
     """Add headers to prevent caching in development."""
@@ -1892,6 +3637,7 @@ if __name__ == '__main__':
     # Initialize the database within the app context
     with app.app_context():
         init_db()
+        search_index.build(get_db())
 
     # Run the app with host specified to allow external access if needed
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
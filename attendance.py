@@ -0,0 +1,209 @@
+"""
+Attendance shortage detection for ERP Cell system.
+A nightly batch job computes attendance for every (student, subject) pair in
+one grouped scan of Student_Attendance and records the pairs below the
+threshold in Attendance_Shortage, one snapshot per day. The scan is limited
+to the current term's dates, which keeps it inside one Student_Attendance
+partition. Each row also carries
+the pair's percentage as it stood SHORTAGE_TREND_DAYS earlier, so the admin
+list can show whether a student is recovering or slipping.
+
+The admin endpoint only reads the latest snapshot, so it stays fast no matter
+how much attendance history exists.
+"""
+
+import os
+from datetime import date, timedelta
+
+# Students below this percentage in a subject are flagged
+ATTENDANCE_THRESHOLD = float(os.environ.get('ATTENDANCE_THRESHOLD', 75))
+
+# Trend is the change against the percentage this many days before the snapshot
+SHORTAGE_TREND_DAYS = int(os.environ.get('SHORTAGE_TREND_DAYS', 7))
+
+# Snapshots older than this are removed by run_shortage_scan()
+SHORTAGE_RETENTION_DAYS = int(os.environ.get('SHORTAGE_RETENTION_DAYS', 180))
+
+# Upper bound on page size for the admin listing
+MAX_PAGE_SIZE = 200
+
+
+def run_shortage_scan(db, threshold=ATTENDANCE_THRESHOLD, snapshot_date=None,
+                      trend_days=SHORTAGE_TREND_DAYS, retention_days=SHORTAGE_RETENTION_DAYS,
+                      term_start=None):
+    """
+    Recompute the shortage list for one day in a single transaction.
+
+    Re-running for the same date replaces that day's snapshot, so a failed or
+    repeated cron run is harmless.
+
+    Args:
+        db: MySQL connection
+        threshold (float): Attendance percentage below which a pair is flagged
+        snapshot_date (date): Day the snapshot is recorded for, defaults to today
+        trend_days (int): Look-back used for the trend column
+        retention_days (int): Snapshots older than this many days are deleted
+        term_start (date): First day counted, normally the current term's start_date
+
+    Returns:
+        dict: snapshot_date, threshold, pairs scanned and students flagged
+    """
+    snapshot_date = snapshot_date or date.today()
+    term_start = term_start or date(1000, 1, 1)
+    trend_cutoff = snapshot_date - timedelta(days=trend_days)
+    cursor = db.cursor()
+    try:
+        cursor.execute("DELETE FROM Attendance_Shortage WHERE snapshot_date = %s", (snapshot_date,))
+
+        # One pass over the attendance table into per-pair counts; prev_* count
+        # only the older rows. Its row count is the number of pairs scanned.
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS Shortage_Pairs")
+        cursor.execute("""
+            CREATE TEMPORARY TABLE Shortage_Pairs (
+                student_id INT NOT NULL,
+                subject_id INT NOT NULL,
+                total INT NOT NULL,
+                attended INT NOT NULL,
+                prev_total INT NOT NULL,
+                prev_attended INT NOT NULL
+            )
+        """)
+        cursor.execute("""
+            INSERT INTO Shortage_Pairs
+            SELECT student_id, subject_id,
+                   COUNT(*),
+                   SUM(status = 'Present'),
+                   SUM(attendance_date <= %s),
+                   SUM(status = 'Present' AND attendance_date <= %s)
+            FROM Student_Attendance
+            WHERE attendance_date BETWEEN %s AND %s
+            GROUP BY student_id, subject_id
+        """, (trend_cutoff, trend_cutoff, term_start, snapshot_date))
+        scanned = cursor.rowcount
+
+        cursor.execute("""
+            INSERT INTO Attendance_Shortage
+                (snapshot_date, student_id, subject_id, classes_attended, total_classes,
+                 percentage, prev_percentage)
+            SELECT %s, student_id, subject_id, attended, total,
+                   ROUND(attended * 100 / total, 2),
+                   IF(prev_total > 0, ROUND(prev_attended * 100 / prev_total, 2), NULL)
+            FROM Shortage_Pairs
+            WHERE attended * 100 < %s * total
+        """, (snapshot_date, threshold))
+        flagged = cursor.rowcount
+        cursor.execute("DROP TEMPORARY TABLE Shortage_Pairs")
+
+        cursor.execute("""
+            INSERT INTO Attendance_Shortage_Run (snapshot_date, threshold, pairs_scanned, pairs_flagged)
+            VALUES (%s, %s, %s, %s) AS new
+            ON DUPLICATE KEY UPDATE threshold = new.threshold,
+                                    pairs_scanned = new.pairs_scanned,
+                                    pairs_flagged = new.pairs_flagged,
+                                    finished_at = CURRENT_TIMESTAMP
+        """, (snapshot_date, threshold, scanned, flagged))
+
+        cutoff = snapshot_date - timedelta(days=retention_days)
+        cursor.execute("DELETE FROM Attendance_Shortage WHERE snapshot_date < %s", (cutoff,))
+        cursor.execute("DELETE FROM Attendance_Shortage_Run WHERE snapshot_date < %s", (cutoff,))
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return {'snapshot_date': snapshot_date, 'threshold': threshold,
+            'pairs_scanned': scanned, 'pairs_flagged': flagged}
+
+
+def get_latest_run(cursor, snapshot_date=None):
+    """
+    Read the newest finished run, or the run for a given date.
+
+    Args:
+        cursor: MySQL cursor created with dictionary=True
+        snapshot_date (date): Optional day to select an older snapshot
+
+    Returns:
+        dict: Run row, or None if the job has not run yet
+    """
+    if snapshot_date:
+        cursor.execute("SELECT * FROM Attendance_Shortage_Run WHERE snapshot_date = %s", (snapshot_date,))
+    else:
+        cursor.execute("SELECT * FROM Attendance_Shortage_Run ORDER BY snapshot_date DESC LIMIT 1")
+    return cursor.fetchone()
+
+
+def get_shortages(cursor, snapshot_date, page=1, per_page=50, dept_id=None):
+    """
+    Read one page of a snapshot, worst attendance first.
+
+    Args:
+        cursor: MySQL cursor created with dictionary=True
+        snapshot_date (date): Snapshot to read
+        page (int): 1-based page number
+        per_page (int): Rows per page (capped at MAX_PAGE_SIZE)
+        dept_id (int): Optional department filter
+
+    Returns:
+        tuple: (list of shortage dicts, total matching rows)
+    """
+    per_page = max(1, min(int(per_page), MAX_PAGE_SIZE))
+    offset = (max(1, int(page)) - 1) * per_page
+    dept_filter = "AND si.dept_id = %s" if dept_id else ""
+    params = (snapshot_date, dept_id) if dept_id else (snapshot_date,)
+
+    cursor.execute(f"""
+        SELECT COUNT(*) AS total
+        FROM Attendance_Shortage sh
+        JOIN Student_Info si ON si.student_id = sh.student_id
+        WHERE sh.snapshot_date = %s {dept_filter}
+    """, params)
+    total = cursor.fetchone()['total']
+
+    cursor.execute(f"""
+        SELECT sh.student_id, CONCAT(si.first_name, ' ', si.last_name) AS student_name,
+               d.dept_name AS department, sh.subject_id, s.subject_name,
+               sh.classes_attended, sh.total_classes, sh.percentage, sh.prev_percentage
+        FROM Attendance_Shortage sh
+        JOIN Student_Info si ON si.student_id = sh.student_id
+        LEFT JOIN Departments d ON d.dept_id = si.dept_id
+        JOIN Subjects s ON s.subject_id = sh.subject_id
+        WHERE sh.snapshot_date = %s {dept_filter}
+        ORDER BY sh.percentage, sh.student_id, sh.subject_id
+        LIMIT %s OFFSET %s
+    """, (*params, per_page, offset))
+    rows = cursor.fetchall()
+
+    for row in rows:
+        row['percentage'] = float(row['percentage'])
+        prev = row['prev_percentage']
+        row['prev_percentage'] = float(prev) if prev is not None else None
+        row['trend'] = round(row['percentage'] - row['prev_percentage'], 2) if prev is not None else None
+    return rows, total
+
+
+if __name__ == '__main__':
+    # Run from cron, e.g. nightly: python attendance.py
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    conn = mysql.connector.connect(
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', ''),
+        host=os.environ.get('DB_HOST', 'localhost'),
+        database='erp_database'
+    )
+    cursor = conn.cursor()
+    cursor.execute("SELECT start_date FROM Academic_Term WHERE term = %s",
+                   (os.environ.get('CURRENT_TERM', '2025-26'),))
+    row = cursor.fetchone()
+    cursor.close()
+    result = run_shortage_scan(conn, term_start=row[0] if row else None)
+    conn.close()
+    print(f"✓ {result['pairs_flagged']} of {result['pairs_scanned']} student/subject pairs "
+          f"below {result['threshold']}% on {result['snapshot_date']}")
@@ -0,0 +1,361 @@
+"""
+Term partitions and archival of Student_Attendance for ERP Cell system.
+Academic_Term maps each term to a date range. Student_Attendance is RANGE
+partitioned on attendance_date with one partition per term (named after the
+term, '2025-26' -> p2025_26), plus p_history below the first term and
+p_future above the last. Routes filter attendance by their term's date range,
+so MySQL only opens that term's partition however many years are stored.
+
+A term's life cycle, driven from the command line:
+
+    add-term  - register the next term and split its partition off p_future
+    close     - mark a finished term Closed; the app stops accepting its dates
+                once its cached terms expire (TERM_CACHE_TTL), so archive later
+    archive   - swap the term's partition out into a staging table (EXCHANGE
+                PARTITION, a metadata change), write the rows to a gzip'd CSV
+                under ATTENDANCE_ARCHIVE_DIR, then drop the staging table
+    query     - print archived rows for a student (and subject)
+
+Archived terms stay readable: the student attendance routes accept
+`?term=<archived term>` and answer from the CSV, which is sorted by student
+so a lookup stops as soon as it has passed that student. EXCHANGE PARTITION
+does not fire triggers, so archiving does not add deletes to Change_Log.
+
+Usage:
+    python attendance_archive.py list
+    python attendance_archive.py add-term 2027-28 2027-07-01 2028-06-30
+    python attendance_archive.py close 2024-25
+    python attendance_archive.py archive 2024-25
+    python attendance_archive.py query 2024-25 --student 12 [--subject 3]
+"""
+
+import csv
+import gzip
+import io
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+# Where archive files are written and read; use shared storage if several hosts serve the app
+ATTENDANCE_ARCHIVE_DIR = os.environ.get('ATTENDANCE_ARCHIVE_DIR',
+                                        os.path.join(os.path.dirname(__file__), 'data', 'attendance_archive'))
+
+# Term used by the nightly jobs when none is given
+CURRENT_TERM = os.environ.get('CURRENT_TERM', '2025-26')
+
+# Seconds the Academic_Term rows are cached per process
+TERM_CACHE_TTL = 300
+
+# Rows fetched per round trip while exporting a term
+EXPORT_BATCH_SIZE = 5000
+
+ARCHIVE_COLUMNS = ('attendance_id', 'student_id', 'subject_id', 'attendance_date', 'status', 'updated_at')
+
+
+class TermError(ValueError):
+    """A term operation that does not fit the term's current state."""
+
+
+def partition_name(term):
+    """Partition holding a term's rows, e.g. '2025-26' -> 'p2025_26'."""
+    if not term.replace('-', '').replace('_', '').isalnum():
+        raise TermError(f"Invalid term name: {term}")
+    return 'p' + term.replace('-', '_')
+
+
+def archive_path(term):
+    return os.path.join(ATTENDANCE_ARCHIVE_DIR, f"attendance_{term}.csv.gz")
+
+
+class TermCalendar:
+    """Per-process cache of Academic_Term (a handful of rows, re-read every TERM_CACHE_TTL seconds)."""
+
+    def __init__(self, ttl=TERM_CACHE_TTL):
+        self.ttl = ttl
+        self._terms = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self, db):
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.ttl:
+                return self._terms
+        cursor = db.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT term, start_date, end_date, status, archive_file, archived_rows
+            FROM Academic_Term ORDER BY start_date
+        """)
+        terms = {row['term']: row for row in cursor.fetchall()}
+        cursor.close()
+        with self._lock:
+            self._terms, self._loaded_at = terms, time.monotonic()
+        return terms
+
+    def get(self, db, term):
+        """Academic_Term row for a term name, or None."""
+        return self._load(db).get(term)
+
+    def for_date(self, db, day):
+        """Academic_Term row whose range contains a date, or None."""
+        for row in self._load(db).values():
+            if row['start_date'] <= day <= row['end_date']:
+                return row
+        return None
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+
+# --- Reading archives -----------------------------------------------------------
+
+def read_archive(term, student_id, subject_id=None):
+    """
+    Archived attendance rows of one student, in (attendance_date, subject_id) order.
+
+    Args:
+        term (str): Archived term
+        student_id (int): Student to read
+        subject_id (int): Optional subject filter
+
+    Returns:
+        list: Dicts with subject_id, attendance_date (date) and status
+
+    Raises:
+        FileNotFoundError: The archive file is missing on this host
+    """
+    rows = []
+    with gzip.open(archive_path(term), 'rt', newline='') as handle:
+        reader = csv.reader(handle)
+        next(reader)
+        for _attendance_id, sid, subject, day, status, _updated_at in reader:
+            sid = int(sid)
+            if sid < student_id:
+                continue
+            if sid > student_id:
+                break  # Sorted by student: nothing more for this one
+            if subject_id is not None and int(subject) != subject_id:
+                continue
+            rows.append({'subject_id': int(subject), 'attendance_date': date.fromisoformat(day),
+                         'status': status})
+    return rows
+
+
+def summarize(rows):
+    """Per-subject (total, present) counts of rows from read_archive()."""
+    counts = {}
+    for row in rows:
+        total_present = counts.setdefault(row['subject_id'], [0, 0])
+        total_present[0] += 1
+        total_present[1] += row['status'] == 'Present'
+    return counts
+
+
+# --- Term life cycle --------------------------------------------------------------
+
+def _fetch_term(cursor, term):
+    cursor.execute("""
+        SELECT term, start_date, end_date, status, archive_file, archived_rows
+        FROM Academic_Term WHERE term = %s
+    """, (term,))
+    row = cursor.fetchone()
+    if row is None:
+        raise TermError(f"Unknown term: {term}")
+    return row
+
+
+def list_terms(db):
+    """Terms with their status and the rows currently in their partition (InnoDB estimate)."""
+    cursor = db.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT PARTITION_NAME AS partition_name, TABLE_ROWS AS table_rows
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'Student_Attendance'
+    """)
+    estimates = {row['partition_name']: row['table_rows'] for row in cursor.fetchall()}
+    cursor.execute("SELECT term, start_date, end_date, status, archived_rows FROM Academic_Term ORDER BY start_date")
+    terms = cursor.fetchall()
+    cursor.close()
+    for row in terms:
+        row['partition_rows'] = estimates.get(partition_name(row['term']))
+    return terms
+
+
+def add_term(db, term, start_date, end_date):
+    """
+    Register the next term and split its partition off p_future.
+
+    Terms are appended in date order; rows already stored in p_future for the
+    new range are moved into the new partition by the REORGANIZE.
+    """
+    partition = partition_name(term)
+    if end_date < start_date:
+        raise TermError("end_date is before start_date")
+    cursor = db.cursor()
+    try:
+        cursor.execute("SELECT MAX(end_date) FROM Academic_Term")
+        last_end = cursor.fetchone()[0]
+        if last_end is not None and start_date <= last_end:
+            raise TermError(f"{term} must start after the last term ends ({last_end})")
+        cursor.execute("INSERT INTO Academic_Term (term, start_date, end_date) VALUES (%s, %s, %s)",
+                       (term, start_date, end_date))
+        db.commit()
+        # DDL commits implicitly; the term row is already in place if this fails and can be retried by hand
+        cursor.execute(f"""
+            ALTER TABLE Student_Attendance REORGANIZE PARTITION p_future INTO (
+                PARTITION {partition} VALUES LESS THAN ('{(end_date + timedelta(days=1)).isoformat()}'),
+                PARTITION p_future VALUES LESS THAN (MAXVALUE)
+            )
+        """)
+    finally:
+        cursor.close()
+
+
+def close_term(db, term, current_term=CURRENT_TERM, today=None):
+    """Mark a finished term Closed so no more attendance is written into it."""
+    today = today or date.today()
+    cursor = db.cursor(dictionary=True)
+    try:
+        row = _fetch_term(cursor, term)
+        if row['status'] != 'Open':
+            raise TermError(f"{term} is already {row['status']}")
+        if term == current_term or row['end_date'] >= today:
+            raise TermError(f"{term} has not finished yet")
+        cursor.execute("UPDATE Academic_Term SET status = 'Closed' WHERE term = %s", (term,))
+        db.commit()
+    finally:
+        cursor.close()
+
+
+def _export(db, staging, path):
+    """Write the staging table to a gzip'd CSV (temp file + rename); returns the row count."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    written = 0
+    cursor = db.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {staging}
+            ORDER BY student_id, attendance_date, subject_id
+        """)
+        with open(tmp_path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as compressed:
+                text = io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+                writer = csv.writer(text)
+                writer.writerow(ARCHIVE_COLUMNS)
+                while True:
+                    batch = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not batch:
+                        break
+                    writer.writerows((attendance_id, student_id, subject_id, day.isoformat(), status,
+                                      updated_at.isoformat())
+                                     for attendance_id, student_id, subject_id, day, status, updated_at in batch)
+                    written += len(batch)
+                text.flush()
+                text.detach()
+            raw.flush()
+            os.fsync(raw.fileno())
+    finally:
+        cursor.close()
+    os.replace(tmp_path, path)
+    return written
+
+
+def archive_term(db, term):
+    """
+    Detach a Closed term's partition into a compressed file.
+
+    Re-running after a failure is safe: an existing staging table means the
+    partition was already swapped out, so the export resumes from it.
+
+    Returns:
+        int: Number of rows archived
+    """
+    cursor = db.cursor(dictionary=True)
+    partition = partition_name(term)
+    staging = f"Attendance_Archive_{partition}"
+    try:
+        row = _fetch_term(cursor, term)
+        if row['status'] != 'Closed':
+            raise TermError(f"{term} is {row['status']}; only Closed terms can be archived")
+
+        cursor.execute("SELECT COUNT(*) AS n FROM information_schema.TABLES "
+                       "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (staging,))
+        if not cursor.fetchone()['n']:
+            # An empty, unpartitioned copy of the table swaps with the partition in place
+            cursor.execute(f"CREATE TABLE {staging} LIKE Student_Attendance")
+            cursor.execute(f"ALTER TABLE {staging} REMOVE PARTITIONING")
+            cursor.execute(f"ALTER TABLE Student_Attendance EXCHANGE PARTITION {partition} WITH TABLE {staging}")
+
+        cursor.execute(f"SELECT COUNT(*) AS n FROM {staging}")
+        expected = cursor.fetchone()['n']
+        path = archive_path(term)
+        written = _export(db, staging, path)
+        if written != expected:
+            raise RuntimeError(f"Exported {written} of {expected} rows; {staging} was kept")
+
+        cursor.execute("""
+            UPDATE Academic_Term
+            SET status = 'Archived', archive_file = %s, archived_rows = %s, archived_at = NOW()
+            WHERE term = %s
+        """, (os.path.basename(path), written, term))
+        db.commit()
+        cursor.execute(f"DROP TABLE {staging}")
+    finally:
+        cursor.close()
+    return written
+
+
+if __name__ == '__main__':
+    import argparse
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Manage Student_Attendance term partitions and archives.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list')
+    add = commands.add_parser('add-term')
+    add.add_argument('term')
+    add.add_argument('start_date', type=date.fromisoformat)
+    add.add_argument('end_date', type=date.fromisoformat)
+    commands.add_parser('close').add_argument('term')
+    commands.add_parser('archive').add_argument('term')
+    query = commands.add_parser('query')
+    query.add_argument('term')
+    query.add_argument('--student', type=int, required=True)
+    query.add_argument('--subject', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'query':
+        for entry in read_archive(args.term, args.student, args.subject):
+            print(f"{entry['attendance_date']}  subject {entry['subject_id']}  {entry['status']}")
+    else:
+        conn = mysql.connector.connect(
+            user=os.environ.get('DB_USER', 'root'),
+            password=os.environ.get('DB_PASSWORD', ''),
+            host=os.environ.get('DB_HOST', 'localhost'),
+            database='erp_database'
+        )
+        try:
+            if args.command == 'list':
+                for entry in list_terms(conn):
+                    print(f"{entry['term']:<10} {entry['start_date']} .. {entry['end_date']}  "
+                          f"{entry['status']:<8} partition rows ~{entry['partition_rows']}  "
+                          f"archived {entry['archived_rows'] or 0}")
+            elif args.command == 'add-term':
+                add_term(conn, args.term, args.start_date, args.end_date)
+                print(f"✓ Added term {args.term} ({args.start_date} .. {args.end_date})")
+            elif args.command == 'close':
+                close_term(conn, args.term)
+                print(f"✓ Closed term {args.term}")
+            else:
+                rows = archive_term(conn, args.term)
+                print(f"✓ Archived {rows} attendance rows of {args.term} to {archive_path(args.term)}")
+        except TermError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+        finally:
+            conn.close()
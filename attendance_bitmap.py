@@ -0,0 +1,349 @@
+"""
+Bitmap attendance analytics for ERP Cell system.
+Student_Attendance stores one row per student, subject and day. For analytics
+each (subject, term) is instead held as two bit matrices, one row per student
+and one bit per class session (a date on which the subject's attendance was
+taken), packed eight sessions to a byte with NumPy:
+
+    - recorded: the student has an attendance row for the session
+    - present:  the row is 'Present'
+
+A term of 60 students x 120 sessions is about 1 KB per matrix. Percentages
+are popcounts (present / recorded). Streaks of consecutive absences or
+presences come from run-length boundaries of the unpacked rows. Cohort
+heatmaps sum the columns of the cohort's rows and bucket them by week of term.
+
+Bitmaps are built per process with one partition-pruned scan of a term
+(see attendance_archive.py), then kept current by record(), which both
+attendance write paths call after they commit. A TTL reload picks up writes
+made by other workers, like the GPA engine.
+"""
+
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+# Seconds before a term's bitmaps are rebuilt from MySQL even without local writes
+ATTENDANCE_BITMAP_TTL = int(os.environ.get('ATTENDANCE_BITMAP_TTL', 300))
+
+# One term's rows as integers; the date range keeps the scan to the term's partition
+TERM_QUERY = """
+    SELECT subject_id, student_id, DATEDIFF(attendance_date, %s), status = 'Present'
+    FROM Student_Attendance
+    WHERE attendance_date BETWEEN %s AND %s
+"""
+
+# Set-bit count of every byte value (np.bitwise_count needs NumPy 2)
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def popcount(packed):
+    """Set bits per row of a packed (rows x bytes) uint8 matrix."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(packed).sum(axis=1, dtype=np.int64)
+    return POPCOUNT[packed].sum(axis=1, dtype=np.int64)
+
+
+def run_lengths(bits):
+    """
+    Longest and trailing run of True per row of a boolean matrix.
+
+    Args:
+        bits (ndarray): (rows x sessions) bool
+
+    Returns:
+        tuple: (longest run per row, run ending at the last session per row)
+    """
+    n_rows, n_cols = bits.shape
+    padded = np.zeros((n_rows, n_cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = bits
+    edges = np.diff(padded, axis=1)
+    # nonzero() walks row-major, so the k-th start and k-th end belong to the same run
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _end_rows, end_cols = np.nonzero(edges == -1)
+    lengths = end_cols - start_cols
+    longest = np.zeros(n_rows, dtype=np.int64)
+    np.maximum.at(longest, start_rows, lengths)
+    trailing = np.zeros(n_rows, dtype=np.int64)
+    last = end_cols == n_cols
+    trailing[start_rows[last]] = lengths[last]
+    return longest, trailing
+
+
+class SubjectBitmap:
+    """Packed recorded/present bits of one subject in one term."""
+
+    def __init__(self, sessions, students, recorded, present):
+        self.sessions = sessions    # Sorted date ordinals (int64), one per bit column
+        self.students = students    # Sorted student ids (int64), one per row
+        self.recorded = recorded    # (students x bytes) uint8, little bit order
+        self.present = present
+
+    @classmethod
+    def build(cls, days, students, present):
+        """Pack parallel arrays of (date ordinal, student id, present) rows."""
+        sessions, col = np.unique(days, return_inverse=True)
+        ids, row = np.unique(students, return_inverse=True)
+        recorded_bits = np.zeros((len(ids), len(sessions)), dtype=bool)
+        present_bits = np.zeros_like(recorded_bits)
+        recorded_bits[row, col] = True
+        present_bits[row, col] = present
+        return cls(sessions, ids,
+                   np.packbits(recorded_bits, axis=1, bitorder='little'),
+                   np.packbits(present_bits, axis=1, bitorder='little'))
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, np.int64), np.empty(0, np.int64),
+                   np.zeros((0, 0), np.uint8), np.zeros((0, 0), np.uint8))
+
+    def unpack(self, packed, rows=None):
+        """(rows x sessions) bool view of a packed matrix, optionally for some rows only."""
+        if rows is not None:
+            packed = packed[rows]
+        return np.unpackbits(packed, axis=1, count=len(self.sessions), bitorder='little').astype(bool)
+
+    def _add_session(self, day):
+        """Column of a session date, inserting an empty column if it is new."""
+        col = int(np.searchsorted(self.sessions, day))
+        if col < len(self.sessions) and self.sessions[col] == day:
+            return col
+        if col == len(self.sessions):
+            # Usual case: today's class appended; grow by a byte only every 8 sessions
+            if col >= self.recorded.shape[1] * 8:
+                pad = ((0, 0), (0, 1))
+                self.recorded, self.present = np.pad(self.recorded, pad), np.pad(self.present, pad)
+        else:
+            # Back-dated session: shift the later bits right by one
+            recorded = np.insert(self.unpack(self.recorded), col, False, axis=1)
+            present = np.insert(self.unpack(self.present), col, False, axis=1)
+            self.recorded = np.packbits(recorded, axis=1, bitorder='little')
+            self.present = np.packbits(present, axis=1, bitorder='little')
+        self.sessions = np.insert(self.sessions, col, day)
+        return col
+
+    def _add_students(self, ids):
+        new = np.setdiff1d(ids, self.students)
+        if new.size:
+            at = np.searchsorted(self.students, new)
+            self.students = np.insert(self.students, at, new)
+            self.recorded = np.insert(self.recorded, at, 0, axis=0)
+            self.present = np.insert(self.present, at, 0, axis=0)
+
+    def mark(self, day, entries):
+        """
+        Set one session's bits.
+
+        Args:
+            day (int): Date ordinal
+            entries (dict): student_id -> present (bool); overwrites earlier marks
+        """
+        ids = np.fromiter(entries, dtype=np.int64, count=len(entries))
+        flags = np.fromiter(entries.values(), dtype=bool, count=len(entries))
+        col = self._add_session(day)
+        self._add_students(ids)
+        rows = np.searchsorted(self.students, ids)
+        byte, mask = col >> 3, np.uint8(1 << (col & 7))
+        self.recorded[rows, byte] |= mask
+        self.present[rows[flags], byte] |= mask
+        self.present[rows[~flags], byte] &= ~mask
+
+    def row_of(self, student_id):
+        row = int(np.searchsorted(self.students, student_id))
+        return row if row < len(self.students) and self.students[row] == student_id else None
+
+
+def build_term(rows, start):
+    """
+    Build every subject's bitmap from the rows of TERM_QUERY.
+
+    Args:
+        rows (list): (subject_id, student_id, days since term start, present 0/1) tuples
+        start (date): Term start_date
+
+    Returns:
+        dict: subject_id -> SubjectBitmap
+    """
+    if not rows:
+        return {}
+    # All-integer rows convert in one call, without a Python date object per row
+    columns = np.array(rows, dtype=np.int64)
+    subject, student = columns[:, 0], columns[:, 1]
+    day = columns[:, 2] + start.toordinal()
+    present = columns[:, 3].astype(bool)
+
+    order = np.argsort(subject, kind='stable')
+    subject, student, day, present = subject[order], student[order], day[order], present[order]
+    subject_ids, starts = np.unique(subject, return_index=True)
+    ends = np.r_[starts[1:], len(subject)]
+    return {int(subject_id): SubjectBitmap.build(day[a:b], student[a:b], present[a:b])
+            for subject_id, a, b in zip(subject_ids, starts, ends)}
+
+
+class AttendanceBitmaps:
+    """Process-wide bitmaps per term, built lazily and updated by record()."""
+
+    def __init__(self, ttl=ATTENDANCE_BITMAP_TTL):
+        self.ttl = ttl
+        self._terms = {}   # term -> (start ordinal, end ordinal, loaded_at, {subject_id: SubjectBitmap})
+        self._lock = threading.Lock()
+
+    def invalidate_all(self):
+        """Rebuild every term on its next read (e.g. after a student is deleted)."""
+        with self._lock:
+            self._terms.clear()
+
+    def _subjects(self, db, term):
+        """Subject bitmaps of an Academic_Term row, (re)building them when missing or expired."""
+        name = term['term']
+        entry = self._terms.get(name)
+        if entry is None or time.monotonic() - entry[2] > self.ttl:
+            cursor = db.cursor()
+            cursor.execute(TERM_QUERY, (term['start_date'], term['start_date'], term['end_date']))
+            subjects = build_term(cursor.fetchall(), term['start_date'])
+            cursor.close()
+            entry = (term['start_date'].toordinal(), term['end_date'].toordinal(), time.monotonic(), subjects)
+            self._terms[name] = entry
+        return entry[3]
+
+    def record(self, subject_id, day, entries):
+        """
+        Apply committed attendance to the loaded term containing `day` (no-op if none is loaded).
+
+        Args:
+            subject_id (int): Subject marked
+            day (date): Session date
+            entries (iterable): (student_id, present) pairs
+        """
+        ordinal = day.toordinal()
+        entries = {int(student_id): bool(present) for student_id, present in entries}
+        if not entries:
+            return
+        with self._lock:
+            for start, end, _loaded_at, subjects in self._terms.values():
+                if start <= ordinal <= end:
+                    subjects.setdefault(int(subject_id), SubjectBitmap.empty()).mark(ordinal, entries)
+
+    def student_summary(self, db, term, student_id):
+        """
+        Per-subject sessions, percentage and streaks of one student.
+
+        Returns:
+            list: Dicts with subject_id, sessions, present, percentage,
+                  current_absence_streak, longest_absence_streak, current_present_streak
+        """
+        summary = []
+        with self._lock:
+            for subject_id, bitmap in sorted(self._subjects(db, term).items()):
+                row = bitmap.row_of(student_id)
+                if row is None:
+                    continue
+                rows = np.array([row])
+                recorded = int(popcount(bitmap.recorded[rows])[0])
+                present = int(popcount(bitmap.present[rows])[0])
+                recorded_bits, present_bits = bitmap.unpack(bitmap.recorded, rows), bitmap.unpack(bitmap.present, rows)
+                longest_absent, trailing_absent = run_lengths(recorded_bits & ~present_bits)
+                _longest_present, trailing_present = run_lengths(present_bits)
+                summary.append({
+                    'subject_id': subject_id,
+                    'sessions': recorded,
+                    'present': present,
+                    'percentage': round(present * 100 / recorded, 2) if recorded else None,
+                    'current_absence_streak': int(trailing_absent[0]),
+                    'longest_absence_streak': int(longest_absent[0]),
+                    'current_present_streak': int(trailing_present[0]),
+                })
+        return summary
+
+    def absence_streaks(self, db, term, min_run, student_ids=None):
+        """
+        Students whose latest sessions of a subject are at least `min_run` straight absences.
+
+        Sessions a student has no row for (e.g. before enrolling) break a run.
+
+        Args:
+            db: MySQL connection (used only to build the term)
+            term (dict): Academic_Term row
+            min_run (int): Shortest run reported
+            student_ids (list): Optional cohort to restrict to
+
+        Returns:
+            list: Dicts with student_id, subject_id, streak, last_present (date or None),
+                  longest first
+        """
+        if student_ids is not None:
+            student_ids = np.asarray(student_ids, dtype=np.int64)
+        found = []
+        with self._lock:
+            for subject_id, bitmap in self._subjects(db, term).items():
+                rows = np.arange(len(bitmap.students))
+                if student_ids is not None:
+                    rows = rows[np.isin(bitmap.students, student_ids)]
+                if not rows.size or len(bitmap.sessions) < min_run:
+                    continue
+                absent = bitmap.unpack(bitmap.recorded, rows) & ~bitmap.unpack(bitmap.present, rows)
+                _longest, trailing = run_lengths(absent)
+                hits = np.nonzero(trailing >= min_run)[0]
+                if not hits.size:
+                    continue
+                present = bitmap.unpack(bitmap.present, rows[hits])
+                for hit, present_row in zip(hits, present):
+                    attended = np.nonzero(present_row)[0]
+                    found.append({
+                        'student_id': int(bitmap.students[rows[hit]]),
+                        'subject_id': subject_id,
+                        'streak': int(trailing[hit]),
+                        'last_present': (date.fromordinal(int(bitmap.sessions[attended[-1]]))
+                                         if attended.size else None),
+                    })
+        found.sort(key=lambda row: (-row['streak'], row['student_id'], row['subject_id']))
+        return found
+
+    def heatmap(self, db, term, student_ids=None, subject_ids=None):
+        """
+        Share of a cohort present, per subject and week of term.
+
+        Args:
+            db: MySQL connection (used only to build the term)
+            term (dict): Academic_Term row
+            student_ids (list): Cohort; None for every student
+            subject_ids (iterable): Optional subjects to include
+
+        Returns:
+            dict: weeks (start dates), subjects (ids), rates (subjects x weeks, None where
+                  no class was held) and sessions (subjects x weeks recorded marks)
+        """
+        start = term['start_date']
+        n_weeks = (term['end_date'] - start).days // 7 + 1
+        wanted = set(subject_ids) if subject_ids is not None else None
+        if student_ids is not None:
+            student_ids = np.asarray(student_ids, dtype=np.int64)
+        subjects, rates, sessions = [], [], []
+        with self._lock:
+            for subject_id, bitmap in sorted(self._subjects(db, term).items()):
+                if wanted is not None and subject_id not in wanted:
+                    continue
+                rows = None
+                if student_ids is not None:
+                    rows = np.nonzero(np.isin(bitmap.students, student_ids))[0]
+                    if not rows.size:
+                        continue
+                recorded = bitmap.unpack(bitmap.recorded, rows).sum(axis=0)
+                present = bitmap.unpack(bitmap.present, rows).sum(axis=0)
+                week = (bitmap.sessions - start.toordinal()) // 7
+                recorded = np.bincount(week, weights=recorded, minlength=n_weeks)[:n_weeks]
+                present = np.bincount(week, weights=present, minlength=n_weeks)[:n_weeks]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    rate = np.round(present * 100 / recorded, 1)
+                subjects.append(subject_id)
+                rates.append([float(r) if n else None for r, n in zip(rate, recorded)])
+                sessions.append(recorded.astype(np.int64).tolist())
+        return {
+            'weeks': [start + timedelta(weeks=w) for w in range(n_weeks)],
+            'subjects': subjects,
+            'rates': rates,
+            'sessions': sessions,
+        }
@@ -0,0 +1,474 @@
+"""
+Group-commit queue for attendance submissions in ERP Cell system.
+At the start of each class hour hundreds of faculty submit attendance within
+a few seconds; committing each submission on its own makes them queue up on
+MySQL's log flush. With ATTENDANCE_GROUP_COMMIT on, a submission is instead
+appended to a local journal, fsynced (concurrent submitters share one fsync)
+and acknowledged with a submission id. A background thread in each worker
+merges everything queued every ATTENDANCE_FLUSH_INTERVAL ms, or as soon as
+ATTENDANCE_FLUSH_ROWS rows are waiting, into multi-row upserts committed in
+one transaction, together with the activity events and one
+Attendance_Submission row per submission.
+
+Journal layout: each worker appends JSON lines to its own segment file,
+locked with flock while the worker owns it. A flush swaps in a fresh segment,
+and the old one is deleted once its rows are committed, so every segment on
+disk holds uncommitted (or just-committed) submissions. On start-up a worker
+replays segments no live process holds a lock on, skipping submissions
+already recorded in Attendance_Submission, so a crash neither loses nor
+doubles an acknowledged submission. The journal directory is local to the
+host: point every worker on a host at the same directory.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from activity import log_activities
+from querycache import bump_versions
+
+try:
+    import fcntl  # Segment ownership locks (not available on Windows)
+except ImportError:
+    fcntl = None
+
+ATTENDANCE_GROUP_COMMIT = os.environ.get('ATTENDANCE_GROUP_COMMIT', 'False').lower() in ('1', 'true', 'yes')
+ATTENDANCE_JOURNAL_DIR = os.environ.get('ATTENDANCE_JOURNAL_DIR',
+                                        os.path.join(os.path.dirname(__file__), 'data', 'attendance_journal'))
+
+# Flush after this many milliseconds, or earlier once this many rows are queued
+ATTENDANCE_FLUSH_INTERVAL = int(os.environ.get('ATTENDANCE_FLUSH_INTERVAL', 200))
+ATTENDANCE_FLUSH_ROWS = int(os.environ.get('ATTENDANCE_FLUSH_ROWS', 2000))
+
+# Queued rows per worker before new submissions are refused (MySQL down for a long time)
+MAX_PENDING_ROWS = 200000
+
+# Rows per INSERT ... ON DUPLICATE KEY UPDATE statement
+UPSERT_CHUNK = 1000
+
+# Seconds to wait before retrying a batch after a connection failure
+RETRY_DELAY = 2.0
+
+# Statuses remembered in memory per worker (older ones are looked up in MySQL)
+STATUS_CACHE_SIZE = 10000
+
+# Attendance_Submission rows are kept this many days
+SUBMISSION_RETENTION_DAYS = 7
+
+# Errors caused by the submission's own data; anything else is retried
+DATA_ERRORS = (mysql.connector.IntegrityError, mysql.connector.DataError)
+
+
+class QueueFull(Exception):
+    """Raised by submit() when too many rows are waiting for MySQL."""
+
+
+class AttendanceQueue:
+    """Journaled, group-committed attendance writes for one worker process."""
+
+    def __init__(self, directory=ATTENDANCE_JOURNAL_DIR, interval=ATTENDANCE_FLUSH_INTERVAL,
+                 max_rows=ATTENDANCE_FLUSH_ROWS):
+        self.directory = directory
+        self.interval = interval / 1000.0
+        self.max_rows = max_rows
+        self._connect = None
+        self._on_commit = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()       # pending list, segment file, counters
+        self._sync_lock = threading.Lock()  # fsync and segment rotation (taken before _lock)
+        self._wake = threading.Event()
+        self._stopping = False
+        self._segment = None
+        self._segment_seq = 0
+        self._written = 0
+        self._synced = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._statuses = OrderedDict()
+        self._next_prune = 0.0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.fsyncs = 0
+        self.failed = 0
+
+    # --- Journal -------------------------------------------------------------
+
+    def _open_segment(self):
+        """Start a new segment owned (flock'ed) by this process."""
+        self._segment_seq += 1
+        path = os.path.join(self.directory, f"{os.getpid()}-{int(time.time())}-{self._segment_seq}.jsonl")
+        segment = open(path, 'a', encoding='utf-8')
+        if fcntl:
+            fcntl.flock(segment, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return segment
+
+    def _append(self, record):
+        """Write one record to the current segment; returns its sequence number (caller holds _lock)."""
+        self._segment.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._segment.flush()
+        self._written += 1
+        return self._written
+
+    def _sync(self, seq):
+        """Make record `seq` durable; one fsync covers every record written before it."""
+        with self._sync_lock:
+            if self._synced >= seq:
+                return
+            with self._lock:
+                target, segment = self._written, self._segment
+            os.fsync(segment.fileno())
+            self._synced = target
+            self.fsyncs += 1
+
+    def _rotate(self):
+        """Swap in a fresh segment and take everything queued so far."""
+        with self._sync_lock:
+            with self._lock:
+                if not self._pending:
+                    return None, []
+                os.fsync(self._segment.fileno())
+                self._synced = self._written
+                old, self._segment = self._segment, self._open_segment()
+                batch, self._pending, self._pending_rows = self._pending, [], 0
+        return old, batch
+
+    def _recover(self):
+        """
+        Load segments left behind by dead processes.
+
+        Returns:
+            tuple: (list of open segment files, list of submission records)
+        """
+        segments, records = [], []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.jsonl'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                segment = open(path, 'r+', encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            if fcntl:
+                try:
+                    fcntl.flock(segment, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    segment.close()  # Owned by a live worker
+                    continue
+                if os.fstat(segment.fileno()).st_nlink == 0:
+                    segment.close()  # Replayed and deleted by another worker meanwhile
+                    continue
+            for line in segment:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    pass  # Torn last line from a crash mid-write; it was never acknowledged
+            segments.append(segment)
+        return segments, records
+
+    @staticmethod
+    def _discard(segments):
+        for segment in segments:
+            try:
+                os.remove(segment.name)
+            except FileNotFoundError:
+                pass
+            segment.close()
+
+    # --- Public API ----------------------------------------------------------
+
+    def start(self, connect, on_commit=None):
+        """
+        Start the flush thread in this process and replay orphaned segments.
+        Safe to call more than once; after a fork the child starts its own thread.
+
+        Args:
+            connect (callable): Returns a new MySQL connection
+            on_commit (callable): Called with the committed records after each flush
+        """
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._connect, self._on_commit = connect, on_commit
+            self._pid = os.getpid()
+            os.makedirs(self.directory, exist_ok=True)
+            recovered = self._recover()
+            self._segment = self._open_segment()
+            self._written = self._synced = 0
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, args=(recovered,),
+                                            name='attendance-flush', daemon=True)
+        self._thread.start()
+
+    def submit(self, faculty_id, subject_id, date, rows):
+        """
+        Durably queue one attendance submission.
+
+        Args:
+            faculty_id (int): Submitting faculty member
+            subject_id (int): Subject the attendance is for
+            date (str): Attendance date, YYYY-MM-DD
+            rows (list): (student_id, 'Present' | 'Absent') pairs
+
+        Returns:
+            str: Submission id for the status endpoint
+
+        Raises:
+            QueueFull: Too many rows are already waiting for MySQL
+        """
+        record = {'id': uuid.uuid4().hex, 'faculty_id': faculty_id, 'subject_id': subject_id,
+                  'date': date, 'rows': [[int(student_id), status] for student_id, status in rows],
+                  'at': datetime.now().isoformat(timespec='seconds')}
+        with self._lock:
+            if self._pending_rows + len(rows) > MAX_PENDING_ROWS:
+                raise QueueFull('Attendance queue is full')
+            seq = self._append(record)
+            self._pending.append(record)
+            self._pending_rows += len(rows)
+            self._set_status(record, 'queued')
+            wake = self._pending_rows >= self.max_rows
+        self._sync(seq)
+        if wake:
+            self._wake.set()
+        return record['id']
+
+    def status(self, submission_id, db=None):
+        """
+        Look up a submission: this worker's memory, then Attendance_Submission, then the journal.
+
+        Args:
+            submission_id (str): Id returned by submit()
+            db: MySQL connection (optional)
+
+        Returns:
+            dict: status ('queued', 'committed' or 'failed'), faculty_id, ... or None if unknown
+        """
+        with self._lock:
+            known = self._statuses.get(submission_id)
+            if known is not None:
+                return dict(known)
+        if db is not None:
+            cursor = db.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT submission_id, faculty_id, subject_id, attendance_date, student_count,
+                       LOWER(status) AS status, error, created_at
+                FROM Attendance_Submission WHERE submission_id = %s
+            """, (submission_id,))
+            row = cursor.fetchone()
+            cursor.close()
+            if row:
+                return {'submission_id': row['submission_id'], 'status': row['status'],
+                        'faculty_id': row['faculty_id'], 'subject_id': row['subject_id'],
+                        'date': row['attendance_date'].isoformat(), 'student_count': row['student_count'],
+                        'error': row['error'], 'committed_at': row['created_at'].isoformat()}
+        # Queued by another worker on this host
+        needle = f'"id":"{submission_id}"'
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return None
+        for name in names:
+            try:
+                with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as segment:
+                    for line in segment:
+                        if needle in line:
+                            record = json.loads(line)
+                            return {'submission_id': submission_id, 'status': 'queued',
+                                    'faculty_id': record['faculty_id'], 'subject_id': record['subject_id'],
+                                    'date': record['date'], 'student_count': len(record['rows'])}
+            except (FileNotFoundError, ValueError):
+                continue
+        return None
+
+    def stop(self):
+        """Ask the flush thread to write what is queued and exit (the journal covers the rest)."""
+        self._stopping = True
+        self._wake.set()
+
+    def stats(self):
+        """Queue depth and flush counters for this process."""
+        with self._lock:
+            return {'enabled': self._thread is not None, 'pending_submissions': len(self._pending),
+                    'pending_rows': self._pending_rows, 'flushes': self.flushes,
+                    'flushed_rows': self.flushed_rows, 'fsyncs': self.fsyncs,
+                    'failed_submissions': self.failed}
+
+    def _set_status(self, record, status, error=None):
+        """Remember a submission's state (caller holds _lock)."""
+        self._statuses[record['id']] = {'submission_id': record['id'], 'status': status,
+                                        'faculty_id': record['faculty_id'],
+                                        'subject_id': record['subject_id'], 'date': record['date'],
+                                        'student_count': len(record['rows']), 'error': error}
+        self._statuses.move_to_end(record['id'])
+        while len(self._statuses) > STATUS_CACHE_SIZE:
+            self._statuses.popitem(last=False)
+
+    # --- Flush thread --------------------------------------------------------
+
+    def _run(self, recovered):
+        db = None
+        segments, batch = recovered
+        if batch:
+            print(f"Attendance queue: replaying {len(batch)} submissions from {len(segments)} journal segments")
+        else:
+            self._discard(segments)
+        # Replayed and retried batches may have been committed already
+        replay = True
+        while True:
+            if not batch:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                old, batch = self._rotate()
+                segments = [old] if old else []
+                replay = False
+            if batch:
+                try:
+                    if db is None or not db.is_connected():
+                        db = self._connect()
+                    self._flush(db, batch, replay)
+                    self._discard(segments)
+                    segments, batch = [], []
+                except Exception as e:
+                    # MySQL unreachable: keep the segments and retry the same batch
+                    print(f"Error flushing attendance queue ({len(batch)} submissions): {e}")
+                    try:
+                        if db is not None:
+                            db.close()
+                    except Exception:
+                        pass
+                    db = None
+                    replay = True
+                    time.sleep(RETRY_DELAY)
+                    continue
+            if time.monotonic() >= self._next_prune and db is not None:
+                self._prune(db)
+            if self._stopping and not self._pending:
+                break
+        if db is not None:
+            db.close()
+
+    def _flush(self, db, batch, replay=False):
+        """Commit a batch in one transaction; submissions with bad data are retried alone and failed."""
+        cursor = db.cursor()
+        try:
+            if replay:
+                batch = self._skip_recorded(cursor, batch)
+                if not batch:
+                    return
+            try:
+                events = self._write(cursor, batch)
+                db.commit()
+                committed, failures = batch, []
+            except DATA_ERRORS:
+                db.rollback()
+                committed, events, failures = [], [], []
+                for record in batch:
+                    try:
+                        events.extend(self._write(cursor, [record]))
+                        db.commit()
+                        committed.append(record)
+                    except DATA_ERRORS as e:
+                        db.rollback()
+                        failures.append((record, str(e)[:255]))
+                if failures:
+                    self._record(cursor, [record for record, _error in failures], 'Failed',
+                                 dict((record['id'], error) for record, error in failures))
+                    db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        with self._lock:
+            for record in committed:
+                self._set_status(record, 'committed')
+            for record, error in failures:
+                self._set_status(record, 'failed', error)
+                self.failed += 1
+            self.flushes += 1
+            self.flushed_rows += sum(len(record['rows']) for record in committed)
+        if self._on_commit and committed:
+            try:
+                self._on_commit(committed, events)
+            except Exception as e:
+                print(f"Error in attendance commit callback: {e}")
+
+    def _write(self, cursor, batch):
+        """Upsert the merged rows of a batch and log its activity; returns the events."""
+        merged = OrderedDict()
+        for record in batch:
+            for student_id, status in record['rows']:
+                merged[(student_id, record['subject_id'], record['date'])] = status
+        items = list(merged.items())
+        for start in range(0, len(items), UPSERT_CHUNK):
+            chunk = items[start:start + UPSERT_CHUNK]
+            cursor.execute(
+                "INSERT INTO Student_Attendance (student_id, subject_id, attendance_date, status) VALUES "
+                + ', '.join(['(%s, %s, %s, %s)'] * len(chunk))
+                # Row alias, not VALUES() (deprecated, warning 1287 is raised under raise_on_warnings)
+                + " AS new ON DUPLICATE KEY UPDATE status = new.status",
+                [value for (student_id, subject_id, date), status in chunk
+                 for value in (student_id, subject_id, date, status)]
+            )
+
+        subject_ids = sorted({record['subject_id'] for record in batch})
+        cursor.execute(
+            f"SELECT subject_id, subject_code, subject_name FROM Subjects "
+            f"WHERE subject_id IN ({', '.join(['%s'] * len(subject_ids))})", subject_ids)
+        labels = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        events = []
+        for record in batch:
+            subject_code, subject_name = labels.get(record['subject_id'], (None, None))
+            events.extend(('Student', student_id, 'attendance', 'Attendance Marked',
+                           f"{subject_name}: marked {status} on {record['date']}", 'calendar-check')
+                          for student_id, status in record['rows'])
+            events.append(('Faculty', record['faculty_id'], 'attendance', 'Attendance Marked',
+                           f"{subject_code} - {len(record['rows'])} students", 'clipboard-check'))
+        log_activities(cursor, events)
+        self._record(cursor, batch, 'Committed')
+        bump_versions(cursor, 'Student_Attendance', 'Activity_Log')
+        return events
+
+    @staticmethod
+    def _record(cursor, batch, status, errors=None):
+        """Insert one Attendance_Submission row per submission."""
+        cursor.execute(
+            "INSERT INTO Attendance_Submission "
+            "(submission_id, faculty_id, subject_id, attendance_date, student_count, status, error) VALUES "
+            + ', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(batch))
+            + " AS new ON DUPLICATE KEY UPDATE status = new.status, error = new.error",
+            [value for record in batch
+             for value in (record['id'], record['faculty_id'], record['subject_id'], record['date'],
+                           len(record['rows']), status, (errors or {}).get(record['id']))]
+        )
+
+    @staticmethod
+    def _skip_recorded(cursor, batch):
+        """Drop replayed submissions that were committed before the crash."""
+        ids = [record['id'] for record in batch]
+        cursor.execute(
+            f"SELECT submission_id FROM Attendance_Submission "
+            f"WHERE submission_id IN ({', '.join(['%s'] * len(ids))})", ids)
+        done = {row[0] for row in cursor.fetchall()}
+        return [record for record in batch if record['id'] not in done]
+
+    def _prune(self, db):
+        """Delete Attendance_Submission rows past the retention window (once an hour)."""
+        self._next_prune = time.monotonic() + 3600
+        cutoff = datetime.now() - timedelta(days=SUBMISSION_RETENTION_DAYS)
+        cursor = db.cursor()
+        try:
+            cursor.execute("DELETE FROM Attendance_Submission WHERE created_at < %s LIMIT 5000", (cutoff,))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error pruning attendance submissions: {e}")
+        finally:
+            cursor.close()
@@ -1,13 +1,46 @@
 """
 Authentication utilities for ERP Cell system.
 Handles password hashing, verification, and user authentication.
+
+The bcrypt work factor is calibrated at start-up to BCRYPT_TARGET_MS on the
+current host (or pinned with BCRYPT_ROUNDS). Every bcrypt hash records its
+own cost (`$2b$<cost>$...`), so hashes made on older hardware are found on
+login and rehashed at the current cost in the background.
 """
 
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from flask_bcrypt import Bcrypt
 from flask_login import UserMixin
 
 bcrypt = Bcrypt()
 
+# Target time for one hash/verify; the calibrated cost stays at or under it
+BCRYPT_TARGET_MS = float(os.environ.get('BCRYPT_TARGET_MS', 250))
+
+# Explicit cost, skipping calibration (e.g. to keep several hosts identical)
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 0))
+
+# Calibration never goes below the library default's safety margin or above
+# what a login can afford
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+
+# Cost used for the timing sample (cheap, but long enough to measure)
+CALIBRATION_ROUNDS = 8
+
+# One background thread: rehashing is deferred work and must not compete with logins
+_rehash_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rehash')
+_rehash_pending = set()
+_rehash_lock = threading.Lock()
+
+# Cost chosen by configure_bcrypt(); None until the app is set up
+_rounds = None
+
 
 class User(UserMixin):
     """User class for Flask-Login."""
@@ -31,6 +64,112 @@ class User(UserMixin):
         return self.user_role == 'Faculty'
 
 
+def calibrate_rounds(target_ms=BCRYPT_TARGET_MS, samples=3):
+    """
+    Pick the largest bcrypt cost whose hash time stays within target_ms here.
+
+    bcrypt time doubles with each cost step, so one cheap sample at
+    CALIBRATION_ROUNDS is enough to extrapolate.
+
+    Returns:
+        tuple: (rounds, estimated milliseconds per hash)
+    """
+    best = None
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.generate_password_hash('calibration', rounds=CALIBRATION_ROUNDS)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    rounds = CALIBRATION_ROUNDS + math.floor(math.log2(target_ms / max(best, 0.01)))
+    rounds = max(BCRYPT_MIN_ROUNDS, min(BCRYPT_MAX_ROUNDS, rounds))
+    return rounds, best * 2 ** (rounds - CALIBRATION_ROUNDS)
+
+
+def configure_bcrypt(app):
+    """
+    Initialise Flask-Bcrypt with a cost suited to this host.
+
+    Uses BCRYPT_ROUNDS when set, otherwise calibrate_rounds().
+
+    Returns:
+        int: The bcrypt cost in use
+    """
+    if BCRYPT_ROUNDS:
+        rounds = BCRYPT_ROUNDS
+        print(f"bcrypt cost {rounds} (BCRYPT_ROUNDS)")
+    else:
+        rounds, estimate = calibrate_rounds()
+        print(f"bcrypt cost {rounds} (~{estimate:.0f} ms per hash, target {BCRYPT_TARGET_MS:.0f} ms)")
+    global _rounds
+    _rounds = rounds
+    app.config['BCRYPT_LOG_ROUNDS'] = rounds
+    bcrypt.init_app(app)
+    return rounds
+
+
+def hash_rounds(password_hash):
+    """
+    Read the cost recorded in a bcrypt hash.
+
+    Returns:
+        int: Cost, or None if the value is not a bcrypt hash
+    """
+    parts = (password_hash or '').split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def needs_rehash(password_hash):
+    """
+    True if a hash was made with a lower cost than the one configured.
+
+    Never downgrades: a noisy calibration, or hosts calibrating differently,
+    must not flip stored hashes back and forth between costs.
+    """
+    return _rounds is not None and hash_rounds(password_hash) < _rounds
+
+
+def rehash_in_background(user_id, old_hash, password, connect):
+    """
+    Re-hash a verified password at the current cost without delaying the login.
+
+    The UPDATE only applies if the stored hash is still old_hash, so a password
+    change made in the meantime is never overwritten. Duplicate requests for a
+    user already queued are ignored.
+
+    Args:
+        user_id (int): User_Credentials.user_id
+        old_hash (str): Hash the password was just verified against
+        password (str): The verified plain-text password
+        connect (callable): Returns a new MySQL connection (not the request's)
+    """
+    with _rehash_lock:
+        if user_id in _rehash_pending:
+            return
+        _rehash_pending.add(user_id)
+
+    def run():
+        db = None
+        try:
+            new_hash = hash_password(password)
+            db = connect()
+            cursor = db.cursor()
+            cursor.execute("UPDATE User_Credentials SET password_hash = %s WHERE user_id = %s AND password_hash = %s",
+                           (new_hash, user_id, old_hash))
+            db.commit()
+            cursor.close()
+        except Exception as e:
+            print(f"Error rehashing password for user {user_id}: {e}")
+        finally:
+            if db is not None:
+                db.close()
+            with _rehash_lock:
+                _rehash_pending.discard(user_id)
+
+    _rehash_pool.submit(run)
+
+
 def hash_password(password):
     """
     Hash a password using bcrypt.
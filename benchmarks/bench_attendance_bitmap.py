@@ -0,0 +1,96 @@
+"""
+Benchmark: bitmap attendance analytics over a synthetic term.
+
+Usage:
+    python benchmarks/bench_attendance_bitmap.py [--students 2000] [--subjects 40] [--sessions 120]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from attendance_bitmap import AttendanceBitmaps  # noqa: E402
+
+TERM = {'term': '2025-26', 'start_date': date(2025, 7, 1), 'end_date': date(2026, 6, 30)}
+
+
+class FakeDB:
+    """Stands in for MySQL: the cursor returns the synthetic term's attendance rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, **_kwargs):
+        return self
+
+    def execute(self, *_args):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def synthetic_rows(n_students, n_subjects, n_sessions, subjects_per_student=6, seed=42):
+    """TERM_QUERY rows (subject_id, student_id, day offset, present), ~85% present."""
+    rng = np.random.default_rng(seed)
+    offsets = list(range(0, n_sessions * 2, 2))
+    rows = []
+    for student_id in range(1, n_students + 1):
+        for subject_id in rng.choice(np.arange(1, n_subjects + 1), subjects_per_student, replace=False):
+            present = (rng.random(n_sessions) < 0.85).tolist()
+            rows.extend((int(subject_id), student_id, offset, int(p)) for offset, p in zip(offsets, present))
+    return rows, [TERM['start_date'] + timedelta(days=offset) for offset in offsets]
+
+
+def timed(label, fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<24}{min(timings):8.2f} ms (best of {repeat})")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--subjects', type=int, default=40)
+    parser.add_argument('--sessions', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows, days = synthetic_rows(args.students, args.subjects, args.sessions)
+    db = FakeDB(rows)
+    engine = AttendanceBitmaps()
+
+    start = time.perf_counter()
+    engine.student_summary(db, TERM, 1)
+    build_ms = (time.perf_counter() - start) * 1000
+    subjects = engine._terms[TERM['term']][3].values()
+    packed = sum(bitmap.recorded.nbytes + bitmap.present.nbytes for bitmap in subjects)
+
+    print(f"attendance rows:        {len(rows):,}")
+    print(f"packed bitmaps:         {packed / 1024:,.1f} KB")
+    print(f"build from rows:        {build_ms:8.1f} ms")
+    timed('student summary', lambda: engine.student_summary(db, TERM, args.students // 2), args.repeat)
+    streaks = timed('absence streaks >= 3', lambda: engine.absence_streaks(db, TERM, 3), args.repeat)
+    cohort = list(range(1, args.students // 8))
+    timed('heatmap (1/8 cohort)', lambda: engine.heatmap(db, TERM, cohort), args.repeat)
+    timed('heatmap (everyone)', lambda: engine.heatmap(db, TERM), args.repeat)
+    marks = [(student_id, student_id % 7 != 0) for student_id in range(1, args.students + 1, 40)]
+    next_day = days[-1] + timedelta(days=1)
+    timed('record one class', lambda: engine.record(1, next_day, marks), args.repeat)
+    print(f"students on a streak:   {len(streaks):,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: GPA/CGPA/rank engine over synthetic result rows.
+
+Usage:
+    python benchmarks/bench_gpa.py [--rows 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from gpa import GRADE_POINTS, compute, rows_to_arrays  # noqa: E402
+
+
+def synthetic_rows(n_rows, subjects_per_term=5, n_terms=4, n_depts=8, seed=42):
+    """Generate (student_id, dept_id, term, credits, grade) rows."""
+    rng = np.random.default_rng(seed)
+    n_students = max(1, n_rows // (subjects_per_term * n_terms))
+    student = np.repeat(np.arange(1, n_students + 1), subjects_per_term * n_terms)[:n_rows]
+    dept = (student % n_depts) + 1
+    term = np.array([f"20{20 + t}-{21 + t}" for t in range(n_terms)])
+    term = np.tile(np.repeat(term, subjects_per_term), n_students)[:n_rows]
+    credits = rng.choice([3.0, 3.5, 4.0], size=n_rows)
+    grade = rng.choice(list(GRADE_POINTS), size=n_rows)
+    return list(zip(student.tolist(), dept.tolist(), term.tolist(), credits.tolist(), grade.tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+
+    start = time.perf_counter()
+    arrays = rows_to_arrays(rows)
+    convert_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        tables = compute(arrays)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"rows:            {len(rows):,}")
+    print(f"students:        {len(tables['students']):,}  terms: {len(tables['terms'])}")
+    print(f"rows_to_arrays:  {convert_ms:8.1f} ms")
+    print(f"compute (best):  {min(timings):8.1f} ms")
+    print(f"compute (mean):  {sum(timings) / len(timings):8.1f} ms")
+    print(f"full reload:     {convert_ms + min(timings):8.1f} ms (rows_to_arrays + compute, excluding the query)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: per-subject and per-department result statistics over synthetic marks.
+
+Usage:
+    python benchmarks/bench_result_stats.py [--rows 200000] [--subjects 400] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from result_stats import GRADES, compute, rows_to_arrays  # noqa: E402
+
+
+def synthetic_rows(n_rows, n_subjects, n_depts=8, seed=42):
+    """(subject_id, dept_id, theory, practical, grade, passed) rows, ~2% missing marks."""
+    rng = np.random.default_rng(seed)
+    subject = rng.integers(1, n_subjects + 1, n_rows)
+    theory = np.clip(rng.normal(60, 18, n_rows), 0, 100).round().astype(int).tolist()
+    practical = np.clip(rng.normal(70, 15, n_rows), 0, 100).round().astype(int).tolist()
+    missing = rng.random(n_rows) < 0.02
+    grade = rng.choice(GRADES, n_rows)
+    return [(int(s), int(s % n_depts) + 1, None if m else t, p, g, int(g != 'F'))
+            for s, t, p, m, g in zip(subject, theory, practical, missing, grade)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--subjects', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows, args.subjects)
+
+    start = time.perf_counter()
+    arrays = rows_to_arrays(rows)
+    convert_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        subjects, departments = compute(arrays, 'subject'), compute(arrays, 'dept')
+        timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"rows:            {len(rows):,}")
+    print(f"subjects:        {len(subjects['ids']):,}  departments: {len(departments['ids'])}")
+    print(f"rows_to_arrays:  {convert_ms:8.1f} ms")
+    print(f"compute (best):  {min(timings):8.1f} ms")
+    print(f"compute (mean):  {sum(timings) / len(timings):8.1f} ms")
+    print(f"full reload:     {convert_ms + min(timings):8.1f} ms (rows_to_arrays + compute, excluding the query)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: timetable generator on a synthetic 500-section college.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--sections 500] [--workers 4] [--time-limit 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import scheduler  # noqa: E402
+import timetable  # noqa: E402
+
+N_DEPARTMENTS = 10
+
+
+class FakeDB:
+    """Stands in for MySQL: answers load_problem()'s queries from synthetic tables."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.sql = ''
+
+    def cursor(self, **_kwargs):
+        return self
+
+    def execute(self, sql, *_args):
+        self.sql = sql
+
+    def fetchall(self):
+        if 'FROM Enrollment' in self.sql:
+            return self.tables['enrollment']
+        if 'FROM Subjects' in self.sql:
+            return self.tables['subjects']
+        if 'location' in self.sql.split('FROM')[0]:
+            return self.tables['rooms']
+        return self.tables['assignments']
+
+    def close(self):
+        pass
+
+
+def synthetic_tables(n_sections, seed=3, students_per_cohort=30):
+    """
+    Four fifths of the subjects are core, in cohorts of 5 per department year;
+    the rest are department electives, and each cohort's students pick one of
+    three electives offered to it. 3-4 sections per faculty member, one room
+    per 8 sections.
+    """
+    rng = random.Random(seed)
+    n_core = n_sections * 4 // 5 // 5 * 5
+    subjects = [{'subject_id': i + 1, 'dept_id': (i // 5) % N_DEPARTMENTS + 1 if i < n_core
+                 else (i - n_core) % N_DEPARTMENTS + 1, 'credits': rng.choice([3.0, 3.5, 4.0])}
+                for i in range(n_sections)]
+    electives = {}
+    for subject in subjects[n_core:]:
+        electives.setdefault(subject['dept_id'], []).append(subject['subject_id'])
+
+    enrollment, student_id = [], 0
+    for cohort in range(n_core // 5):
+        core = [cohort * 5 + k + 1 for k in range(5)]
+        pool = electives.get(cohort % N_DEPARTMENTS + 1, [])
+        offered = rng.sample(pool, min(3, len(pool)))
+        for _ in range(students_per_cohort):
+            student_id += 1
+            chosen = core + ([rng.choice(offered)] if offered else [])
+            enrollment.extend({'student_id': student_id, 'subject_id': s} for s in chosen)
+
+    n_faculty = max(1, round(n_sections / 3.3))
+    # Round-robin teaching load, shuffled, so nobody has more lessons than periods
+    teachers = [i % n_faculty for i in range(n_sections)]
+    rng.shuffle(teachers)
+    assignments = [{'subject_id': i + 1, 'faculty_id': teachers[i]} for i in range(n_sections)]
+    rooms = [{'location': f"Room {i:03d}"} for i in range(max(1, n_sections // 8))]
+
+    availability = {}
+    for faculty_id in range(0, n_faculty, 3):
+        days = rng.sample(timetable.DAYS, 4)
+        availability[faculty_id] = [{'day': day, 'start': '09:00', 'end': '17:00'} for day in days]
+    return {'subjects': subjects, 'enrollment': enrollment, 'assignments': assignments,
+            'rooms': rooms}, availability
+
+
+def student_clashes(rows, enrollment):
+    """Students booked into two lessons in the same period."""
+    slots = {}
+    for row in rows:
+        slots.setdefault(row['subject_id'], []).append((row['day_of_week'], row['start_time']))
+    taken = {}
+    for e in enrollment:
+        taken.setdefault(e['student_id'], []).extend(slots.get(e['subject_id'], []))
+    return sum(len(s) - len(set(s)) for s in taken.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sections', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=scheduler.SCHEDULE_WORKERS)
+    parser.add_argument('--time-limit', type=float, default=50)
+    args = parser.parse_args()
+
+    tables, availability = synthetic_tables(args.sections)
+    problem = scheduler.load_problem(FakeDB(tables), availability=availability)
+    start = time.perf_counter()
+    result = scheduler.generate(problem, restarts=args.workers, workers=args.workers, time_limit=args.time_limit)
+    elapsed = time.perf_counter() - start
+
+    rows = scheduler.to_rows(problem, result)
+    entries = [dict(r, timetable_id=i) for i, r in enumerate(rows)]
+    report = timetable.validate(entries, resources=('faculty', 'location'))
+    n_groups = len({g for section in problem['sections'] for g in section['groups']})
+
+    print(f"sections:        {args.sections}  lessons: {len(problem['lessons'])}  rooms: {len(problem['rooms'])}")
+    print(f"students:        {len({e['student_id'] for e in tables['enrollment']})}  cohorts: {n_groups}")
+    print(f"workers:         {args.workers}")
+    print(f"elapsed:         {elapsed:8.2f} s")
+    print(f"unplaced:        {result['unplaced']}")
+    print(f"soft penalty:    {result['penalty']}")
+    print(f"clashes:         {len(report['clashes'])}")
+    print(f"student clashes: {student_clashes(rows, tables['enrollment'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: in-memory admin search index over synthetic entities.
+
+Usage:
+    python benchmarks/bench_search.py [--entities 100000] [--queries 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from search import SearchIndex  # noqa: E402
+
+SYLLABLES = ['a', 'an', 'ar', 'av', 'di', 'ka', 'li', 'ma', 'mi', 'na', 'ni', 'o', 'pri', 'ra',
+             'ro', 'sa', 'sha', 'ta', 'vi', 'ya', 'jo', 'el', 'han', 'ker', 'son', 'dra', 'ish', 'u']
+
+
+def name_pool(rng, size):
+    """Distinct made-up names with Zipf-like popularity weights (top name ~2-3%)."""
+    names = set()
+    while len(names) < size:
+        names.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))))
+    names = sorted(names)
+    rng.shuffle(names)
+    return names, [1 / (rank + 8) for rank in range(size)]
+
+
+def build_index(n_entities, seed=7):
+    """Fill an index with students, faculty and subjects in a 90/8/2 split."""
+    rng = random.Random(seed)
+    first_names, first_weights = name_pool(rng, 800)
+    last_names, last_weights = name_pool(rng, 1500)
+    firsts = rng.choices(first_names, first_weights, k=n_entities)
+    lasts = rng.choices(last_names, last_weights, k=n_entities)
+    entities = []
+    for i, first, last in zip(range(1, n_entities + 1), firsts, lasts):
+        if i % 50 == 0:
+            entities.append(('subject', i, f"{last.title()} Studies {i}", None, None, f"SUB{i}"))
+        elif i % 12 == 0:
+            entities.append(('faculty', i, f"{first.title()} {last.title()}",
+                             f"{first}.{last}{i}@faculty.edu", f"fac{i}", f"FAC{i:06d}"))
+        else:
+            entities.append(('student', i, f"{first.title()} {last.title()}",
+                             f"{first}.{last}{i}@uni.edu", f"{first}{i}", None))
+    index = SearchIndex()
+    index.load(entities)
+    return index, first_names[:50], last_names[:50]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--entities', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index, first_names, last_names = build_index(args.entities)
+    build_s = time.perf_counter() - start
+
+    rng = random.Random(1)
+    # Queries use the 50 most popular names, i.e. the expensive end of the distribution
+    workloads = {
+        'prefix': lambda: rng.choice(first_names)[:3],
+        'full name': lambda: f"{rng.choice(first_names)} {rng.choice(last_names)}",
+        'name + prefix': lambda: f"{rng.choice(first_names)} {rng.choice(last_names)[:2]}",
+        'code': lambda: f"fac{rng.randrange(12, args.entities, 12):06d}",
+        'typo': lambda: rng.choice(last_names)[:-1] + 'q',
+    }
+
+    print(f"entities:        {len(index):,}  (build {build_s:.2f} s)")
+    for name, make in workloads.items():
+        queries = [make() for _ in range(args.queries)]
+        start = time.perf_counter()
+        for q in queries:
+            index.search(q, limit=10)
+        per_query_us = (time.perf_counter() - start) / len(queries) * 1e6
+        print(f"{name + ':':<16} {per_query_us:8.1f} us/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: request throughput of the Werkzeug dev server vs gunicorn.
+
+Both servers are started as subprocesses and hit with the same closed-loop
+load (each client thread keeps one keep-alive connection and sends requests
+back to back). The default path renders the login page, which needs no
+database, so the numbers measure the serving stack rather than MySQL.
+
+Usage:
+    python benchmarks/bench_server.py [--clients 32] [--duration 10] [--path /]
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SERVERS = {
+    # What `python app.py` runs (debug on, reloader off so the PID is the server)
+    'werkzeug-dev': lambda port: [sys.executable, '-c',
+                                  f"from app import app; app.run(host='127.0.0.1', port={port}, "
+                                  f"debug=True, use_reloader=False)"],
+    # app:app rather than wsgi:app so the run does not need a MySQL server for init_db
+    'gunicorn': lambda port: [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                              '--bind', f'127.0.0.1:{port}', 'app:app'],
+}
+
+
+def wait_for_port(port, timeout=20):
+    """Block until something accepts connections on the port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def load(port, path, clients, duration):
+    """Run the closed-loop load and return (requests, errors, sorted latencies)."""
+    deadline = time.monotonic() + duration
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        mine = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    raise http.client.HTTPException(response.status)
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                mine.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                with lock:
+                    errors[0] += 1
+        conn.close()
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return len(latencies), errors[0], latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    for name, command in SERVERS.items():
+        server = subprocess.Popen(command(args.port), cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.port)
+            load(args.port, args.path, 4, 1)  # warm-up
+            count, errors, latencies = load(args.port, args.path, args.clients, args.duration)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+        print(f"{name:14s} {count / args.duration:9.1f} req/s   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   "
+              f"errors {errors}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Change tracking for ERP Cell system.
+Mutable tables carry an `updated_at` column (maintained by MySQL with
+ON UPDATE CURRENT_TIMESTAMP(6)) and AFTER INSERT/UPDATE/DELETE triggers that
+append (table, primary key, operation) to Change_Log. Two read paths use them:
+
+    - delta reads: admin list endpoints accept `?since=<token>` and return the
+      rows changed after the token (keyset order on updated_at, key), the ids
+      deleted since, and the token to resume from; `since=0` starts a sync
+    - the change feed: every tracked change in Change_Log order, with the
+      current row for inserts/updates and a resumable token per change
+
+Timestamps and Change_Log ids are assigned when a statement runs, not when its
+transaction commits, so a reader could pass a change that commits a moment
+later. Both paths therefore only serve changes older than
+CHANGE_FEED_SETTLE seconds; transactions in this app take milliseconds.
+Foreign-key cascades do not fire MySQL triggers: rows removed only by a
+cascade (e.g. Enrollment when a subject is deleted) are not in the feed.
+"""
+
+import base64
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Seconds a change must be old before it is served (covers in-flight transactions)
+CHANGE_FEED_SETTLE = float(os.environ.get('CHANGE_FEED_SETTLE', 2))
+
+# Change_Log rows are kept this many days; older tokens must resync from scratch
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', 30))
+
+# Default and largest page for delta reads and the feed
+DELTA_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+# Tracked table -> (primary key, columns returned by the feed)
+TRACKED_TABLES = {
+    'Departments': ('dept_id', ('dept_id', 'dept_name')),
+    'Student_Info': ('student_id', ('student_id', 'first_name', 'last_name', 'date_of_birth', 'email',
+                                    'phone_number', 'enrollment_date', 'gender', 'dept_id')),
+    'Faculty_Info': ('faculty_id', ('faculty_id', 'faculty_code', 'first_name', 'last_name', 'gender',
+                                    'dept_id', 'email', 'phone_number', 'hire_date')),
+    'Subjects': ('subject_id', ('subject_id', 'subject_code', 'subject_name', 'credits', 'dept_id')),
+    'Library_Book': ('book_id', ('book_id', 'isbn', 'title', 'author', 'total_copies', 'available_copies')),
+    'Library_Transaction': ('library_id', ('library_id', 'student_id', 'book_id', 'book_title', 'book_author',
+                                           'book_isbn', 'issue_date', 'due_date', 'return_date', 'status',
+                                           'fine_amount')),
+    'Student_Results': ('result_id', ('result_id', 'student_id', 'subject_id', 'dept_id', 'exam_date',
+                                      'subject_name', 'theory_marks', 'practical_marks', 'credits', 'grade',
+                                      'status_exam')),
+    'Student_Fees': ('fee_id', ('fee_id', 'student_id', 'dept_id', 'tuition_fee', 'library_fee', 'lab_fee',
+                                'exam_fee', 'hostel_fee', 'other_charges', 'total_fee', 'paid_date', 'status')),
+    'Student_Attendance': ('attendance_id', ('attendance_id', 'student_id', 'subject_id', 'attendance_date',
+                                             'status')),
+    'Class_Timetable': ('timetable_id', ('timetable_id', 'dept_id', 'faculty_id', 'subject_id', 'day_of_week',
+                                         'start_time', 'end_time', 'location')),
+    'Enrollment': ('enrollment_id', ('enrollment_id', 'student_id', 'subject_id', 'term', 'enrolled_on')),
+}
+
+
+class TokenExpired(ValueError):
+    """The token is older than the Change_Log retention; the client must resync."""
+
+
+# --- Tokens -----------------------------------------------------------------
+
+def encode_token(moment, number):
+    """Opaque, URL-safe token for (timestamp, key or change id)."""
+    raw = f"{moment.isoformat(timespec='microseconds')}|{number}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_token(token):
+    """
+    Parse a token from encode_token(); '0' means "from the beginning".
+
+    Returns:
+        tuple: (datetime, int)
+
+    Raises:
+        ValueError: Malformed token
+        TokenExpired: Older than CHANGE_LOG_RETENTION_DAYS
+    """
+    if token == '0':
+        return datetime(1970, 1, 1), 0
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('ascii')
+        moment, number = raw.split('|')
+        moment, number = datetime.fromisoformat(moment), int(number)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid since token') from e
+    if moment < datetime.now() - timedelta(days=CHANGE_LOG_RETENTION_DAYS):
+        raise TokenExpired('since token has expired; resync with since=0')
+    return moment, number
+
+
+def page_size(value):
+    """Clamp a ?limit= value to 1..MAX_PAGE_SIZE."""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DELTA_PAGE_SIZE
+
+
+def _cutoff(db):
+    """Newest timestamp whose changes are safe to serve (MySQL clock)."""
+    cursor = db.cursor()
+    cursor.execute("SELECT NOW(6) - INTERVAL %s MICROSECOND", (int(CHANGE_FEED_SETTLE * 1000000),))
+    cutoff = cursor.fetchone()[0]
+    cursor.close()
+    return cutoff
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, timedelta):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+# --- Delta reads --------------------------------------------------------------
+
+def read_delta(db, select, source, alias, table, since, limit=DELTA_PAGE_SIZE):
+    """
+    Rows of one list endpoint changed after a since token.
+
+    Args:
+        db: MySQL connection
+        select (str): Column list from fields.select_list()
+        source (str): FROM clause with joins, without WHERE/ORDER BY
+        alias (str): Alias of the tracked table in `source`
+        table (str): Tracked table name (key of TRACKED_TABLES)
+        since (str): Token from a previous response, or '0'
+        limit (int): Page size
+
+    Returns:
+        dict: rows, deleted (primary keys), next_since and has_more
+
+    Raises:
+        ValueError / TokenExpired: Bad or expired token
+    """
+    moment, last_key = decode_token(since)
+    key = TRACKED_TABLES[table][0]
+    cutoff = _cutoff(db)
+    cursor = db.cursor(dictionary=True)
+    try:
+        cursor.execute(f"""
+            SELECT {select}, {alias}.updated_at AS _updated_at, {alias}.{key} AS _key
+            FROM {source}
+            WHERE {alias}.updated_at <= %s
+              AND ({alias}.updated_at > %s OR ({alias}.updated_at = %s AND {alias}.{key} > %s))
+            ORDER BY {alias}.updated_at, {alias}.{key}
+            LIMIT %s
+        """, (cutoff, moment, moment, last_key, limit + 1))
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if has_more:
+            next_moment, next_key = rows[-1]['_updated_at'], rows[-1]['_key']
+        else:
+            next_moment, next_key = cutoff, 0
+
+        # Deletions are only in Change_Log; report those up to the same point
+        cursor.execute("""
+            SELECT DISTINCT row_id FROM Change_Log
+            WHERE table_name = %s AND op = 'delete' AND changed_at > %s AND changed_at <= %s
+        """, (table, moment, next_moment))
+        deleted = [row['row_id'] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+    for row in rows:
+        del row['_updated_at'], row['_key']
+    return {'rows': rows, 'deleted': deleted, 'has_more': has_more,
+            'next_since': encode_token(next_moment, next_key)}
+
+
+# --- Change feed ----------------------------------------------------------------
+
+def read_feed(db, since, limit=DELTA_PAGE_SIZE, tables=None):
+    """
+    Tracked changes after a feed token, oldest first.
+
+    Args:
+        db: MySQL connection
+        since (str): Token of the last change processed, or '0'
+        limit (int): Page size
+        tables (set): Optional subset of TRACKED_TABLES
+
+    Returns:
+        dict: changes (token, table, op, key, changed_at, row), next_since and has_more
+
+    Raises:
+        ValueError / TokenExpired: Bad or expired token, or unknown table
+    """
+    _moment, last_id = decode_token(since)
+    if tables and not set(tables) <= set(TRACKED_TABLES):
+        raise ValueError(f"Unknown table(s). Tracked: {', '.join(TRACKED_TABLES)}")
+
+    cutoff = _cutoff(db)
+    cursor = db.cursor()
+    try:
+        table_filter = f"AND table_name IN ({', '.join(['%s'] * len(tables))})" if tables else ""
+        cursor.execute(f"""
+            SELECT change_id, table_name, row_id, op, changed_at
+            FROM Change_Log
+            WHERE change_id > %s AND changed_at <= %s {table_filter}
+            ORDER BY change_id
+            LIMIT %s
+        """, (last_id, cutoff, *(tables or ()), limit + 1))
+        log = cursor.fetchall()
+        has_more = len(log) > limit
+        log = log[:limit]
+
+        # Current state of the rows still present, one query per table
+        wanted = {}
+        for _change_id, table, row_id, op, _changed_at in log:
+            if op != 'delete':
+                wanted.setdefault(table, set()).add(row_id)
+        current = {}
+        for table, ids in wanted.items():
+            key, columns = TRACKED_TABLES[table]
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM {table} WHERE {key} IN ({', '.join(['%s'] * len(ids))})",
+                tuple(ids))
+            for values in cursor.fetchall():
+                row = {column: _json_value(value) for column, value in zip(columns, values)}
+                current[(table, row[key])] = row
+    finally:
+        cursor.close()
+
+    changes = [{'token': encode_token(changed_at, change_id), 'table': table, 'op': op, 'key': row_id,
+                'changed_at': changed_at.isoformat(), 'row': current.get((table, row_id))}
+               for change_id, table, row_id, op, changed_at in log]
+    # With nothing new, the token still moves to the cutoff so an idle client's token stays fresh
+    next_since = changes[-1]['token'] if changes else encode_token(cutoff, last_id)
+    return {'changes': changes, 'next_since': next_since, 'has_more': has_more}
+
+
+def trim_change_log(db, retention_days=CHANGE_LOG_RETENTION_DAYS, batch_size=5000):
+    """
+    Delete Change_Log rows older than the retention window in small batches.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    cursor = db.cursor()
+    deleted = 0
+    try:
+        while True:
+            cursor.execute("DELETE FROM Change_Log WHERE changed_at < %s ORDER BY change_id LIMIT %s",
+                           (cutoff, batch_size))
+            db.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+    finally:
+        cursor.close()
+    return deleted
+
+
+if __name__ == '__main__':
+    # Run from cron, e.g. nightly: python changes.py
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    conn = mysql.connector.connect(
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', ''),
+        host=os.environ.get('DB_HOST', 'localhost'),
+        database='erp_database'
+    )
+    removed = trim_change_log(conn)
+    conn.close()
+    print(f"✓ Removed {removed} change log rows older than {CHANGE_LOG_RETENTION_DAYS} days")
@@ -3,6 +3,13 @@
 CREATE DATABASE IF NOT EXISTS erp_database CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
 USE erp_database;
 
+CREATE TABLE IF NOT EXISTS Departments (
+    dept_id INT PRIMARY KEY AUTO_INCREMENT,
+    dept_name VARCHAR(100) UNIQUE NOT NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    KEY idx_dept_updated (updated_at)
+);
+
 CREATE TABLE IF NOT EXISTS Student_Info (
     student_id INT PRIMARY KEY AUTO_INCREMENT,
     first_name VARCHAR(100) NOT NULL,
@@ -11,7 +18,11 @@ CREATE TABLE IF NOT EXISTS Student_Info (
     email VARCHAR(150) UNIQUE NOT NULL,
     phone_number VARCHAR(20),
     enrollment_date DATE NOT NULL,
-    gender ENUM('Male','Female','Other')
+    gender ENUM('Male','Female','Other'),
+    dept_id INT,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (dept_id) REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    KEY idx_student_updated (updated_at)
 );
 
 CREATE TABLE IF NOT EXISTS Faculty_Info (
@@ -20,10 +31,13 @@ CREATE TABLE IF NOT EXISTS Faculty_Info (
     first_name VARCHAR(100) NOT NULL,
     last_name VARCHAR(100) NOT NULL,
     gender ENUM('Male','Female','Other'),
-    department VARCHAR(100) NOT NULL,
+    dept_id INT NOT NULL,
     email VARCHAR(150) UNIQUE NOT NULL,
     phone_number VARCHAR(20),
-    hire_date DATE NOT NULL
+    hire_date DATE NOT NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (dept_id) REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    KEY idx_faculty_updated (updated_at)
 );
 
 CREATE TABLE IF NOT EXISTS User_Credentials (
@@ -37,23 +51,35 @@ CREATE TABLE IF NOT EXISTS User_Credentials (
     FOREIGN KEY (faculty_ref_id) REFERENCES Faculty_Info(faculty_id) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
-CREATE TABLE IF NOT EXISTS Departments (
-    dept_id INT PRIMARY KEY AUTO_INCREMENT,
-    dept_name VARCHAR(100) UNIQUE NOT NULL
-);
-
 CREATE TABLE IF NOT EXISTS Subjects (
     subject_id INT PRIMARY KEY AUTO_INCREMENT,
     subject_code VARCHAR(15) UNIQUE NOT NULL,
     subject_name VARCHAR(150) NOT NULL,
     credits DECIMAL(3,1) NOT NULL,
     dept_id INT NOT NULL,
-    FOREIGN KEY (dept_id) REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (dept_id) REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    KEY idx_subject_updated (updated_at)
+);
+
+-- Book catalog; available_copies is kept in step by the issue/return paths
+CREATE TABLE IF NOT EXISTS Library_Book (
+    book_id INT PRIMARY KEY AUTO_INCREMENT,
+    isbn VARCHAR(20) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    author VARCHAR(255),
+    total_copies INT NOT NULL DEFAULT 1,
+    available_copies INT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    UNIQUE KEY unique_book_isbn (isbn),
+    CHECK (available_copies BETWEEN 0 AND total_copies),
+    KEY idx_book_updated (updated_at)
 );
 
 CREATE TABLE IF NOT EXISTS Library_Transaction (
     library_id INT PRIMARY KEY AUTO_INCREMENT,
     student_id INT NOT NULL,
+    book_id INT,
     book_title VARCHAR(255) NOT NULL,
     book_author VARCHAR(255),
     book_isbn VARCHAR(20),
@@ -61,14 +87,19 @@ CREATE TABLE IF NOT EXISTS Library_Transaction (
     due_date DATE NOT NULL,
     return_date DATE,
     status ENUM('Issued','Returned','Overdue') NOT NULL,
-    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE RESTRICT ON UPDATE CASCADE
+    fine_amount DECIMAL(8,2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    FOREIGN KEY (book_id) REFERENCES Library_Book(book_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    KEY idx_library_open (status, due_date),
+    KEY idx_library_updated (updated_at)
 );
 
 CREATE TABLE IF NOT EXISTS Student_Results (
     result_id INT PRIMARY KEY AUTO_INCREMENT,
     student_id INT NOT NULL,
     subject_id INT NOT NULL,
-    department VARCHAR(100) NOT NULL,
+    dept_id INT NOT NULL,
     exam_date DATE NOT NULL,
     subject_name VARCHAR(150) NOT NULL,
     theory_marks INT,
@@ -76,15 +107,37 @@ CREATE TABLE IF NOT EXISTS Student_Results (
     credits DECIMAL(3,1) NOT NULL,
     grade ENUM('A+','A','B+','B','C+','C','D','F') NOT NULL,
     status_exam ENUM('PASS','FAIL') NOT NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE RESTRICT ON UPDATE CASCADE,
     FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE RESTRICT ON UPDATE CASCADE,
-    UNIQUE KEY unique_student_subject (student_id, subject_id)
+    FOREIGN KEY (dept_id) REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    UNIQUE KEY unique_student_subject (student_id, subject_id),
+    KEY idx_result_updated (updated_at)
+);
+
+-- Grading policy per subject and/or term (subject_id 0 / term '' = any); the most
+-- specific one applies, see grading.py. No row at all means the built-in default.
+CREATE TABLE IF NOT EXISTS Grading_Policy (
+    subject_id INT NOT NULL DEFAULT 0,
+    term VARCHAR(20) NOT NULL DEFAULT '',
+    kind ENUM('absolute','curve','relative') NOT NULL,
+    params JSON NOT NULL,
+    updated_by INT,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    PRIMARY KEY (subject_id, term)
+);
+
+-- Query cache version per table, shared by all workers (see querycache.py);
+-- bumped by every write route, a missing row means version 0
+CREATE TABLE IF NOT EXISTS Table_Version (
+    table_name VARCHAR(40) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
 );
 
 CREATE TABLE IF NOT EXISTS Student_Fees (
     fee_id INT PRIMARY KEY AUTO_INCREMENT,
     student_id INT NOT NULL,
-    department VARCHAR(100) NOT NULL,
+    dept_id INT NOT NULL,
     tuition_fee DECIMAL(10,2) NOT NULL DEFAULT 0.00,
     library_fee DECIMAL(10,2) NOT NULL DEFAULT 0.00,
     lab_fee DECIMAL(10,2) NOT NULL DEFAULT 0.00,
@@ -94,29 +147,284 @@ CREATE TABLE IF NOT EXISTS Student_Fees (
     total_fee DECIMAL(10,2) NOT NULL,
     paid_date DATE,
     status ENUM('Paid','Pending') NOT NULL DEFAULT 'Pending',
-    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE RESTRICT ON UPDATE CASCADE
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    FOREIGN KEY (dept_id) REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    KEY idx_fee_updated (updated_at)
+);
+
+-- Academic terms and their date ranges; each term has a Student_Attendance partition.
+-- Managed with `python attendance_archive.py` (add-term, close, archive)
+CREATE TABLE IF NOT EXISTS Academic_Term (
+    term VARCHAR(20) PRIMARY KEY,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    status ENUM('Open','Closed','Archived') NOT NULL DEFAULT 'Open',
+    archive_file VARCHAR(255),
+    archived_rows INT,
+    archived_at TIMESTAMP NULL,
+    UNIQUE KEY unique_term_start (start_date)
 );
 
+INSERT IGNORE INTO Academic_Term (term, start_date, end_date) VALUES
+('2024-25', '2024-07-01', '2025-06-30'),
+('2025-26', '2025-07-01', '2026-06-30'),
+('2026-27', '2026-07-01', '2027-06-30');
+
+-- Partitioned by term (partition bound = day after the term's end_date), so
+-- term-filtered reads only open one partition. MySQL does not allow foreign
+-- keys on partitioned tables: student/subject references are checked by the
+-- app, and every unique key has to include attendance_date.
 CREATE TABLE IF NOT EXISTS Student_Attendance (
-    attendance_id INT PRIMARY KEY AUTO_INCREMENT,
+    attendance_id INT NOT NULL AUTO_INCREMENT,
     student_id INT NOT NULL,
     subject_id INT NOT NULL,
     attendance_date DATE NOT NULL,
     status ENUM('Present','Absent') NOT NULL,
-    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE RESTRICT ON UPDATE CASCADE,
-    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE RESTRICT ON UPDATE CASCADE,
-    UNIQUE KEY unique_student_date (student_id, attendance_date, subject_id)
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    PRIMARY KEY (attendance_id, attendance_date),
+    UNIQUE KEY unique_student_date (student_id, attendance_date, subject_id),
+    KEY idx_attendance_subject (subject_id, attendance_date),
+    KEY idx_attendance_updated (updated_at)
+)
+PARTITION BY RANGE COLUMNS (attendance_date) (
+    PARTITION p_history VALUES LESS THAN ('2024-07-01'),
+    PARTITION p2024_25 VALUES LESS THAN ('2025-07-01'),
+    PARTITION p2025_26 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p2026_27 VALUES LESS THAN ('2027-07-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
 );
 
 CREATE TABLE IF NOT EXISTS Class_Timetable (
     timetable_id INT PRIMARY KEY AUTO_INCREMENT,
-    department VARCHAR(100) NOT NULL,
+    dept_id INT NOT NULL,
     faculty_id INT NOT NULL,
     subject_id INT NOT NULL,
     day_of_week ENUM('Monday','Tuesday','Wednesday','Thursday','Friday','Saturday') NOT NULL,
     start_time TIME NOT NULL,
     end_time TIME NOT NULL,
     location VARCHAR(100),
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     FOREIGN KEY (faculty_id) REFERENCES Faculty_Info(faculty_id) ON DELETE RESTRICT ON UPDATE CASCADE,
-    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE RESTRICT ON UPDATE CASCADE
-);
\ No newline at end of file
+    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    FOREIGN KEY (dept_id) REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+    KEY idx_timetable_updated (updated_at)
+);
+CREATE TABLE IF NOT EXISTS Enrollment (
+    enrollment_id INT PRIMARY KEY AUTO_INCREMENT,
+    student_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    term VARCHAR(20) NOT NULL,
+    enrolled_on DATE NOT NULL,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    UNIQUE KEY unique_enrollment (student_id, term, subject_id),
+    KEY idx_enrollment_subject (subject_id, term, student_id),
+    KEY idx_enrollment_updated (updated_at)
+);
+
+-- Denormalized per-subject headcount, maintained by the enrollment write paths
+CREATE TABLE IF NOT EXISTS Subject_Headcount (
+    subject_id INT NOT NULL,
+    term VARCHAR(20) NOT NULL,
+    headcount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (subject_id, term),
+    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- Append-only per-user activity feed; trimmed by `python activity.py`
+CREATE TABLE IF NOT EXISTS Activity_Log (
+    activity_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    user_role ENUM('Student','Faculty') NOT NULL,
+    ref_id INT NOT NULL,
+    event_type VARCHAR(30) NOT NULL,
+    title VARCHAR(100) NOT NULL,
+    message VARCHAR(255) NOT NULL,
+    icon VARCHAR(30) NOT NULL DEFAULT 'circle',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_activity_owner (user_role, ref_id, activity_id),
+    KEY idx_activity_created (created_at)
+);
+
+-- Nightly attendance shortage snapshots; written by `python attendance.py`
+CREATE TABLE IF NOT EXISTS Attendance_Shortage (
+    snapshot_date DATE NOT NULL,
+    student_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    classes_attended INT NOT NULL,
+    total_classes INT NOT NULL,
+    percentage DECIMAL(5,2) NOT NULL,
+    prev_percentage DECIMAL(5,2),
+    PRIMARY KEY (snapshot_date, student_id, subject_id),
+    KEY idx_shortage_page (snapshot_date, percentage, student_id, subject_id),
+    KEY idx_shortage_student (student_id, subject_id, snapshot_date),
+    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Attendance_Shortage_Run (
+    snapshot_date DATE PRIMARY KEY,
+    threshold DECIMAL(5,2) NOT NULL,
+    pairs_scanned INT NOT NULL,
+    pairs_flagged INT NOT NULL,
+    finished_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Outcome of each group-committed attendance submission (ATTENDANCE_GROUP_COMMIT);
+-- written in the flush transaction, so journal replay can skip committed ones
+CREATE TABLE IF NOT EXISTS Attendance_Submission (
+    submission_id CHAR(32) PRIMARY KEY,
+    faculty_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    attendance_date DATE NOT NULL,
+    student_count INT NOT NULL,
+    status ENUM('Committed','Failed') NOT NULL,
+    error VARCHAR(255),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_submission_created (created_at)
+);
+
+-- Row changes of the tracked tables in statement order, appended by the triggers
+-- below; read by GET /api/admin/changes and trimmed by `python changes.py`
+CREATE TABLE IF NOT EXISTS Change_Log (
+    change_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    table_name VARCHAR(40) NOT NULL,
+    row_id INT NOT NULL,
+    op ENUM('insert','update','delete') NOT NULL,
+    changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    KEY idx_change_time (changed_at),
+    KEY idx_change_deletes (table_name, op, changed_at)
+);
+
+DROP TRIGGER IF EXISTS trg_dept_insert;
+CREATE TRIGGER trg_dept_insert AFTER INSERT ON Departments FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Departments', NEW.dept_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_dept_update;
+CREATE TRIGGER trg_dept_update AFTER UPDATE ON Departments FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Departments', NEW.dept_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_dept_delete;
+CREATE TRIGGER trg_dept_delete AFTER DELETE ON Departments FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Departments', OLD.dept_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_student_insert;
+CREATE TRIGGER trg_student_insert AFTER INSERT ON Student_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Info', NEW.student_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_student_update;
+CREATE TRIGGER trg_student_update AFTER UPDATE ON Student_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Info', NEW.student_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_student_delete;
+CREATE TRIGGER trg_student_delete AFTER DELETE ON Student_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Info', OLD.student_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_faculty_insert;
+CREATE TRIGGER trg_faculty_insert AFTER INSERT ON Faculty_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Faculty_Info', NEW.faculty_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_faculty_update;
+CREATE TRIGGER trg_faculty_update AFTER UPDATE ON Faculty_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Faculty_Info', NEW.faculty_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_faculty_delete;
+CREATE TRIGGER trg_faculty_delete AFTER DELETE ON Faculty_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Faculty_Info', OLD.faculty_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_subject_insert;
+CREATE TRIGGER trg_subject_insert AFTER INSERT ON Subjects FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Subjects', NEW.subject_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_subject_update;
+CREATE TRIGGER trg_subject_update AFTER UPDATE ON Subjects FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Subjects', NEW.subject_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_subject_delete;
+CREATE TRIGGER trg_subject_delete AFTER DELETE ON Subjects FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Subjects', OLD.subject_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_book_insert;
+CREATE TRIGGER trg_book_insert AFTER INSERT ON Library_Book FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Book', NEW.book_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_book_update;
+CREATE TRIGGER trg_book_update AFTER UPDATE ON Library_Book FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Book', NEW.book_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_book_delete;
+CREATE TRIGGER trg_book_delete AFTER DELETE ON Library_Book FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Book', OLD.book_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_library_insert;
+CREATE TRIGGER trg_library_insert AFTER INSERT ON Library_Transaction FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Transaction', NEW.library_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_library_update;
+CREATE TRIGGER trg_library_update AFTER UPDATE ON Library_Transaction FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Transaction', NEW.library_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_library_delete;
+CREATE TRIGGER trg_library_delete AFTER DELETE ON Library_Transaction FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Transaction', OLD.library_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_result_insert;
+CREATE TRIGGER trg_result_insert AFTER INSERT ON Student_Results FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Results', NEW.result_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_result_update;
+CREATE TRIGGER trg_result_update AFTER UPDATE ON Student_Results FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Results', NEW.result_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_result_delete;
+CREATE TRIGGER trg_result_delete AFTER DELETE ON Student_Results FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Results', OLD.result_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_fee_insert;
+CREATE TRIGGER trg_fee_insert AFTER INSERT ON Student_Fees FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Fees', NEW.fee_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_fee_update;
+CREATE TRIGGER trg_fee_update AFTER UPDATE ON Student_Fees FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Fees', NEW.fee_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_fee_delete;
+CREATE TRIGGER trg_fee_delete AFTER DELETE ON Student_Fees FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Fees', OLD.fee_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_attendance_insert;
+CREATE TRIGGER trg_attendance_insert AFTER INSERT ON Student_Attendance FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Attendance', NEW.attendance_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_attendance_update;
+CREATE TRIGGER trg_attendance_update AFTER UPDATE ON Student_Attendance FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Attendance', NEW.attendance_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_attendance_delete;
+CREATE TRIGGER trg_attendance_delete AFTER DELETE ON Student_Attendance FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Attendance', OLD.attendance_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_timetable_insert;
+CREATE TRIGGER trg_timetable_insert AFTER INSERT ON Class_Timetable FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Class_Timetable', NEW.timetable_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_timetable_update;
+CREATE TRIGGER trg_timetable_update AFTER UPDATE ON Class_Timetable FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Class_Timetable', NEW.timetable_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_timetable_delete;
+CREATE TRIGGER trg_timetable_delete AFTER DELETE ON Class_Timetable FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Class_Timetable', OLD.timetable_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_enrollment_insert;
+CREATE TRIGGER trg_enrollment_insert AFTER INSERT ON Enrollment FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Enrollment', NEW.enrollment_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_enrollment_update;
+CREATE TRIGGER trg_enrollment_update AFTER UPDATE ON Enrollment FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Enrollment', NEW.enrollment_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_enrollment_delete;
+CREATE TRIGGER trg_enrollment_delete AFTER DELETE ON Enrollment FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Enrollment', OLD.enrollment_id, 'delete');
@@ -0,0 +1,34 @@
+-- Adds Enrollment + Subject_Headcount to an existing database and backfills them
+-- from the (student, subject) pairs already present in Student_Results.
+-- Usage: mysql -u root -p erp_database < database/migrations/002_enrollment.sql
+-- Set @term to the value of CURRENT_TERM in .env before running.
+
+SET @term = '2025-26';
+
+CREATE TABLE IF NOT EXISTS Enrollment (
+    enrollment_id INT PRIMARY KEY AUTO_INCREMENT,
+    student_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    term VARCHAR(20) NOT NULL,
+    enrolled_on DATE NOT NULL,
+    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    UNIQUE KEY unique_enrollment (student_id, term, subject_id),
+    KEY idx_enrollment_subject (subject_id, term, student_id)
+);
+
+CREATE TABLE IF NOT EXISTS Subject_Headcount (
+    subject_id INT NOT NULL,
+    term VARCHAR(20) NOT NULL,
+    headcount INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (subject_id, term),
+    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+INSERT IGNORE INTO Enrollment (student_id, subject_id, term, enrolled_on)
+SELECT DISTINCT student_id, subject_id, @term, CURDATE()
+FROM Student_Results;
+
+INSERT INTO Subject_Headcount (subject_id, term, headcount)
+SELECT subject_id, term, COUNT(*) FROM Enrollment GROUP BY subject_id, term
+ON DUPLICATE KEY UPDATE headcount = VALUES(headcount);
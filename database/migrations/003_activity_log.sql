@@ -0,0 +1,15 @@
+-- Adds the Activity_Log table used by the recent-activity feeds.
+-- Usage: mysql -u root -p erp_database < database/migrations/003_activity_log.sql
+
+CREATE TABLE IF NOT EXISTS Activity_Log (
+    activity_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    user_role ENUM('Student','Faculty') NOT NULL,
+    ref_id INT NOT NULL,
+    event_type VARCHAR(30) NOT NULL,
+    title VARCHAR(100) NOT NULL,
+    message VARCHAR(255) NOT NULL,
+    icon VARCHAR(30) NOT NULL DEFAULT 'circle',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_activity_owner (user_role, ref_id, activity_id),
+    KEY idx_activity_created (created_at)
+);
@@ -0,0 +1,25 @@
+-- Adds the nightly attendance shortage tables.
+-- Usage: mysql -u root -p erp_database < database/migrations/004_attendance_shortage.sql
+-- Then schedule the job, e.g. cron: 30 1 * * * cd /path/to/app && python attendance.py
+CREATE TABLE IF NOT EXISTS Attendance_Shortage (
+    snapshot_date DATE NOT NULL,
+    student_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    classes_attended INT NOT NULL,
+    total_classes INT NOT NULL,
+    percentage DECIMAL(5,2) NOT NULL,
+    prev_percentage DECIMAL(5,2),
+    PRIMARY KEY (snapshot_date, student_id, subject_id),
+    KEY idx_shortage_page (snapshot_date, percentage, student_id, subject_id),
+    KEY idx_shortage_student (student_id, subject_id, snapshot_date),
+    FOREIGN KEY (student_id) REFERENCES Student_Info(student_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (subject_id) REFERENCES Subjects(subject_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS Attendance_Shortage_Run (
+    snapshot_date DATE PRIMARY KEY,
+    threshold DECIMAL(5,2) NOT NULL,
+    pairs_scanned INT NOT NULL,
+    pairs_flagged INT NOT NULL,
+    finished_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,40 @@
+-- Adds the Library_Book catalog, links existing transactions to it by ISBN and
+-- adds per-loan fines. The free-text book_* columns are kept as a snapshot of
+-- the book at issue time.
+-- Usage: mysql -u root -p erp_database < database/migrations/005_library_catalog.sql
+-- Then schedule the overdue sweep, e.g. cron: 0 1 * * * cd /path/to/app && python library.py
+
+CREATE TABLE IF NOT EXISTS Library_Book (
+    book_id INT PRIMARY KEY AUTO_INCREMENT,
+    isbn VARCHAR(20) NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    author VARCHAR(255),
+    total_copies INT NOT NULL DEFAULT 1,
+    available_copies INT NOT NULL DEFAULT 1,
+    UNIQUE KEY unique_book_isbn (isbn),
+    CHECK (available_copies BETWEEN 0 AND total_copies)
+);
+
+ALTER TABLE Library_Transaction
+    ADD COLUMN book_id INT AFTER student_id,
+    ADD COLUMN fine_amount DECIMAL(8,2) NOT NULL DEFAULT 0.00,
+    ADD KEY idx_library_open (status, due_date);
+
+-- One catalog row per ISBN; assume at least as many copies as are out right now
+INSERT INTO Library_Book (isbn, title, author, total_copies, available_copies)
+SELECT book_isbn, MAX(book_title), MAX(book_author),
+       GREATEST(SUM(return_date IS NULL), 1),
+       GREATEST(SUM(return_date IS NULL), 1) - SUM(return_date IS NULL)
+FROM Library_Transaction
+WHERE book_isbn IS NOT NULL AND book_isbn <> ''
+GROUP BY book_isbn
+ON DUPLICATE KEY UPDATE isbn = isbn;
+
+UPDATE Library_Transaction t
+JOIN Library_Book b ON b.isbn = t.book_isbn
+SET t.book_id = b.book_id
+WHERE t.book_id IS NULL;
+
+ALTER TABLE Library_Transaction
+    ADD CONSTRAINT fk_library_book FOREIGN KEY (book_id)
+        REFERENCES Library_Book(book_id) ON DELETE RESTRICT ON UPDATE CASCADE;
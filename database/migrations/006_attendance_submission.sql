@@ -0,0 +1,15 @@
+-- Adds the Attendance_Submission table used by the group-commit attendance queue.
+-- Usage: mysql -u root -p erp_database < database/migrations/006_attendance_submission.sql
+-- Then set ATTENDANCE_GROUP_COMMIT=true (see .env.example)
+
+CREATE TABLE IF NOT EXISTS Attendance_Submission (
+    submission_id CHAR(32) PRIMARY KEY,
+    faculty_id INT NOT NULL,
+    subject_id INT NOT NULL,
+    attendance_date DATE NOT NULL,
+    student_count INT NOT NULL,
+    status ENUM('Committed','Failed') NOT NULL,
+    error VARCHAR(255),
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_submission_created (created_at)
+);
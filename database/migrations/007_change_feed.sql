@@ -0,0 +1,194 @@
+-- Adds updated_at columns, the Change_Log table and its triggers for delta reads
+-- (?since= on the admin list endpoints) and the change feed (GET /api/admin/changes).
+-- Adding the columns rebuilds each table; run it in a quiet period.
+-- Existing rows get the migration time as updated_at.
+-- Usage: mysql -u root -p erp_database < database/migrations/007_change_feed.sql
+-- Then schedule the trim, e.g. cron: 15 2 * * * cd /path/to/app && python changes.py
+
+ALTER TABLE Departments
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_dept_updated (updated_at);
+
+ALTER TABLE Student_Info
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_student_updated (updated_at);
+
+ALTER TABLE Faculty_Info
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_faculty_updated (updated_at);
+
+ALTER TABLE Subjects
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_subject_updated (updated_at);
+
+ALTER TABLE Library_Book
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_book_updated (updated_at);
+
+ALTER TABLE Library_Transaction
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_library_updated (updated_at);
+
+ALTER TABLE Student_Results
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_result_updated (updated_at);
+
+ALTER TABLE Student_Fees
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_fee_updated (updated_at);
+
+ALTER TABLE Student_Attendance
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_attendance_updated (updated_at);
+
+ALTER TABLE Class_Timetable
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_timetable_updated (updated_at);
+
+ALTER TABLE Enrollment
+    ADD COLUMN updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_enrollment_updated (updated_at);
+
+-- Row changes of the tracked tables in statement order, appended by the triggers
+-- below; read by GET /api/admin/changes and trimmed by `python changes.py`
+CREATE TABLE IF NOT EXISTS Change_Log (
+    change_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    table_name VARCHAR(40) NOT NULL,
+    row_id INT NOT NULL,
+    op ENUM('insert','update','delete') NOT NULL,
+    changed_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    KEY idx_change_time (changed_at),
+    KEY idx_change_deletes (table_name, op, changed_at)
+);
+
+DROP TRIGGER IF EXISTS trg_dept_insert;
+CREATE TRIGGER trg_dept_insert AFTER INSERT ON Departments FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Departments', NEW.dept_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_dept_update;
+CREATE TRIGGER trg_dept_update AFTER UPDATE ON Departments FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Departments', NEW.dept_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_dept_delete;
+CREATE TRIGGER trg_dept_delete AFTER DELETE ON Departments FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Departments', OLD.dept_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_student_insert;
+CREATE TRIGGER trg_student_insert AFTER INSERT ON Student_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Info', NEW.student_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_student_update;
+CREATE TRIGGER trg_student_update AFTER UPDATE ON Student_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Info', NEW.student_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_student_delete;
+CREATE TRIGGER trg_student_delete AFTER DELETE ON Student_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Info', OLD.student_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_faculty_insert;
+CREATE TRIGGER trg_faculty_insert AFTER INSERT ON Faculty_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Faculty_Info', NEW.faculty_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_faculty_update;
+CREATE TRIGGER trg_faculty_update AFTER UPDATE ON Faculty_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Faculty_Info', NEW.faculty_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_faculty_delete;
+CREATE TRIGGER trg_faculty_delete AFTER DELETE ON Faculty_Info FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Faculty_Info', OLD.faculty_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_subject_insert;
+CREATE TRIGGER trg_subject_insert AFTER INSERT ON Subjects FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Subjects', NEW.subject_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_subject_update;
+CREATE TRIGGER trg_subject_update AFTER UPDATE ON Subjects FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Subjects', NEW.subject_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_subject_delete;
+CREATE TRIGGER trg_subject_delete AFTER DELETE ON Subjects FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Subjects', OLD.subject_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_book_insert;
+CREATE TRIGGER trg_book_insert AFTER INSERT ON Library_Book FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Book', NEW.book_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_book_update;
+CREATE TRIGGER trg_book_update AFTER UPDATE ON Library_Book FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Book', NEW.book_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_book_delete;
+CREATE TRIGGER trg_book_delete AFTER DELETE ON Library_Book FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Book', OLD.book_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_library_insert;
+CREATE TRIGGER trg_library_insert AFTER INSERT ON Library_Transaction FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Transaction', NEW.library_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_library_update;
+CREATE TRIGGER trg_library_update AFTER UPDATE ON Library_Transaction FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Transaction', NEW.library_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_library_delete;
+CREATE TRIGGER trg_library_delete AFTER DELETE ON Library_Transaction FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Library_Transaction', OLD.library_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_result_insert;
+CREATE TRIGGER trg_result_insert AFTER INSERT ON Student_Results FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Results', NEW.result_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_result_update;
+CREATE TRIGGER trg_result_update AFTER UPDATE ON Student_Results FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Results', NEW.result_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_result_delete;
+CREATE TRIGGER trg_result_delete AFTER DELETE ON Student_Results FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Results', OLD.result_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_fee_insert;
+CREATE TRIGGER trg_fee_insert AFTER INSERT ON Student_Fees FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Fees', NEW.fee_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_fee_update;
+CREATE TRIGGER trg_fee_update AFTER UPDATE ON Student_Fees FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Fees', NEW.fee_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_fee_delete;
+CREATE TRIGGER trg_fee_delete AFTER DELETE ON Student_Fees FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Fees', OLD.fee_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_attendance_insert;
+CREATE TRIGGER trg_attendance_insert AFTER INSERT ON Student_Attendance FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Attendance', NEW.attendance_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_attendance_update;
+CREATE TRIGGER trg_attendance_update AFTER UPDATE ON Student_Attendance FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Attendance', NEW.attendance_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_attendance_delete;
+CREATE TRIGGER trg_attendance_delete AFTER DELETE ON Student_Attendance FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Student_Attendance', OLD.attendance_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_timetable_insert;
+CREATE TRIGGER trg_timetable_insert AFTER INSERT ON Class_Timetable FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Class_Timetable', NEW.timetable_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_timetable_update;
+CREATE TRIGGER trg_timetable_update AFTER UPDATE ON Class_Timetable FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Class_Timetable', NEW.timetable_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_timetable_delete;
+CREATE TRIGGER trg_timetable_delete AFTER DELETE ON Class_Timetable FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Class_Timetable', OLD.timetable_id, 'delete');
+
+DROP TRIGGER IF EXISTS trg_enrollment_insert;
+CREATE TRIGGER trg_enrollment_insert AFTER INSERT ON Enrollment FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Enrollment', NEW.enrollment_id, 'insert');
+
+DROP TRIGGER IF EXISTS trg_enrollment_update;
+CREATE TRIGGER trg_enrollment_update AFTER UPDATE ON Enrollment FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Enrollment', NEW.enrollment_id, 'update');
+
+DROP TRIGGER IF EXISTS trg_enrollment_delete;
+CREATE TRIGGER trg_enrollment_delete AFTER DELETE ON Enrollment FOR EACH ROW
+    INSERT INTO Change_Log (table_name, row_id, op) VALUES ('Enrollment', OLD.enrollment_id, 'delete');
@@ -0,0 +1,46 @@
+-- Adds Academic_Term and partitions Student_Attendance by term (attendance_date ranges).
+-- Partitioned tables cannot have foreign keys and need attendance_date in every
+-- unique key, so the two foreign keys are dropped (the app checks student and
+-- subject ids) and the primary key becomes (attendance_id, attendance_date).
+-- The foreign key names below are MySQL's defaults; check SHOW CREATE TABLE
+-- Student_Attendance first if the table was created differently.
+-- Partitioning copies the table; run it in a quiet period.
+-- Attendance before the first term stays in p_history.
+-- Usage: mysql -u root -p erp_database < database/migrations/008_attendance_partitions.sql
+-- Then add each new term before it starts, e.g.
+--   python attendance_archive.py add-term 2027-28 2027-07-01 2028-06-30
+
+CREATE TABLE IF NOT EXISTS Academic_Term (
+    term VARCHAR(20) PRIMARY KEY,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    status ENUM('Open','Closed','Archived') NOT NULL DEFAULT 'Open',
+    archive_file VARCHAR(255),
+    archived_rows INT,
+    archived_at TIMESTAMP NULL,
+    UNIQUE KEY unique_term_start (start_date)
+);
+
+INSERT IGNORE INTO Academic_Term (term, start_date, end_date) VALUES
+('2024-25', '2024-07-01', '2025-06-30'),
+('2025-26', '2025-07-01', '2026-06-30'),
+('2026-27', '2026-07-01', '2027-06-30');
+
+ALTER TABLE Student_Attendance
+    DROP FOREIGN KEY Student_Attendance_ibfk_1,
+    DROP FOREIGN KEY Student_Attendance_ibfk_2;
+
+ALTER TABLE Student_Attendance
+    DROP INDEX subject_id,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (attendance_id, attendance_date),
+    ADD KEY idx_attendance_subject (subject_id, attendance_date);
+
+ALTER TABLE Student_Attendance
+PARTITION BY RANGE COLUMNS (attendance_date) (
+    PARTITION p_history VALUES LESS THAN ('2024-07-01'),
+    PARTITION p2024_25 VALUES LESS THAN ('2025-07-01'),
+    PARTITION p2025_26 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p2026_27 VALUES LESS THAN ('2027-07-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
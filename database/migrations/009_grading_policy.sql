@@ -0,0 +1,16 @@
+-- Adds the Grading_Policy table for configurable grading (absolute cut-offs,
+-- curves and percentile-based relative grading, see grading.py).
+-- Grades are now taken from the percentage of the 200-mark total, and C+ and D
+-- are awarded; existing results keep their stored grade until re-graded.
+-- Usage: mysql -u root -p erp_database < database/migrations/009_grading_policy.sql
+-- Then re-grade existing results: python grading.py (or POST /api/admin/grading/recompute)
+
+CREATE TABLE IF NOT EXISTS Grading_Policy (
+    subject_id INT NOT NULL DEFAULT 0,
+    term VARCHAR(20) NOT NULL DEFAULT '',
+    kind ENUM('absolute','curve','relative') NOT NULL,
+    params JSON NOT NULL,
+    updated_by INT,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    PRIMARY KEY (subject_id, term)
+);
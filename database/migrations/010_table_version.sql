@@ -0,0 +1,10 @@
+-- Adds the Table_Version table: per-table query cache versions shared by all
+-- gunicorn workers, so a write on one worker expires cached reads on the others
+-- at once instead of after QUERY_CACHE_TTL (see querycache.py).
+-- Apply before deploying the app.py that reads it.
+-- Usage: mysql -u root -p erp_database < database/migrations/010_table_version.sql
+
+CREATE TABLE IF NOT EXISTS Table_Version (
+    table_name VARCHAR(40) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
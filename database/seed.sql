@@ -1,21 +1,28 @@
+-- Departments Table
+INSERT INTO Departments (dept_id, dept_name)
+VALUES
+('1', 'Arts'),        -- dept_id 1
+('2','Finance'),     -- dept_id 2
+('3','Technology');  -- dept_id 3
+
 -- Student_Info: 
 
-INSERT INTO Student_Info (student_id, first_name, last_name, date_of_birth, email, phone_number, enrollment_date, gender)
+INSERT INTO Student_Info (student_id, first_name, last_name, date_of_birth, email, phone_number, enrollment_date, gender, dept_id)
 VALUES
-('1','Aarsee', 'Vadya', '2004-09-24', 'rcmiawmiaw@foxwin.edu', '555-1001', '2023-09-01', 'Female'),
-('2', 'Vedika', 'Agarwal', '2005-03-20', 'vediyay@foxwin.edu', '555-1002', '2023-09-01', 'Female'),
-('3', 'Awantika', 'Swati', '2005-06-06', 'avpingu@foxwin.edu', '555-1003', '2023-09-01', 'Female'),
-('4', 'Naina', 'Barnawal', '2005-11-19', 'nainunu@foxwin.edu', '555-1004', '2023-09-01', 'Female'),
-('5', 'Aditi', 'Kumari', '2003-07-10', 'aditiiyippee@foxwin.edu', '555-1005', '2023-09-01', 'Female');
+('1','Aarsee', 'Vadya', '2004-09-24', 'rcmiawmiaw@foxwin.edu', '555-1001', '2023-09-01', 'Female', 3),
+('2', 'Vedika', 'Agarwal', '2005-03-20', 'vediyay@foxwin.edu', '555-1002', '2023-09-01', 'Female', 1),
+('3', 'Awantika', 'Swati', '2005-06-06', 'avpingu@foxwin.edu', '555-1003', '2023-09-01', 'Female', 2),
+('4', 'Naina', 'Barnawal', '2005-11-19', 'nainunu@foxwin.edu', '555-1004', '2023-09-01', 'Female', 3),
+('5', 'Aditi', 'Kumari', '2003-07-10', 'aditiiyippee@foxwin.edu', '555-1005', '2023-09-01', 'Female', 1);
 
 -- Faculty_Info: 
-INSERT INTO Faculty_Info (faculty_id, faculty_code, first_name, last_name, gender, department, email, phone_number, hire_date)
+INSERT INTO Faculty_Info (faculty_id, faculty_code, first_name, last_name, gender, dept_id, email, phone_number, hire_date)
 VALUES
-('1', 'FCS001', 'Dr. Emily', 'Usher', 'Female', 'Technology', 'emily.d@foxwin.edu', '555-2010', '2010-08-15'),
-('2', 'FEE002', 'Mr. Frank', 'Miller', 'Male', 'Technology', 'frank.m@foxwin.edu', '555-2011', '2018-01-20'),
-('3', 'FME003', 'Prof. Grace', 'Lee', 'Female', 'Finance', 'grace.l@foxwin.edu', '555-2012', '2015-05-10'),
-('4', 'FCS004', 'Dr. Henry', 'Scott', 'Male', 'Arts', 'henry.s@foxwin.edu', '555-2013', '2020-03-01'),
-('5', 'FCS005', 'Dr. Lewis', 'Brown', 'Male', 'Arts', 'lewis.b@foxwin.edu', '555-2014', '2013-08-31');
+('1', 'FCS001', 'Dr. Emily', 'Usher', 'Female', 3, 'emily.d@foxwin.edu', '555-2010', '2010-08-15'),
+('2', 'FEE002', 'Mr. Frank', 'Miller', 'Male', 3, 'frank.m@foxwin.edu', '555-2011', '2018-01-20'),
+('3', 'FME003', 'Prof. Grace', 'Lee', 'Female', 2, 'grace.l@foxwin.edu', '555-2012', '2015-05-10'),
+('4', 'FCS004', 'Dr. Henry', 'Scott', 'Male', 1, 'henry.s@foxwin.edu', '555-2013', '2020-03-01'),
+('5', 'FCS005', 'Dr. Lewis', 'Brown', 'Male', 1, 'lewis.b@foxwin.edu', '555-2014', '2013-08-31');
 
 
 -- User_Credentials: Students 
@@ -35,13 +42,6 @@ VALUES
 ('gracel', 'hashed_pass_f3', 'Faculty', NULL, 3),
 ('henrys', 'hashed_pass_f4', 'Faculty', NULL, 4);
 
--- Departments Table
-INSERT INTO Departments (dept_id, dept_name)
-VALUES
-('1', 'Arts'),        -- dept_id 1
-('2','Finance'),     -- dept_id 2
-('3','Technology');  -- dept_id 3
-
 -- Subjects Table 
 INSERT INTO Subjects (subject_code, subject_name, credits, dept_id)
 VALUES
@@ -52,21 +52,33 @@ VALUES
 ('TEC302', 'Electronics', 3.5, 3);
 
 
+-- Library_Book: available = total minus copies still out below
+INSERT INTO Library_Book (book_id, isbn, title, author, total_copies, available_copies)
+VALUES
+(1, '978-1234567890', 'SQL Database Design', 'J. Smith', 3, 2),
+(2, '978-0987654321', 'Learning Python', 'M. Lutz', 2, 2),
+(3, '978-1122334455', 'Data Structures', 'A. Tanenbaum', 2, 1),
+(4, '978-6677889900', 'Operating Systems', 'W. Stallings', 2, 1),
+(5, '978-5544332211', 'Computer Networks', 'A. S. Tanenbaum', 1, 1),
+(6, '978-9988776655', 'Database Systems', 'R. Elmasri', 3, 2),
+(7, '978-4433221100', 'Artificial Intelligence', 'S. Russell', 2, 1),
+(8, '978-2211003344', 'Machine Learning', 'T. Mitchell', 1, 1);
+
 -- Library_Transaction: 
-INSERT INTO Library_Transaction (student_id, book_title, book_author, book_isbn, issue_date, due_date, return_date, status)
+INSERT INTO Library_Transaction (student_id, book_id, book_title, book_author, book_isbn, issue_date, due_date, return_date, status)
 VALUES
-(1, 'SQL Database Design', 'J. Smith', '978-1234567890', '2025-10-25', '2025-11-25', NULL, 'Issued'),
-(2, 'SQL Database Design', 'J. Smith', '978-1234567890', '2025-10-25', '2025-11-25', '2025-11-22', 'Returned'),
-(2, 'Learning Python', 'M. Lutz', '978-0987654321', '2025-09-15', '2025-10-15', '2025-10-10', 'Returned'),
-(4, 'Data Structures', 'A. Tanenbaum', '978-1122334455', '2025-11-01', '2025-12-01', NULL, 'Issued'),
-(5, 'Operating Systems', 'W. Stallings', '978-6677889900', '2025-10-20', '2025-11-20', NULL, 'Overdue'),
-(3, 'Computer Networks', 'A. S. Tanenbaum', '978-5544332211', '2025-09-10', '2025-10-10', '2025-10-05', 'Returned'),
-(1, 'Database Systems', 'R. Elmasri', '978-9988776655', '2025-11-05', '2025-12-05', NULL, 'Issued'),
-(4, 'Artificial Intelligence', 'S. Russell', '978-4433221100', '2025-10-15', '2025-11-15', NULL, 'Issued'),
-(5, 'Machine Learning', 'T. Mitchell', '978-2211003344', '2025-09-20', '2025-10-20', '2025-10-18', 'Returned');
+(1, 1, 'SQL Database Design', 'J. Smith', '978-1234567890', '2025-10-25', '2025-11-25', NULL, 'Issued'),
+(2, 1, 'SQL Database Design', 'J. Smith', '978-1234567890', '2025-10-25', '2025-11-25', '2025-11-22', 'Returned'),
+(2, 2, 'Learning Python', 'M. Lutz', '978-0987654321', '2025-09-15', '2025-10-15', '2025-10-10', 'Returned'),
+(4, 3, 'Data Structures', 'A. Tanenbaum', '978-1122334455', '2025-11-01', '2025-12-01', NULL, 'Issued'),
+(5, 4, 'Operating Systems', 'W. Stallings', '978-6677889900', '2025-10-20', '2025-11-20', NULL, 'Overdue'),
+(3, 5, 'Computer Networks', 'A. S. Tanenbaum', '978-5544332211', '2025-09-10', '2025-10-10', '2025-10-05', 'Returned'),
+(1, 6, 'Database Systems', 'R. Elmasri', '978-9988776655', '2025-11-05', '2025-12-05', NULL, 'Issued'),
+(4, 7, 'Artificial Intelligence', 'S. Russell', '978-4433221100', '2025-10-15', '2025-11-15', NULL, 'Issued'),
+(5, 8, 'Machine Learning', 'T. Mitchell', '978-2211003344', '2025-09-20', '2025-10-20', '2025-10-18', 'Returned');
 
 -- Student_Results 
-INSERT INTO Student_Results (result_id, student_id, subject_id, department, exam_date, subject_name, theory_marks, practical_marks, credits, grade, status_exam)
+INSERT INTO Student_Results (result_id, student_id, subject_id, dept_id, exam_date, subject_name, theory_marks, practical_marks, credits, grade, status_exam)
 VALUES
 -- Aarsee Vadya (1): Animation (1, Arts) & Computer Science (4, Tech)
 (1, 1, 1, 1, '2025-12-10', 'Animation', 78, 92, 3.5, 'A', 'PASS'),
@@ -89,22 +101,22 @@ VALUES
 (10, 5, 2, 1, '2025-12-19', 'Architecture', 90, 90, 4.0, 'A+', 'PASS');
 
 -- Student_Fees 
-INSERT INTO Student_Fees (student_id, department, tuition_fee, library_fee, lab_fee, exam_fee, hostel_fee, other_charges, total_fee, paid_date, status)
+INSERT INTO Student_Fees (student_id, dept_id, tuition_fee, library_fee, lab_fee, exam_fee, hostel_fee, other_charges, total_fee, paid_date, status)
 VALUES
 -- Aarsee Vadya (ID 1) - Technology: Fully Paid
-(1, 'Technology', 60000.00, 2000.00, 3000.00, 500.00, 0.00, 500.00, 66000.00, '2024-08-15', 'Paid'),
+(1, 3, 60000.00, 2000.00, 3000.00, 500.00, 0.00, 500.00, 66000.00, '2024-08-15', 'Paid'),
 
 -- Vedika Agarwal (ID 2) - Arts: Pending
-(2, 'Arts', 55000.00, 1500.00, 1000.00, 1000.00, 10000.00, 1000.00, 69500.00, NULL, 'Pending'),
+(2, 1, 55000.00, 1500.00, 1000.00, 1000.00, 10000.00, 1000.00, 69500.00, NULL, 'Pending'),
 
 -- Awantika Swati (ID 3) - Finance: Fully Paid
-(3, 'Finance', 58000.00, 1000.00, 0.00, 500.00, 0.00, 3500.00, 63000.00, '2024-09-01', 'Paid'),
+(3, 2, 58000.00, 1000.00, 0.00, 500.00, 0.00, 3500.00, 63000.00, '2024-09-01', 'Paid'),
 
 -- Naina Barnawal (ID 4) - Technology: Pending
-(4, 'Technology', 60000.00, 2000.00, 3000.00, 1000.00, 10000.00, 0.00, 76000.00, NULL, 'Pending'),
+(4, 3, 60000.00, 2000.00, 3000.00, 1000.00, 10000.00, 0.00, 76000.00, NULL, 'Pending'),
 
 -- Aditi Kumari (ID 5) - Arts: Fully Paid
-(5, 'Arts', 55000.00, 1500.00, 1000.00, 500.00, 0.00, 1000.00, 59000.00, '2024-08-25', 'Paid');
+(5, 1, 55000.00, 1500.00, 1000.00, 500.00, 0.00, 1000.00, 59000.00, '2024-08-25', 'Paid');
 
 
 -- Student_Attendance (Aarsee, Vedika, Awantika, Naina, Aditi):
@@ -147,7 +159,7 @@ VALUES
 (5, 2, '2025-09-04', 'Present');
 
 -- Class Timetable: Computer Science, Animation, Electronics, Architecture, Corporate Finance
-INSERT INTO Class_Timetable (department, subject_id, faculty_id, day_of_week, start_time, end_time, location)
+INSERT INTO Class_Timetable (dept_id, subject_id, faculty_id, day_of_week, start_time, end_time, location)
 VALUES
 (3, 4, 1, 'Monday', '09:00:00', '10:30:00', 'Tech Room T101'),
 (3, 4, 1, 'Wednesday', '13:30:00', '15:00:00', 'Tech Room T101'),
@@ -159,3 +171,20 @@ VALUES
 (1, 2, 5, 'Friday', '10:00:00', '11:30:00', 'Arts Workshop W1'),
 (2, 3, 3, 'Wednesday', '09:30:00', '11:00:00', 'Finance Lecture F12'),
 (2, 3, 3, 'Friday', '14:30:00', '16:00:00', 'Finance Lecture F12');
+
+-- Enrollment: one row per (student, subject) pair in Student_Results, current term
+INSERT INTO Enrollment (student_id, subject_id, term, enrolled_on)
+VALUES
+(1, 1, '2025-26', '2025-08-01'),
+(1, 4, '2025-26', '2025-08-01'),
+(2, 2, '2025-26', '2025-08-01'),
+(2, 4, '2025-26', '2025-08-01'),
+(3, 3, '2025-26', '2025-08-01'),
+(3, 5, '2025-26', '2025-08-01'),
+(4, 4, '2025-26', '2025-08-01'),
+(4, 5, '2025-26', '2025-08-01'),
+(5, 3, '2025-26', '2025-08-01'),
+(5, 2, '2025-26', '2025-08-01');
+
+INSERT INTO Subject_Headcount (subject_id, term, headcount)
+SELECT subject_id, term, COUNT(*) FROM Enrollment GROUP BY subject_id, term;
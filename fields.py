@@ -0,0 +1,198 @@
+"""
+Sparse fieldsets for ERP Cell read APIs.
+A read endpoint accepts `?fields=a,b,c` to return only some columns. Each
+endpoint has a whitelist mapping public field names to SQL expressions; the
+requested names are checked against it before any database work, and only
+the matching expressions are put in the SELECT list, so unrequested columns
+are never read from MySQL or serialised by Flask.
+
+Whitelist order is the default column order when `fields` is absent.
+"""
+
+import re
+from decimal import Decimal
+
+# Longest accepted `fields` value; anything longer is rejected without parsing
+MAX_FIELDS_LENGTH = 1000
+
+STUDENT_PROFILE_FIELDS = {
+    'student_id': 's.student_id',
+    'first_name': 's.first_name',
+    'last_name': 's.last_name',
+    'date_of_birth': 's.date_of_birth',
+    'email': 's.email',
+    'phone_number': 's.phone_number',
+    'enrollment_date': 's.enrollment_date',
+    'gender': 's.gender',
+    'dept_id': 's.dept_id',
+    'department_name': 'd.dept_name',
+}
+
+FACULTY_PROFILE_FIELDS = {
+    'faculty_id': 'f.faculty_id',
+    'faculty_code': 'f.faculty_code',
+    'first_name': 'f.first_name',
+    'last_name': 'f.last_name',
+    'gender': 'f.gender',
+    'dept_id': 'f.dept_id',
+    'email': 'f.email',
+    'phone_number': 'f.phone_number',
+    'hire_date': 'f.hire_date',
+    'department_name': 'd.dept_name',
+}
+
+RESULT_FIELDS = {
+    'result_id': 'sr.result_id',
+    'subject_name': 'sr.subject_name',
+    'exam_date': 'sr.exam_date',
+    'theory_marks': 'sr.theory_marks',
+    'practical_marks': 'sr.practical_marks',
+    'credits': 'sr.credits',
+    'grade': 'sr.grade',
+    'status_exam': 'sr.status_exam',
+    'dept_id': 'sr.dept_id',
+    'department': 'd.dept_name',
+}
+
+FEE_FIELDS = {
+    'fee_id': 'fee_id',
+    'student_id': 'student_id',
+    'dept_id': 'dept_id',
+    'tuition_fee': 'tuition_fee',
+    'library_fee': 'library_fee',
+    'lab_fee': 'lab_fee',
+    'exam_fee': 'exam_fee',
+    'hostel_fee': 'hostel_fee',
+    'other_charges': 'other_charges',
+    'total_fee': 'total_fee',
+    'paid_date': 'paid_date',
+    'status': 'status',
+}
+
+# Status and fine are derived at read time so loans are not stale between sweeps;
+# execute with named parameters including fine_per_day (library.FINE_PER_DAY)
+LIBRARY_FIELDS = {
+    'library_id': 'library_id',
+    'book_id': 'book_id',
+    'book_title': 'book_title',
+    'book_author': 'book_author',
+    'issue_date': 'issue_date',
+    'due_date': 'due_date',
+    'return_date': 'return_date',
+    'status': "CASE WHEN return_date IS NULL AND due_date < CURDATE() THEN 'Overdue' ELSE status END",
+    'fine_amount': """CASE WHEN return_date IS NULL AND due_date < CURDATE()
+                           THEN DATEDIFF(CURDATE(), due_date) * %(fine_per_day)s
+                           ELSE fine_amount END""",
+}
+
+ADMIN_STUDENT_FIELDS = {
+    'student_id': 's.student_id',
+    'first_name': 's.first_name',
+    'last_name': 's.last_name',
+    'email': 's.email',
+    'phone_number': 's.phone_number',
+    'enrollment_date': 's.enrollment_date',
+    'date_of_birth': 's.date_of_birth',
+    'gender': 's.gender',
+    'dept_id': 's.dept_id',
+    'department': 'd.dept_name',
+    'username': 'u.username',
+}
+
+ADMIN_FACULTY_FIELDS = {
+    'faculty_id': 'f.faculty_id',
+    'faculty_code': 'f.faculty_code',
+    'first_name': 'f.first_name',
+    'last_name': 'f.last_name',
+    'gender': 'f.gender',
+    'dept_id': 'f.dept_id',
+    'department': 'd.dept_name',
+    'email': 'f.email',
+    'phone_number': 'f.phone_number',
+    'hire_date': 'f.hire_date',
+    'username': 'u.username',
+}
+
+DEPARTMENT_FIELDS = {
+    'dept_id': 'd.dept_id',
+    'dept_name': 'd.dept_name',
+    'student_count': 'COALESCE(sc.student_count, 0)',
+    'faculty_count': 'COALESCE(fc.faculty_count, 0)',
+}
+
+SUBJECT_FIELDS = {
+    'subject_id': 's.subject_id',
+    'subject_code': 's.subject_code',
+    'subject_name': 's.subject_name',
+    'credits': 's.credits',
+    'dept_id': 's.dept_id',
+    'dept_name': 'd.dept_name',
+}
+
+ADMIN_FEE_FIELDS = {
+    'fee_id': 'f.fee_id',
+    'student_id': 'f.student_id',
+    'dept_id': 'f.dept_id',
+    'department': 'd.dept_name',
+    'tuition_fee': 'f.tuition_fee',
+    'library_fee': 'f.library_fee',
+    'lab_fee': 'f.lab_fee',
+    'exam_fee': 'f.exam_fee',
+    'hostel_fee': 'f.hostel_fee',
+    'other_charges': 'f.other_charges',
+    'total_fee': 'f.total_fee',
+    'status': 'f.status',
+    'student_name': "CONCAT(s.first_name, ' ', s.last_name)",
+}
+
+FACULTY_CLASS_FIELDS = {
+    'subject_id': 's.subject_id',
+    'subject_code': 's.subject_code',
+    'subject_name': 's.subject_name',
+    'credits': 's.credits',
+    'dept_name': 'd.dept_name',
+    'student_count': 'COALESCE(h.headcount, 0)',
+}
+
+
+def select_list(columns, requested):
+    """
+    Build the SELECT column list for a `fields` parameter.
+
+    Args:
+        columns (dict): Endpoint whitelist, public name -> SQL expression
+        requested (str): Raw comma-separated `fields` value, or None for all fields
+
+    Returns:
+        tuple: (SQL column list, None) or (None, error message)
+    """
+    if not requested:
+        names = list(columns)
+    else:
+        if len(requested) > MAX_FIELDS_LENGTH:
+            return None, "fields is too long"
+        names = list(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+        if not names:
+            return None, "fields must name at least one field"
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            return None, f"Unknown field(s): {', '.join(unknown)}. Allowed: {', '.join(columns)}"
+    return ', '.join(f"{columns[name]} AS {name}" for name in names), None
+
+
+def references(select, alias):
+    """True if a column list built by select_list() reads from a table alias (to skip unused joins)."""
+    return re.search(rf"\b{alias}\.", select) is not None
+
+
+def to_json_types(rows):
+    """Convert Decimal, date and bytes values in dict rows to JSON-friendly types, in place."""
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, Decimal):
+                row[key] = float(value)
+            elif isinstance(value, (bytes, bytearray)):
+                row[key] = value.decode('utf-8', errors='ignore')
+            elif hasattr(value, 'isoformat'):
+                row[key] = value.isoformat()
+    return rows
@@ -0,0 +1,329 @@
+"""
+Grading policies for ERP Cell system.
+Grades are derived from the total mark (theory + practical, out of MAX_TOTAL)
+as a percentage, under a policy chosen per subject and term:
+
+    - absolute: fixed cut-offs, e.g. A+ >= 90%, ..., D >= 40%, else F
+    - curve:    the cohort's percentages are shifted (and optionally scaled) so the
+                cohort mean becomes target_mean, then graded on cut-offs; with
+                no_lower (default) nobody scores below their raw percentage
+    - relative: grades by rank in the cohort, e.g. top 10% A+, next 15% A, ...
+                (shares add up to 100); anyone under pass_mark percent fails
+                regardless of rank
+
+A cohort is one subject in one term (the term comes from Enrollment, like the
+GPA engine). Policies live in Grading_Policy keyed by (subject_id, term), where
+subject_id 0 and term '' mean "any". The most specific one applies:
+(subject, term), then (subject, any term), then (any subject, term), then the
+default (0, ''), and DEFAULT_POLICY if there is none.
+
+recompute() re-grades every result in a scope (one subject, one term, or
+everything) as one vectorized NumPy batch. Only the rows whose grade or
+PASS/FAIL changed are written back, in chunks of UPDATE_CHUNK rows per
+UPDATE ... JOIN statement. save_marks calls it for its subject inside its own
+transaction, so curve and relative grades of the whole class follow each new mark.
+
+Curve and relative grades depend on the whole cohort, so two concurrent
+re-grades of one subject must not each grade their own snapshot. recompute()
+first locks the scope's Subjects rows (lock_subjects(), in primary-key order,
+which save_marks also takes before writing marks) and reads the cohort with a
+locking read, so it always grades the latest committed marks.
+"""
+
+import json
+
+import numpy as np
+
+from gpa import GRADE_POINTS, _group_rank
+
+# theory_marks + practical_marks are each out of 100
+MAX_TOTAL = 200
+
+# Best first; F is last and is the only failing grade
+GRADES = tuple(GRADE_POINTS)
+PASSING_GRADES = GRADES[:-1]
+
+DEFAULT_CUTOFFS = {'A+': 90, 'A': 80, 'B+': 70, 'B': 60, 'C+': 55, 'C': 50, 'D': 40}
+
+DEFAULT_POLICY = {'kind': 'absolute', 'cutoffs': DEFAULT_CUTOFFS}
+
+POLICY_KINDS = ('absolute', 'curve', 'relative')
+
+# Changed rows written per UPDATE statement
+UPDATE_CHUNK = 1000
+
+RESULT_QUERY = """
+    SELECT sr.result_id, sr.subject_id, COALESCE(e.term, %s), sr.theory_marks, sr.practical_marks,
+           sr.grade, sr.status_exam
+    FROM Student_Results sr
+    LEFT JOIN (SELECT student_id, subject_id, MAX(term) AS term
+               FROM Enrollment {enrollment_filter} GROUP BY student_id, subject_id) e
+      ON e.student_id = sr.student_id AND e.subject_id = sr.subject_id
+"""
+
+# Appended after any WHERE: a locking read sees the latest committed rows, not the snapshot
+RESULT_LOCK = ' FOR UPDATE OF sr'
+
+
+class PolicyError(ValueError):
+    """A grading policy that cannot be applied."""
+
+
+# --- Policies -------------------------------------------------------------------
+
+def _percent(value, name):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise PolicyError(f"{name} must be a number")
+    if not 0 <= value <= 100:
+        raise PolicyError(f"{name} must be between 0 and 100")
+    return value
+
+
+def _grade_table(table, name):
+    """Validate {grade: percent} for passing grades; returned in GRADES order."""
+    if not isinstance(table, dict) or not table:
+        raise PolicyError(f"{name} must map grades to percentages")
+    unknown = [grade for grade in table if grade not in PASSING_GRADES]
+    if unknown:
+        raise PolicyError(f"Unknown grade(s) in {name}: {', '.join(unknown)}. "
+                          f"Allowed: {', '.join(PASSING_GRADES)}")
+    return {grade: _percent(table[grade], f"{name}[{grade}]") for grade in PASSING_GRADES if grade in table}
+
+
+def validate_policy(data):
+    """
+    Check and normalise a policy from a request body.
+
+    Args:
+        data (dict): {'kind': ..., plus the kind's parameters}
+
+    Returns:
+        dict: Normalised policy (kind and parameters only)
+
+    Raises:
+        PolicyError: Unknown kind or bad parameters
+    """
+    kind = data.get('kind')
+    if kind not in POLICY_KINDS:
+        raise PolicyError(f"kind must be one of: {', '.join(POLICY_KINDS)}")
+
+    if kind == 'relative':
+        shares = _grade_table(data.get('shares'), 'shares')
+        if abs(sum(shares.values()) - 100) > 1e-6:
+            raise PolicyError("shares must add up to 100")
+        return {'kind': kind, 'shares': shares, 'pass_mark': _percent(data.get('pass_mark', 40), 'pass_mark')}
+
+    cutoffs = _grade_table(data.get('cutoffs', DEFAULT_CUTOFFS), 'cutoffs')
+    values = list(cutoffs.values())
+    if any(better <= worse for better, worse in zip(values, values[1:])):
+        raise PolicyError("cutoffs must decrease from the best grade to the worst")
+    policy = {'kind': kind, 'cutoffs': cutoffs}
+    if kind == 'curve':
+        policy['target_mean'] = _percent(data.get('target_mean'), 'target_mean')
+        target_std = data.get('target_std')
+        policy['target_std'] = None if target_std is None else _percent(target_std, 'target_std')
+        policy['no_lower'] = bool(data.get('no_lower', True))
+    return policy
+
+
+def load_policies(cursor):
+    """All stored policies as {(subject_id, term): policy}."""
+    cursor.execute("SELECT subject_id, term, kind, params FROM Grading_Policy")
+    policies = {}
+    for subject_id, term, kind, params in cursor.fetchall():
+        params = json.loads(params) if isinstance(params, (str, bytes)) else params
+        policies[(subject_id, term)] = {'kind': kind, **params}
+    return policies
+
+
+def resolve(policies, subject_id, term):
+    """The policy that applies to one subject in one term."""
+    for key in ((subject_id, term), (subject_id, ''), (0, term), (0, '')):
+        if key in policies:
+            return policies[key]
+    return DEFAULT_POLICY
+
+
+def save_policy(cursor, subject_id, term, policy, updated_by=None):
+    """Insert or replace the policy for a scope (subject_id 0 / term '' = any)."""
+    params = {key: value for key, value in policy.items() if key != 'kind'}
+    cursor.execute("""
+        INSERT INTO Grading_Policy (subject_id, term, kind, params, updated_by)
+        VALUES (%s, %s, %s, %s, %s) AS new
+        ON DUPLICATE KEY UPDATE kind = new.kind, params = new.params, updated_by = new.updated_by
+    """, (subject_id, term, policy['kind'], json.dumps(params), updated_by))
+
+
+# --- Batch grading --------------------------------------------------------------
+
+def assign_grades(percent, group, group_policies):
+    """
+    Grade every row in one vectorized pass.
+
+    Args:
+        percent (ndarray): Total mark as a percentage of MAX_TOTAL, per row
+        group (ndarray): Cohort index per row (0..len(group_policies) - 1)
+        group_policies (list): Policy of each cohort
+
+    Returns:
+        ndarray: Index into GRADES per row
+    """
+    n_groups, n_passing = len(group_policies), len(PASSING_GRADES)
+    kind = np.array([POLICY_KINDS.index(policy['kind']) for policy in group_policies], dtype=np.int64)
+
+    # Per-cohort parameter tables; grades a policy leaves out can never be reached
+    cutoffs = np.full((n_groups, n_passing), np.inf)
+    shares = np.zeros((n_groups, n_passing))
+    pass_mark = np.zeros(n_groups)
+    target_mean, target_std = np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+    no_lower = np.zeros(n_groups, dtype=bool)
+    for i, policy in enumerate(group_policies):
+        for j, grade in enumerate(PASSING_GRADES):
+            if grade in policy.get('cutoffs', {}):
+                cutoffs[i, j] = policy['cutoffs'][grade]
+            shares[i, j] = policy.get('shares', {}).get(grade, 0)
+        if policy['kind'] == 'curve':
+            target_mean[i] = policy['target_mean']
+            target_std[i] = np.nan if policy.get('target_std') is None else policy['target_std']
+            no_lower[i] = policy.get('no_lower', True)
+        elif policy['kind'] == 'relative':
+            pass_mark[i] = policy['pass_mark']
+
+    row_kind = kind[group]
+    score = percent.copy()
+
+    # Curve: move each cohort's mean (and spread, if a target std is set) to the target
+    curved = row_kind == POLICY_KINDS.index('curve')
+    if curved.any():
+        count = np.maximum(np.bincount(group, minlength=n_groups), 1)
+        mean = np.bincount(group, weights=percent, minlength=n_groups) / count
+        std = np.sqrt(np.maximum(np.bincount(group, weights=percent * percent, minlength=n_groups) / count
+                                 - mean * mean, 0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scale = np.where(np.isnan(target_std) | (std == 0), 1.0, target_std / std)
+        adjusted = target_mean[group] + (percent - mean[group]) * scale[group]
+        adjusted = np.where(no_lower[group], np.maximum(adjusted, percent), adjusted)
+        score = np.where(curved, np.clip(adjusted, 0, 100), score)
+
+    # Absolute and curve: the first (best) cut-off reached, F if none
+    met = score[:, None] >= cutoffs[group]
+    grade = np.where(met.any(axis=1), met.argmax(axis=1), len(GRADES) - 1)
+
+    # Relative: the share of the cohort strictly ahead of a row picks its band. Grades
+    # without a share have an empty band (equal cumulative bounds) and are skipped.
+    # Shares add up to 100, so only rounding can push a row past the last band.
+    relative = row_kind == POLICY_KINDS.index('relative')
+    if relative.any():
+        rows_group = group[relative]
+        rank, size = _group_rank(rows_group, percent[relative])
+        ahead = (rank - 1) * 100 / size
+        band = (ahead[:, None] >= np.cumsum(shares, axis=1)[rows_group]).sum(axis=1)
+        last_listed = n_passing - 1 - (shares[:, ::-1] > 0).argmax(axis=1)
+        band = np.minimum(band, last_listed[rows_group])
+        grade[relative] = np.where(percent[relative] < pass_mark[rows_group], len(GRADES) - 1, band)
+    return grade
+
+
+def lock_subjects(cursor, subject_id=None):
+    """Lock one subject's row, or every Subjects row, until the transaction ends (primary-key order)."""
+    if subject_id is None:
+        cursor.execute("SELECT subject_id FROM Subjects ORDER BY subject_id FOR UPDATE")
+    else:
+        cursor.execute("SELECT subject_id FROM Subjects WHERE subject_id = %s FOR UPDATE", (subject_id,))
+    cursor.fetchall()
+
+
+def recompute(db, default_term, subject_id=None, term=None):
+    """
+    Re-grade all results of a subject, a term, or everything, and write back the changes.
+
+    Runs on the caller's connection and does not commit, so save_marks can
+    include it in its transaction.
+
+    Args:
+        db: MySQL connection
+        default_term (str): Term of results without an enrollment (CURRENT_TERM)
+        subject_id (int): Limit to one subject
+        term (str): Limit to one term
+
+    Returns:
+        dict: rows graded, rows changed and the subject ids whose results changed
+    """
+    cursor = db.cursor()
+    try:
+        lock_subjects(cursor, subject_id)
+        where, enrollment_filter, params = [], '', [default_term]
+        if subject_id is not None:
+            enrollment_filter = 'WHERE subject_id = %s'
+            params.append(subject_id)
+            where.append('sr.subject_id = %s')
+        if term is not None:
+            where.append('COALESCE(e.term, %s) = %s')
+        query = RESULT_QUERY.format(enrollment_filter=enrollment_filter)
+        if where:
+            query += ' WHERE ' + ' AND '.join(where)
+        query += RESULT_LOCK
+        params += [subject_id] if subject_id is not None else []
+        params += [default_term, term] if term is not None else []
+        cursor.execute(query, tuple(params))
+        rows = cursor.fetchall()
+        if not rows:
+            return {'rows': 0, 'changed': 0, 'subjects': []}
+
+        result_id, subject, row_term, theory, practical, old_grade, old_status = zip(*rows)
+        result_id = np.array(result_id, dtype=np.int64)
+        subject = np.array(subject, dtype=np.int64)
+        total = (np.nan_to_num(np.array(theory, dtype=np.float64))
+                 + np.nan_to_num(np.array(practical, dtype=np.float64)))
+        cohorts, group = np.unique(np.array([f"{s}|{t}" for s, t in zip(subject.tolist(), row_term)]),
+                                   return_inverse=True)
+        policies = load_policies(cursor)
+        group_policies = [resolve(policies, int(key.split('|', 1)[0]), key.split('|', 1)[1]) for key in cohorts]
+
+        grade = np.array(GRADES, dtype=object)[assign_grades(total * 100 / MAX_TOTAL, group, group_policies)]
+        status = np.where(grade == 'F', 'FAIL', 'PASS')
+        changed = np.nonzero((grade != np.array(old_grade, dtype=object))
+                             | (status != np.array(old_status, dtype=object)))[0]
+
+        for start in range(0, len(changed), UPDATE_CHUNK):
+            chunk = changed[start:start + UPDATE_CHUNK]
+            values = ' UNION ALL '.join(['SELECT %s AS result_id, %s AS grade, %s AS status_exam'] * len(chunk))
+            cursor.execute(f"""
+                UPDATE Student_Results sr
+                JOIN ({values}) v ON v.result_id = sr.result_id
+                SET sr.grade = v.grade, sr.status_exam = v.status_exam
+            """, [value for i in chunk for value in (int(result_id[i]), grade[i], str(status[i]))])
+    finally:
+        cursor.close()
+    return {'rows': len(rows), 'changed': len(changed),
+            'subjects': sorted(set(subject[changed].tolist()))}
+
+
+if __name__ == '__main__':
+    # Re-grade from the shell, e.g. after migration 009: python grading.py [--subject-id N] [--term 2025-26].
+    # Running app workers pick the new grades up within GPA_CACHE_TTL / RESULT_STATS_TTL.
+    import argparse
+    import os
+
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='Re-grade Student_Results under the grading policies')
+    parser.add_argument('--subject-id', type=int)
+    parser.add_argument('--term')
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', ''),
+        host=os.environ.get('DB_HOST', 'localhost'),
+        database='erp_database'
+    )
+    outcome = recompute(conn, os.environ.get('CURRENT_TERM', '2025-26'), subject_id=args.subject_id, term=args.term)
+    conn.commit()
+    conn.close()
+    print(f"✓ Graded {outcome['rows']} results, {outcome['changed']} changed")
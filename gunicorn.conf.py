@@ -0,0 +1,71 @@
+"""
+gunicorn settings for ERP Cell system.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Sizing: requests are short and mostly wait on MySQL, except login (bcrypt)
+and report generation, which are CPU-bound. Use one worker process per core
+(processes sidestep the GIL for bcrypt) and a few threads per worker for the
+I/O waits. Every open live-update (SSE) stream holds a gthread thread for
+its whole life, so each worker accepts at most GUNICORN_THREADS minus
+SSE_THREAD_HEADROOM streams (and never more than SSE_MAX_STREAMS). The
+headroom threads keep serving ordinary requests; further streams get 503 and
+the dashboard reconnects with backoff, possibly to another worker. Events
+reach a stream whichever worker made the write (notifications.ActivityFeed).
+Raise GUNICORN_THREADS if many users keep dashboards open. Streams hand their
+MySQL connection back once they start, so DB_POOL_SIZE only has to cover the
+other threads (at least SSE_THREAD_HEADROOM); MySQL max_connections must
+cover workers x (DB_POOL_SIZE + 1 feed connection) plus background jobs.
+"""
+
+import multiprocessing
+import os
+import signal
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# Threads per worker that live-update streams may never take
+SSE_THREAD_HEADROOM = int(os.environ.get('SSE_THREAD_HEADROOM', 8))
+
+# Import the app (and run init_db) once in the master, before forking
+preload_app = True
+
+# Seconds a worker gets to finish in-flight requests on SIGTERM / HUP reload
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot accumulate
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Give each worker its own DB pool and attendance flush thread; neither may cross a fork."""
+    import app
+    from notifications import broker
+    app.init_db_pool()
+    app.start_attendance_queue()
+    # Each stream pins a thread: keep SSE_THREAD_HEADROOM of them for other requests
+    broker.max_streams = max(0, min(broker.max_streams, threads - SSE_THREAD_HEADROOM))
+
+
+def post_worker_init(worker):
+    """Close live-update streams and flush queued attendance when the worker is asked to stop."""
+    from notifications import broker
+    from app import attendance_queue
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_term(signum, frame):
+        broker.close()
+        attendance_queue.stop()
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
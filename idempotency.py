@@ -0,0 +1,220 @@
+"""
+Idempotency keys for ERP Cell mutating endpoints.
+A client that may retry a POST/PUT/DELETE (flaky campus Wi-Fi) sends an
+`Idempotency-Key` header with a value unique to that submission. The first
+request with a key runs normally and its response is stored; a retry with
+the same key, user and endpoint gets the stored response back without
+running the route again. Nothing touches MySQL. A retry that arrives while
+the first request is still running waits for it and then gets its response.
+
+Responses are kept for IDEMPOTENCY_TTL seconds as one small file per key
+(zlib-compressed body) under IDEMPOTENCY_DIR, so every worker process on the
+host sees them. Concurrent duplicates are serialised by a per-key lock: a
+thread lock inside the process, plus an flock on the key's file between
+processes. 5xx responses are not stored, so a request that failed on the
+server can be retried for real. Expired entries are deleted by a background
+thread in each process, never inside a request.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+try:
+    import fcntl  # Cross-process key locks (not available on Windows)
+except ImportError:
+    fcntl = None
+
+IDEMPOTENCY_DIR = os.environ.get('IDEMPOTENCY_DIR',
+                                 os.path.join(os.path.dirname(__file__), 'data', 'idempotency'))
+
+# Seconds a stored response is replayed for
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', 86400))
+
+# Seconds a duplicate waits for the in-flight original before giving up with 409
+IDEMPOTENCY_WAIT = float(os.environ.get('IDEMPOTENCY_WAIT', 30))
+
+# Longest accepted key (clients normally send a UUID)
+MAX_KEY_LENGTH = 255
+
+# Seconds between sweeps of expired entries
+SWEEP_INTERVAL = 600
+
+# Poll interval while another process holds a key's file lock
+LOCK_POLL = 0.05
+
+
+class IdempotencyStore:
+    """Expiring response store keyed by (scope, Idempotency-Key), shared through the filesystem."""
+
+    def __init__(self, directory=IDEMPOTENCY_DIR, ttl=IDEMPOTENCY_TTL, wait=IDEMPOTENCY_WAIT):
+        self.directory = directory
+        self.ttl = ttl
+        self.wait = wait
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._sweeper = None
+
+    def _path(self, scope, key):
+        digest = hashlib.sha256(f"{scope}\0{key}".encode('utf-8')).hexdigest()[:40]
+        return os.path.join(self.directory, digest + '.json')
+
+    # --- Locking -------------------------------------------------------------
+
+    def _thread_lock(self, path):
+        """Reference-counted thread lock for one key."""
+        with self._locks_guard:
+            entry = self._locks.setdefault(path, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release_thread_lock(self, path, held=True):
+        with self._locks_guard:
+            entry = self._locks[path]
+            if held:
+                entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[path]
+
+    def _lock_file(self, path, deadline):
+        """Open and flock the key's file; None if another process holds it past the deadline."""
+        while True:
+            handle = open(path, 'a+b')
+            if fcntl is None:
+                return handle
+            while True:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except OSError:
+                    if time.monotonic() >= deadline:
+                        handle.close()
+                        return None
+                    time.sleep(LOCK_POLL)
+            if os.fstat(handle.fileno()).st_nlink:
+                return handle
+            handle.close()  # Expired and deleted by a sweep while we waited; use the new file
+
+    # --- Public API ----------------------------------------------------------
+
+    def begin(self, scope, key, fingerprint):
+        """
+        Claim a key before running the route.
+
+        Args:
+            scope (str): Caller and endpoint, e.g. 'Faculty:4 POST /api/faculty/marks'
+            key (str): Client's Idempotency-Key
+            fingerprint (str): Hash of the request body
+
+        Returns:
+            tuple: ('run', token) to run the route and then call finish()/abandon(),
+                   ('replay', (status, content_type, body)) for a stored response,
+                   ('mismatch', None) if the key was used for a different body,
+                   ('busy', None) if the original is still running after the wait
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._start_sweeper()
+        now = time.time()
+
+        path = self._path(scope, key)
+        deadline = time.monotonic() + self.wait
+        lock = self._thread_lock(path)
+        if not lock.acquire(timeout=self.wait):
+            self._release_thread_lock(path, held=False)
+            return 'busy', None
+        handle = self._lock_file(path, deadline)
+        if handle is None:
+            self._release_thread_lock(path)
+            return 'busy', None
+
+        handle.seek(0)
+        raw = handle.read()
+        try:
+            entry = json.loads(raw) if raw else None
+        except ValueError:
+            entry = None  # Torn write from a crash; run the request again
+        if entry and entry['expires'] > now:
+            handle.close()
+            self._release_thread_lock(path)
+            if entry['fingerprint'] != fingerprint:
+                return 'mismatch', None
+            return 'replay', (entry['status'], entry['content_type'],
+                              zlib.decompress(base64.b64decode(entry['body'])))
+        return 'run', (path, handle, fingerprint)
+
+    def finish(self, token, status, content_type, body):
+        """Store the route's response (unless it is a 5xx) and release the key."""
+        path, handle, fingerprint = token
+        try:
+            if status < 500:
+                entry = {'fingerprint': fingerprint, 'status': status, 'content_type': content_type,
+                         'body': base64.b64encode(zlib.compress(body)).decode('ascii'),
+                         'expires': time.time() + self.ttl}
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(entry, separators=(',', ':')).encode('utf-8'))
+                handle.flush()
+        finally:
+            self.abandon(token)
+
+    def abandon(self, token):
+        """Release a key without storing anything (the route raised); a retry runs again."""
+        path, handle, _fingerprint = token
+        if not handle.closed:
+            handle.close()
+            self._release_thread_lock(path)
+
+    def _start_sweeper(self):
+        """Start this process's sweep thread on first use (after the gunicorn fork)."""
+        with self._locks_guard:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping idempotency store: {e}")
+            time.sleep(SWEEP_INTERVAL)
+
+    def sweep(self, now=None):
+        """Delete expired and never-finished entries; returns how many were removed."""
+        now = now or time.time()
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'r+b') as handle:
+                    if fcntl:
+                        try:
+                            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        except OSError:
+                            continue  # In flight
+                    raw = handle.read()
+                    try:
+                        expired = not raw or json.loads(raw)['expires'] <= now
+                    except (ValueError, KeyError):
+                        expired = True
+                    if expired:
+                        os.remove(path)
+                        removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+def fingerprint(body):
+    """Hash of a request body, to reject a reused key with a different payload."""
+    return hashlib.sha256(body or b'').hexdigest()
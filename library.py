@@ -0,0 +1,220 @@
+"""
+Library utilities for ERP Cell system.
+Books live in the Library_Book catalog (one row per ISBN) with total and
+available copy counts. Issuing a book decrements available_copies with a
+guarded UPDATE, so an availability check is a single primary-key read rather
+than a count over Library_Transaction.
+
+Overdue loans are flipped by a periodic sweep (`python library.py`) that
+walks the open loans in primary-key chunks, one UPDATE per chunk, setting the
+status and the accrued fine together.
+"""
+
+import os
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+# Fine charged per day a book is kept past its due date
+FINE_PER_DAY = Decimal(os.environ.get('LIBRARY_FINE_PER_DAY', '5.00'))
+
+# Default loan period used when an issue request gives no due date
+LOAN_DAYS = int(os.environ.get('LIBRARY_LOAN_DAYS', 30))
+
+# Transaction ids covered by one sweep UPDATE
+SWEEP_BATCH_SIZE = 1000
+
+
+class BookUnavailable(Exception):
+    """Raised when every copy of a book is already issued."""
+
+
+def get_book(cursor, book_id=None, isbn=None):
+    """
+    Look up a catalog entry by primary key or by ISBN (unique index).
+
+    Args:
+        cursor: MySQL cursor created with dictionary=True
+        book_id (int): Library_Book.book_id
+        isbn (str): ISBN, used when book_id is not given
+
+    Returns:
+        dict: Book row, or None if not found
+    """
+    if book_id:
+        cursor.execute("SELECT * FROM Library_Book WHERE book_id = %s", (book_id,))
+    else:
+        cursor.execute("SELECT * FROM Library_Book WHERE isbn = %s", (isbn,))
+    return cursor.fetchone()
+
+
+def available_copies(cursor, book_id):
+    """
+    Return the number of copies on the shelf (a counter read, not a scan).
+
+    Returns:
+        int: Available copies, or None if the book does not exist
+    """
+    cursor.execute("SELECT available_copies FROM Library_Book WHERE book_id = %s", (book_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return row['available_copies'] if isinstance(row, dict) else row[0]
+
+
+def add_copies(cursor, isbn, title, author, copies=1):
+    """
+    Add a book to the catalog, or add copies to an existing ISBN.
+
+    Args:
+        cursor: Open MySQL cursor (the caller commits)
+        isbn (str): ISBN of the book
+        title (str): Book title
+        author (str): Book author
+        copies (int): Number of physical copies being added
+    """
+    cursor.execute("""
+        INSERT INTO Library_Book (isbn, title, author, total_copies, available_copies)
+        VALUES (%s, %s, %s, %s, %s) AS new
+        ON DUPLICATE KEY UPDATE total_copies = Library_Book.total_copies + new.total_copies,
+                                available_copies = Library_Book.available_copies + new.available_copies
+    """, (isbn, title, author, copies, copies))
+
+
+def issue_book(cursor, student_id, book, issue_date=None, due_date=None):
+    """
+    Issue one copy of a book to a student.
+
+    The copy is claimed with a conditional decrement, so two concurrent
+    issues can never take the last copy twice.
+
+    Args:
+        cursor: Open MySQL cursor (the caller commits)
+        student_id (int): Borrowing student
+        book (dict): Row returned by get_book()
+        issue_date (date): Defaults to today
+        due_date (date): Defaults to issue_date + LOAN_DAYS
+
+    Returns:
+        int: library_id of the new transaction
+
+    Raises:
+        BookUnavailable: If no copy is available
+    """
+    issue_date = issue_date or date.today()
+    due_date = due_date or issue_date + timedelta(days=LOAN_DAYS)
+
+    cursor.execute("""
+        UPDATE Library_Book SET available_copies = available_copies - 1
+        WHERE book_id = %s AND available_copies > 0
+    """, (book['book_id'],))
+    if cursor.rowcount == 0:
+        raise BookUnavailable(f"No copies of '{book['title']}' are available")
+
+    cursor.execute("""
+        INSERT INTO Library_Transaction
+            (student_id, book_id, book_title, book_author, book_isbn, issue_date, due_date, status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, 'Issued')
+    """, (student_id, book['book_id'], book['title'], book['author'], book['isbn'], issue_date, due_date))
+    return cursor.lastrowid
+
+
+def return_book(cursor, library_id, return_date=None, fine_per_day=FINE_PER_DAY):
+    """
+    Close a loan, settle its fine and put the copy back on the shelf.
+
+    Args:
+        cursor: Open MySQL cursor (the caller commits)
+        library_id (int): Transaction to close
+        return_date (date): Defaults to today
+        fine_per_day (Decimal): Fine per day late
+
+    Returns:
+        bool: False if the transaction does not exist or is already returned
+    """
+    return_date = return_date or date.today()
+    cursor.execute("SELECT book_id FROM Library_Transaction WHERE library_id = %s AND return_date IS NULL FOR UPDATE",
+                   (library_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return False
+    book_id = row['book_id'] if isinstance(row, dict) else row[0]
+
+    cursor.execute("""
+        UPDATE Library_Transaction
+        SET status = 'Returned', return_date = %s,
+            fine_amount = GREATEST(DATEDIFF(%s, due_date), 0) * %s
+        WHERE library_id = %s
+    """, (return_date, return_date, fine_per_day, library_id))
+    if book_id is not None:
+        cursor.execute("UPDATE Library_Book SET available_copies = available_copies + 1 WHERE book_id = %s",
+                       (book_id,))
+    return True
+
+
+def sweep_overdue(db, today=None, fine_per_day=FINE_PER_DAY, batch_size=SWEEP_BATCH_SIZE, pause=0.05):
+    """
+    Mark unreturned loans past their due date as Overdue and refresh their fines.
+
+    Open loans are processed in library_id ranges of batch_size, one UPDATE
+    and one short transaction per range. Already-overdue rows are included so
+    their fine keeps accruing; re-running on the same day changes nothing.
+
+    Args:
+        db: MySQL connection
+        today (date): Reference date, defaults to today
+        fine_per_day (Decimal): Fine per day late
+        batch_size (int): Transaction ids covered per UPDATE
+        pause (float): Seconds to sleep between chunks
+
+    Returns:
+        int: Number of rows changed
+    """
+    today = today or date.today()
+    cursor = db.cursor()
+    changed = 0
+    try:
+        cursor.execute("""
+            SELECT MIN(library_id), MAX(library_id)
+            FROM Library_Transaction
+            WHERE status IN ('Issued', 'Overdue') AND due_date < %s
+        """, (today,))
+        low, high = cursor.fetchone()
+        if low is None:
+            return 0
+
+        for start in range(low, high + 1, batch_size):
+            cursor.execute("""
+                UPDATE Library_Transaction
+                SET status = 'Overdue',
+                    fine_amount = DATEDIFF(%s, due_date) * %s
+                WHERE library_id BETWEEN %s AND %s
+                  AND return_date IS NULL
+                  AND status IN ('Issued', 'Overdue')
+                  AND due_date < %s
+            """, (today, fine_per_day, start, start + batch_size - 1, today))
+            db.commit()
+            changed += cursor.rowcount
+            if pause and start + batch_size <= high:
+                time.sleep(pause)
+    finally:
+        cursor.close()
+    return changed
+
+
+if __name__ == '__main__':
+    # Run from cron, e.g. nightly: python library.py
+    import mysql.connector
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    conn = mysql.connector.connect(
+        user=os.environ.get('DB_USER', 'root'),
+        password=os.environ.get('DB_PASSWORD', ''),
+        host=os.environ.get('DB_HOST', 'localhost'),
+        database='erp_database'
+    )
+    updated = sweep_overdue(conn)
+    conn.close()
+    print(f"✓ Updated {updated} overdue library transactions")
@@ -0,0 +1,229 @@
+"""
+Migration script: replace free-text department columns with integer dept_id foreign keys.
+
+Faculty_Info, Student_Results, Student_Fees and Class_Timetable used to store a
+VARCHAR copy of Departments.dept_name (and some older rows store the id as text).
+This script moves an existing database to the schema in database/database.sql
+without taking the application offline:
+
+    1. expand    - add nullable dept_id columns (and Student_Info.dept_id) with indexes,
+                   and make the old VARCHAR columns nullable (the new app.py no longer writes them)
+    2. backfill  - fill dept_id in small primary-key batches, committing per batch
+    3. contract  - make dept_id NOT NULL, add foreign keys, drop the old VARCHAR columns
+
+Run `expand` and `backfill` before deploying the new app.py. Rows the old
+app.py writes after the first backfill still have dept_id NULL, so run
+`backfill` again once the new app.py is deployed (it only touches rows with
+dept_id NULL), then `contract` once it reports no unmatched rows.
+
+Usage:
+    python migrate_departments.py expand
+    python migrate_departments.py backfill [--batch-size 1000] [--pause 0.05]
+    python migrate_departments.py contract
+"""
+
+import argparse
+import time
+import mysql.connector
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Database configuration
+DB_CONFIG = {
+    'user': os.environ.get('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASSWORD', ''),
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'database': 'erp_database'
+}
+
+# Tables that carry a free-text `department` column, with their primary keys
+DEPARTMENT_TABLES = {
+    'Faculty_Info': 'faculty_id',
+    'Student_Results': 'result_id',
+    'Student_Fees': 'fee_id',
+    'Class_Timetable': 'timetable_id',
+}
+
+
+def column_exists(cursor, table, column):
+    """Check whether a column exists in the current database."""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def expand(conn):
+    """
+    Add nullable dept_id columns and their indexes (metadata-only on MySQL 8).
+
+    The old `department` columns are made nullable too: the new app.py inserts
+    rows without them, which would otherwise fail until `contract` drops them.
+    """
+    cursor = conn.cursor()
+    for table in list(DEPARTMENT_TABLES) + ['Student_Info']:
+        if column_exists(cursor, table, 'dept_id'):
+            print(f"  - {table}.dept_id already exists")
+        else:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN dept_id INT NULL, ALGORITHM=INSTANT")
+            cursor.execute(f"ALTER TABLE {table} ADD INDEX idx_{table.lower()}_dept (dept_id), "
+                           f"ALGORITHM=INPLACE, LOCK=NONE")
+            print(f"✓ Added {table}.dept_id")
+
+        cursor.execute("""
+            SELECT COLUMN_TYPE, IS_NULLABLE FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'department'
+        """, (table,))
+        column = cursor.fetchone()
+        if column and column[1] == 'NO':
+            # Online rebuild; reads and writes continue meanwhile
+            cursor.execute(f"ALTER TABLE {table} MODIFY department {column[0]} NULL, ALGORITHM=INPLACE, LOCK=NONE")
+            print(f"✓ Made {table}.department nullable")
+    cursor.close()
+
+
+def backfill_table(conn, table, pk, batch_size, pause):
+    """Fill dept_id for one table in primary-key ranges, one short transaction per range."""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT MIN({pk}), MAX({pk}) FROM {table}")
+    low, high = cursor.fetchone()
+    if low is None:
+        cursor.close()
+        return 0
+
+    updated = 0
+    start = low
+    while start <= high:
+        end = start + batch_size - 1
+        # Legacy rows hold either the department name or its id as text
+        cursor.execute(f"""
+            UPDATE {table} t
+            JOIN Departments d
+              ON t.department = d.dept_name OR t.department = CAST(d.dept_id AS CHAR)
+            SET t.dept_id = d.dept_id
+            WHERE t.{pk} BETWEEN %s AND %s AND t.dept_id IS NULL
+        """, (start, end))
+        updated += cursor.rowcount
+        conn.commit()
+        start = end + 1
+        if pause:
+            time.sleep(pause)
+
+    cursor.close()
+    return updated
+
+
+def backfill_students(conn, batch_size, pause):
+    """Derive Student_Info.dept_id from the student's fee record, falling back to results."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(student_id), MAX(student_id) FROM Student_Info")
+    low, high = cursor.fetchone()
+    if low is None:
+        cursor.close()
+        return 0
+
+    updated = 0
+    start = low
+    while start <= high:
+        end = start + batch_size - 1
+        cursor.execute("""
+            UPDATE Student_Info s
+            SET s.dept_id = COALESCE(
+                (SELECT MIN(f.dept_id) FROM Student_Fees f WHERE f.student_id = s.student_id),
+                (SELECT MIN(r.dept_id) FROM Student_Results r WHERE r.student_id = s.student_id)
+            )
+            WHERE s.student_id BETWEEN %s AND %s AND s.dept_id IS NULL
+        """, (start, end))
+        updated += cursor.rowcount
+        conn.commit()
+        start = end + 1
+        if pause:
+            time.sleep(pause)
+
+    cursor.close()
+    return updated
+
+
+def count_unmatched(conn):
+    """Return {table: rows still missing dept_id} for the tables that must be NOT NULL."""
+    cursor = conn.cursor()
+    unmatched = {}
+    for table in DEPARTMENT_TABLES:
+        cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE dept_id IS NULL")
+        unmatched[table] = cursor.fetchone()[0]
+    cursor.close()
+    return unmatched
+
+
+def backfill(conn, batch_size, pause):
+    """Backfill every table, then report rows that could not be matched."""
+    for table, pk in DEPARTMENT_TABLES.items():
+        updated = backfill_table(conn, table, pk, batch_size, pause)
+        print(f"✓ {table}: {updated} rows backfilled")
+
+    updated = backfill_students(conn, batch_size, pause)
+    print(f"✓ Student_Info: {updated} rows backfilled")
+
+    for table, missing in count_unmatched(conn).items():
+        if missing:
+            print(f"⚠ {table}: {missing} rows have a department that matches no Departments row")
+
+
+def contract(conn):
+    """Enforce NOT NULL + foreign keys and drop the old VARCHAR columns."""
+    unmatched = {t: n for t, n in count_unmatched(conn).items() if n}
+    if unmatched:
+        print(f"❌ Refusing to contract, unmatched rows remain: {unmatched}")
+        return
+
+    cursor = conn.cursor()
+    for table in DEPARTMENT_TABLES:
+        if not column_exists(cursor, table, 'department'):
+            print(f"  - {table} already contracted")
+            continue
+        cursor.execute(f"""
+            ALTER TABLE {table}
+                MODIFY dept_id INT NOT NULL,
+                ADD CONSTRAINT fk_{table.lower()}_dept FOREIGN KEY (dept_id)
+                    REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE,
+                DROP COLUMN department
+        """)
+        print(f"✓ Contracted {table}")
+
+    cursor.execute("SELECT COUNT(*) FROM information_schema.TABLE_CONSTRAINTS "
+                   "WHERE TABLE_SCHEMA = DATABASE() AND CONSTRAINT_NAME = 'fk_student_info_dept'")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("""
+            ALTER TABLE Student_Info
+                ADD CONSTRAINT fk_student_info_dept FOREIGN KEY (dept_id)
+                    REFERENCES Departments(dept_id) ON DELETE RESTRICT ON UPDATE CASCADE
+        """)
+        print("✓ Contracted Student_Info")
+    cursor.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migrate department columns to dept_id foreign keys.')
+    parser.add_argument('step', choices=['expand', 'backfill', 'contract'])
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per backfill transaction')
+    parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"ERP Cell - Department Migration ({args.step})")
+    print("=" * 60)
+
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        if args.step == 'expand':
+            expand(conn)
+        elif args.step == 'backfill':
+            backfill(conn, args.batch_size, args.pause)
+        else:
+            contract(conn)
+        conn.close()
+    except mysql.connector.Error as err:
+        print(f"❌ Database error: {err}")
@@ -0,0 +1,289 @@
+"""
+Live notification utilities for ERP Cell system.
+Publish/subscribe fan-out behind the Server-Sent Events stream.
+
+Each open stream gets a small bounded queue. A slow client never blocks a
+publisher: when its queue is full the oldest message is dropped and the client
+is told to resync (re-fetch) instead of receiving every change.
+
+Events are not handed between processes directly. Every notified event is
+also an Activity_Log row, and each worker with open streams runs an
+ActivityFeed thread that tails Activity_Log by activity_id and publishes new
+rows to its own broker. A write on any worker (or the attendance flush thread)
+therefore reaches streams held by every worker, within FEED_POLL_INTERVAL, or
+at once on the worker that made the write, which wakes its feed.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+# Maximum open streams per process, and per user (multiple tabs). Under gunicorn
+# gthread workers the per-process cap is also held below the thread count
+# (see gunicorn.conf.py), since every open stream occupies a thread.
+MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 500))
+MAX_STREAMS_PER_USER = int(os.environ.get('SSE_MAX_STREAMS_PER_USER', 3))
+
+# Seconds between heartbeat comments on an idle stream
+HEARTBEAT_INTERVAL = int(os.environ.get('SSE_HEARTBEAT_INTERVAL', 20))
+
+# Pending messages buffered per stream before the oldest is dropped
+QUEUE_SIZE = 32
+
+# Seconds between Activity_Log polls while this process has open streams
+FEED_POLL_INTERVAL = float(os.environ.get('SSE_FEED_POLL_INTERVAL', 1.0))
+
+# Seconds an Activity_Log row is re-read for gaps left by transactions that had
+# not committed yet (auto-increment ids are assigned before the commit)
+FEED_SETTLE = int(os.environ.get('SSE_FEED_SETTLE', 5))
+
+# Activity_Log rows read per poll query
+FEED_BATCH = 1000
+
+# Seconds to wait before reconnecting after a database error
+FEED_RETRY_DELAY = 5
+
+
+class Subscription:
+    """One open event stream for a user."""
+
+    def __init__(self, user_role, ref_id):
+        self.key = (user_role, int(ref_id))
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.overflowed = False
+
+    def push(self, message):
+        """Queue a message without blocking, dropping the oldest one if full."""
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                self.overflowed = True
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+class Broker:
+    """Thread-safe registry of subscriptions keyed by (user_role, ref_id)."""
+
+    def __init__(self, max_streams=MAX_STREAMS, max_per_user=MAX_STREAMS_PER_USER):
+        self.max_streams = max_streams
+        self.max_per_user = max_per_user
+        self._subscribers = {}
+        self._count = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_role, ref_id):
+        """
+        Register a new stream.
+
+        Returns:
+            Subscription: The new subscription, or None if a stream cap is reached
+        """
+        sub = Subscription(user_role, ref_id)
+        with self._lock:
+            if self._closed:
+                return None
+            existing = self._subscribers.setdefault(sub.key, set())
+            if self._count >= self.max_streams or len(existing) >= self.max_per_user:
+                if not existing:
+                    del self._subscribers[sub.key]
+                return None
+            existing.add(sub)
+            self._count += 1
+        return sub
+
+    def unsubscribe(self, sub):
+        """Remove a stream; safe to call more than once."""
+        with self._lock:
+            subs = self._subscribers.get(sub.key)
+            if subs and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del self._subscribers[sub.key]
+
+    def publish(self, user_role, ref_id, event_type, data):
+        """
+        Send an event to every open stream of one user.
+
+        Args:
+            user_role (str): 'Student' or 'Faculty'
+            ref_id (int): student_id or faculty_id
+            event_type (str): SSE event name, e.g. 'marks'
+            data (dict): JSON-serialisable payload
+        """
+        with self._lock:
+            subs = list(self._subscribers.get((user_role, int(ref_id)), ()))
+        if not subs:
+            return
+        message = format_event(event_type, data)
+        for sub in subs:
+            sub.push(message)
+
+    def close(self):
+        """
+        End every open stream and refuse new ones (worker shutdown).
+
+        Streams otherwise never finish, so a graceful restart would wait for
+        its full timeout; clients reconnect to another worker after `retry`.
+        """
+        with self._lock:
+            self._closed = True
+            subs = [sub for subs in self._subscribers.values() for sub in subs]
+        for sub in subs:
+            sub.push(None)
+
+    def has_streams(self):
+        """True if this process holds at least one open stream."""
+        with self._lock:
+            return self._count > 0
+
+    def stats(self):
+        """Return {'streams': open streams, 'users': users with a stream}."""
+        with self._lock:
+            return {'streams': self._count, 'users': len(self._subscribers)}
+
+
+class ActivityFeed:
+    """Thread that publishes new Activity_Log rows to this process's broker."""
+
+    def __init__(self, broker, interval=FEED_POLL_INTERVAL, settle=FEED_SETTLE):
+        self.broker = broker
+        self.interval = interval
+        self.settle = settle
+        # Rows up to _floor are settled and delivered; _seen holds delivered ids above it
+        self._floor = None
+        self._seen = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def start(self, connect):
+        """
+        Start the feed thread if it is not running (safe to call on every stream request).
+
+        Args:
+            connect (callable): Returns a new MySQL connection
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(connect,), daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Poll now instead of at the next interval (called after a local commit)."""
+        self._wake.set()
+
+    def _run(self, connect):
+        db = None
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                if not self.broker.has_streams():
+                    # Nobody to deliver to: start again from the newest row on the next stream
+                    self._floor = None
+                    self._seen.clear()
+                    continue
+                if db is None or not db.is_connected():
+                    db = connect()
+                    # Each poll must see rows committed since the previous one
+                    db.autocommit = True
+                self.poll(db)
+            except Exception as e:
+                print(f"Error polling activity feed: {e}")
+                try:
+                    if db is not None:
+                        db.close()
+                except Exception:
+                    pass
+                db = None
+                time.sleep(FEED_RETRY_DELAY)
+
+    def poll(self, db):
+        """
+        Publish Activity_Log rows not delivered yet.
+
+        Returns:
+            int: Events published
+        """
+        cursor = db.cursor()
+        try:
+            if self._floor is None:
+                cursor.execute("SELECT COALESCE(MAX(activity_id), 0) FROM Activity_Log")
+                self._floor = cursor.fetchone()[0]
+            published = 0
+            after, settled = self._floor, True
+            while True:
+                cursor.execute("""
+                    SELECT activity_id, user_role, ref_id, event_type, title, message,
+                           created_at < NOW() - INTERVAL %s SECOND
+                    FROM Activity_Log
+                    WHERE activity_id > %s
+                    ORDER BY activity_id
+                    LIMIT %s
+                """, (self.settle, after, FEED_BATCH))
+                rows = cursor.fetchall()
+                for activity_id, user_role, ref_id, event_type, title, message, old in rows:
+                    if activity_id not in self._seen:
+                        self._seen.add(activity_id)
+                        self.broker.publish(user_role, ref_id, event_type, {'title': title, 'message': message})
+                        published += 1
+                    # The floor only passes rows old enough that no earlier id can still commit
+                    settled = settled and bool(old)
+                    if settled:
+                        self._floor = activity_id
+                    after = activity_id
+                if len(rows) < FEED_BATCH:
+                    break
+            self._seen = {activity_id for activity_id in self._seen if activity_id > self._floor}
+            self.published += published
+            return published
+        finally:
+            cursor.close()
+
+
+def format_event(event_type, data):
+    """Encode one SSE frame."""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def stream(broker, sub, heartbeat=HEARTBEAT_INTERVAL):
+    """
+    Generator yielding SSE frames for a subscription until the client disconnects.
+
+    Args:
+        broker (Broker): Broker the subscription belongs to
+        sub (Subscription): Subscription returned by broker.subscribe()
+        heartbeat (int): Seconds of silence before a keep-alive comment is sent
+    """
+    try:
+        yield f"retry: 5000\n{format_event('ready', {})}"
+        while True:
+            try:
+                message = sub.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": heartbeat\n\n"
+                continue
+            if message is None:
+                return
+            if sub.overflowed:
+                # Client fell behind; tell it to reload instead of replaying everything
+                sub.overflowed = False
+                yield format_event('resync', {})
+            yield message
+    finally:
+        broker.unsubscribe(sub)
+
+
+broker = Broker()
+activity_feed = ActivityFeed(broker)
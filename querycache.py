@@ -0,0 +1,215 @@
+"""
+Query result cache for ERP Cell system.
+Read endpoints whose data changes rarely (departments, subjects, profiles,
+timetables) opt in by fetching through QueryCache.fetch() instead of a
+cursor. Results are keyed by the normalised SQL text and parameters, and each
+entry records the tables it reads together with their version numbers at the
+time it was filled.
+
+The version counters live in the Table_Version table (migration 010), so
+every gunicorn worker sees the same numbers. Every write route is wrapped in
+@query_cache.invalidates(<tables>), which bumps those tables' rows once the
+route has committed; code that writes outside a route (the attendance flush
+thread, the timetable generator) calls bump_versions() on its own cursor
+inside the write transaction. A request reads all versions with one SELECT,
+on its own connection, the first time it fetches through the cache. An entry
+whose recorded versions no longer match is stale and is re-queried, so a
+write to Subjects drops subject lists on every worker but leaves profiles and
+departments cached.
+
+Reading the versions before the cached query, in the same transaction, means
+an entry is never labelled newer than the data it holds. QUERY_CACHE_TTL is
+only a fallback for writes that bypass Table_Version (manual SQL, a worker
+that died between commit and bump).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, has_app_context
+
+# Entries kept per process, least recently used evicted first; 0 disables caching
+QUERY_CACHE_SIZE = int(os.environ.get('QUERY_CACHE_SIZE', 2000))
+
+# Seconds an entry is trusted at most (fallback for writes that do not bump Table_Version)
+QUERY_CACHE_TTL = float(os.environ.get('QUERY_CACHE_TTL', 300))
+
+
+def normalize_sql(sql):
+    """Collapse whitespace so the same query written over different lines shares a key."""
+    return ' '.join(sql.split())
+
+
+def bump_versions(cursor, *tables):
+    """
+    Bump tables' shared versions; runs in the caller's transaction, so commit afterwards.
+
+    Args:
+        cursor: MySQL cursor
+        *tables (str): Tables the transaction wrote to
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    # Sorted so concurrent bumps take the row locks in the same order
+    cursor.execute(
+        "INSERT INTO Table_Version (table_name, version) VALUES "
+        + ', '.join(['(%s, 1)'] * len(tables))
+        + " ON DUPLICATE KEY UPDATE version = version + 1",
+        tables
+    )
+
+
+class QueryCache:
+    """LRU cache of SELECT results with per-table version invalidation."""
+
+    def __init__(self, connect, max_entries=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        """
+        Args:
+            connect (callable): Returns the current request's MySQL connection (used to bump versions)
+            max_entries (int): Entries kept, 0 disables caching
+            ttl (float): Seconds an entry is trusted at most
+        """
+        self.connect = connect
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.evicted = 0
+        self.stale = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _shared_versions(self, db):
+        """All tables' versions, read once per request and kept in flask.g."""
+        if has_app_context() and 'query_cache_versions' in g:
+            return g.query_cache_versions
+        cursor = db.cursor()
+        cursor.execute("SELECT table_name, version FROM Table_Version")
+        versions = dict(cursor.fetchall())
+        cursor.close()
+        if has_app_context():
+            g.query_cache_versions = versions
+        # Last versions seen, for stats()
+        self._versions = versions
+        return versions
+
+    def fetch(self, db, sql, params=(), tables=(), name='query', one=False):
+        """
+        Run a SELECT through the cache.
+
+        Args:
+            db: MySQL connection
+            sql (str): SELECT statement
+            params (tuple): Query parameters
+            tables (tuple): Every table the statement reads
+            name (str): Endpoint label for the hit ratio metrics
+            one (bool): Return the first row (or None) instead of a list
+
+        Returns:
+            list or dict: Dictionary rows; copies, so callers may modify them
+        """
+        tables = tuple(sorted(set(tables)))
+        key = (normalize_sql(sql), tuple(params))
+        shared = self._shared_versions(db)
+        # Read before the query on the same connection, so a write that commits while it runs leaves this entry stale
+        current = tuple(shared.get(table, 0) for table in tables)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                versions, filled_at, rows = entry
+                if versions == current and now - filled_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits[name] = self.hits.get(name, 0) + 1
+                    return self._copy(rows, one)
+                del self._entries[key]
+                self.stale += 1
+            self.misses[name] = self.misses.get(name, 0) + 1
+
+        cursor = db.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        rows = tuple(cursor.fetchall())
+        cursor.close()
+
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = (current, now, rows)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evicted += 1
+        return self._copy(rows, one)
+
+    @staticmethod
+    def _copy(rows, one):
+        if one:
+            return dict(rows[0]) if rows else None
+        return [dict(row) for row in rows]
+
+    def bump(self, *tables):
+        """
+        Invalidate, on every worker, each cached result that reads any of the given tables.
+
+        Commits the bump on the request's connection, so call it after the write has committed.
+        If MySQL cannot be reached this worker's entries are dropped and other workers
+        catch up within the TTL.
+        """
+        if has_app_context():
+            g.pop('query_cache_versions', None)
+        try:
+            db = self.connect()
+            cursor = db.cursor()
+            try:
+                bump_versions(cursor, *tables)
+                db.commit()
+            finally:
+                cursor.close()
+        except Exception as e:
+            print(f"Error bumping query cache versions for {', '.join(tables)}: {e}")
+            self.clear()
+
+    def invalidates(self, *tables):
+        """
+        Decorator for write routes: bump the tables' versions when the route returns
+        (after its commit or rollback).
+
+        Args:
+            *tables (str): Tables the route may INSERT into, UPDATE or DELETE from
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.bump(*tables)
+            return decorated_function
+        return decorator
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Size, eviction counts and hit ratio per endpoint for this process, with the last shared versions read."""
+        with self._lock:
+            endpoints = {}
+            for name in sorted(set(self.hits) | set(self.misses)):
+                hits, misses = self.hits.get(name, 0), self.misses.get(name, 0)
+                endpoints[name] = {'hits': hits, 'misses': misses,
+                                   'hit_ratio': round(hits / (hits + misses), 3)}
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'ttl_seconds': self.ttl, 'evicted': self.evicted, 'stale': self.stale,
+                    'hits': hits, 'misses': misses,
+                    'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+                    'endpoints': endpoints, 'table_versions': dict(self._versions)}
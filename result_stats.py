@@ -0,0 +1,238 @@
+"""
+Result distribution statistics for ERP Cell system.
+For every subject and every department: count, mean, standard deviation
+(population), min, p10, p25, median, p75, p90 and max of theory, practical and
+total marks, plus the grade histogram and pass rate.
+
+All Student_Results rows are held in NumPy arrays and every group is computed
+in one vectorized pass per measure: sums and sums of squares by bincount,
+and quantiles by one sort on (group, value) followed by index arithmetic on
+each group's run. Like the GPA engine, save_marks marks its subject dirty.
+The next read reloads only that subject's rows and recomputes the tables. A
+TTL bounds staleness for writes made by other worker processes.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from gpa import GRADE_POINTS
+
+# Seconds before the cache is fully reloaded even without local writes
+RESULT_STATS_TTL = int(os.environ.get('RESULT_STATS_TTL', 300))
+
+# Histogram order, best grade first (the Student_Results.grade enum)
+GRADES = tuple(GRADE_POINTS)
+
+# Reported quantiles, linear interpolation as in np.percentile
+QUANTILES = (('min', 0.0), ('p10', 0.1), ('p25', 0.25), ('median', 0.5),
+             ('p75', 0.75), ('p90', 0.9), ('max', 1.0))
+
+MEASURES = ('theory', 'practical', 'total')
+
+RESULT_QUERY = """
+    SELECT subject_id, dept_id, theory_marks, practical_marks, grade, status_exam = 'PASS'
+    FROM Student_Results
+"""
+
+
+def rows_to_arrays(rows):
+    """
+    Convert (subject_id, dept_id, theory, practical, grade, passed) rows to column arrays.
+
+    Missing marks become NaN; total is theory + practical with a missing part
+    counted as 0 (as save_marks does), and NaN only if both are missing.
+
+    Returns:
+        dict: 'subject', 'dept', 'theory', 'practical', 'total', 'grade' (index into GRADES), 'passed'
+    """
+    if not rows:
+        empty_int, empty_float = np.empty(0, np.int64), np.empty(0, np.float64)
+        return {'subject': empty_int, 'dept': empty_int, 'theory': empty_float, 'practical': empty_float,
+                'total': empty_float, 'grade': empty_int, 'passed': np.empty(0, bool)}
+    subject, dept, theory, practical, grade, passed = zip(*rows)
+    theory = np.array(theory, dtype=np.float64)        # None -> nan
+    practical = np.array(practical, dtype=np.float64)
+    total = np.where(np.isnan(theory) & np.isnan(practical), np.nan,
+                     np.nan_to_num(theory) + np.nan_to_num(practical))
+    grade_index = {g: i for i, g in enumerate(GRADES)}
+    return {
+        'subject': np.array(subject, dtype=np.int64),
+        'dept': np.array(dept, dtype=np.int64),
+        'theory': theory,
+        'practical': practical,
+        'total': total,
+        'grade': np.array([grade_index.get(g, len(GRADES) - 1) for g in grade], dtype=np.int64),
+        'passed': np.array(passed, dtype=bool),
+    }
+
+
+def _group_measure(group, values, n_groups):
+    """
+    Count, mean, std and quantiles of `values` per group, ignoring NaN.
+
+    Returns:
+        dict: name -> (n_groups,) array; NaN for groups with no values
+    """
+    keep = ~np.isnan(values)
+    group, values = group[keep], values[keep]
+    count = np.bincount(group, minlength=n_groups)
+    total = np.bincount(group, weights=values, minlength=n_groups)
+    squares = np.bincount(group, weights=values * values, minlength=n_groups)
+    has = count > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(has, total / count, np.nan)
+        std = np.where(has, np.sqrt(np.maximum(squares / count - mean * mean, 0)), np.nan)
+    out = {'count': count, 'mean': mean, 'std': std}
+
+    # Each group's values are one sorted run; quantile q sits at run start + q * (n - 1).
+    # Marks are small, so one sort of group * span + value orders by (group, value)
+    # several times faster than a lexsort.
+    starts = np.cumsum(count) - count
+    low_value = values.min() if values.size else 0.0
+    span = (values.max() - low_value + 1) if values.size else 1.0
+    ordered = np.sort(group * span + (values - low_value)) - np.repeat(np.arange(n_groups) * span, count) + low_value
+    for name, q in QUANTILES:
+        result = np.full(n_groups, np.nan)
+        position = starts[has] + q * (count[has] - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, starts[has] + count[has] - 1)
+        fraction = position - low
+        result[has] = ordered[low] * (1 - fraction) + ordered[high] * fraction
+        out[name] = result
+    return out
+
+
+def compute(arrays, key):
+    """
+    Statistics for every group of one key column.
+
+    Args:
+        arrays (dict): Output of rows_to_arrays()
+        key (str): 'subject' or 'dept'
+
+    Returns:
+        dict: 'ids' (sorted group ids), 'count', 'passed', 'grades' (groups x GRADES) and
+              per measure a dict of (groups,) arrays from _group_measure()
+    """
+    ids, group = np.unique(arrays[key], return_inverse=True)
+    n = len(ids)
+    tables = {
+        'ids': ids,
+        'count': np.bincount(group, minlength=n),
+        'passed': np.bincount(group, weights=arrays['passed'], minlength=n),
+        'grades': np.bincount(group * len(GRADES) + arrays['grade'],
+                              minlength=n * len(GRADES)).reshape(n, len(GRADES)),
+    }
+    for measure in MEASURES:
+        tables[measure] = _group_measure(group, arrays[measure], n)
+    return tables
+
+
+def _summary(tables, i):
+    """JSON-ready statistics of group row i."""
+    def number(value):
+        return None if np.isnan(value) else round(float(value), 2)
+
+    count = int(tables['count'][i])
+    summary = {
+        'results': count,
+        'pass_rate': round(float(tables['passed'][i]) * 100 / count, 2) if count else None,
+        'grades': {grade: int(n) for grade, n in zip(GRADES, tables['grades'][i])},
+    }
+    for measure in MEASURES:
+        stats = tables[measure]
+        summary[measure] = {'count': int(stats['count'][i]), 'mean': number(stats['mean'][i]),
+                            'std': number(stats['std'][i]),
+                            **{name: number(stats[name][i]) for name, _q in QUANTILES}}
+    return summary
+
+
+class ResultStats:
+    """Process-wide cache of per-subject and per-department result statistics."""
+
+    def __init__(self, ttl=RESULT_STATS_TTL):
+        self.ttl = ttl
+        self._arrays = None
+        self._tables = None
+        self._loaded_at = 0.0
+        self._stale = False
+        self._dirty_subjects = set()
+        self._lock = threading.Lock()
+
+    def invalidate_subject(self, subject_id):
+        """Mark a subject's results as changed; applied on the next read."""
+        with self._lock:
+            self._dirty_subjects.add(int(subject_id))
+
+    def invalidate_all(self):
+        """Force a full reload on the next read."""
+        with self._lock:
+            self._stale = True
+
+    def tables(self, db):
+        """
+        Fresh computed tables, reloading from MySQL only what changed.
+
+        Returns:
+            tuple: (subject tables, department tables, dept_id -> array of its subject ids)
+        """
+        with self._lock:
+            if self._arrays is None or self._stale or time.monotonic() - self._loaded_at > self.ttl:
+                cursor = db.cursor()
+                cursor.execute(RESULT_QUERY)
+                self._arrays = rows_to_arrays(cursor.fetchall())
+                cursor.close()
+                self._loaded_at = time.monotonic()
+                self._stale = False
+                self._recompute()
+            elif self._dirty_subjects:
+                self._reload_subjects(db, self._dirty_subjects)
+            self._dirty_subjects = set()
+            return self._tables
+
+    def _recompute(self):
+        pairs = np.unique(np.stack([self._arrays['dept'], self._arrays['subject']]), axis=1)
+        dept_ids, starts = np.unique(pairs[0], return_index=True)
+        dept_subjects = dict(zip(dept_ids.tolist(), np.split(pairs[1], starts[1:])))
+        self._tables = (compute(self._arrays, 'subject'), compute(self._arrays, 'dept'), dept_subjects)
+
+    def _reload_subjects(self, db, subject_ids):
+        subject_ids = sorted(subject_ids)
+        cursor = db.cursor()
+        cursor.execute(f"{RESULT_QUERY} WHERE subject_id IN ({', '.join(['%s'] * len(subject_ids))})",
+                       tuple(subject_ids))
+        fresh = rows_to_arrays(cursor.fetchall())
+        cursor.close()
+        keep = ~np.isin(self._arrays['subject'], np.array(subject_ids, dtype=np.int64))
+        self._arrays = {k: np.concatenate([v[keep], fresh[k]]) for k, v in self._arrays.items()}
+        self._recompute()
+
+    @staticmethod
+    def _find(tables, group_id):
+        i = np.searchsorted(tables['ids'], group_id)
+        return i if i < len(tables['ids']) and tables['ids'][i] == group_id else None
+
+    def subject(self, db, subject_id):
+        """Statistics of one subject, or None if it has no results."""
+        subjects, _departments, _dept_subjects = self.tables(db)
+        i = self._find(subjects, subject_id)
+        return None if i is None else _summary(subjects, i)
+
+    def department(self, db, dept_id):
+        """
+        Statistics of one department over all its results, with each of its subjects.
+
+        Returns:
+            dict: Department summary plus 'subjects' (subject_id -> summary), or None
+        """
+        subjects, departments, dept_subjects = self.tables(db)
+        i = self._find(departments, dept_id)
+        if i is None:
+            return None
+        summary = _summary(departments, i)
+        summary['subjects'] = {int(subject_id): _summary(subjects, self._find(subjects, subject_id))
+                               for subject_id in dept_subjects[dept_id]}
+        return summary
@@ -0,0 +1,631 @@
+"""
+Timetable generator for ERP Cell system.
+Builds a clash-free weekly Class_Timetable from subjects, faculty
+assignments, rooms and faculty availability windows.
+
+The week is split into fixed periods (Monday-Saturday x PERIODS_PER_DAY).
+Each section needs `hours` one-period lessons, derived from subject credits.
+Hard constraints: a faculty member, a room and a student cohort hold at most
+one lesson per period, and faculty only teach inside their availability.
+Cohorts come from the term's Enrollment: students taking the same set of
+subjects form one cohort, and two subjects may not share a period when some
+cohort takes both. Departments are not a constraint; a department runs
+parallel classes for its different cohorts.
+Soft constraints: spread a section's lessons over different days and keep
+a faculty member under MAX_DAILY_LESSONS a day.
+
+Search: a most-constrained-first greedy pass, then min-conflicts repair with
+a tabu list for lessons that did not fit, then hill climbing on the soft
+penalty. Independent restarts with different seeds run in parallel worker
+processes and the best schedule wins.
+
+Generation runs as a background job (start_job); its state is a JSON file
+under SCHEDULE_JOB_DIR, so any worker can report progress, and a MySQL named
+lock keeps to one job at a time across workers.
+"""
+
+import json
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import timetable
+from querycache import bump_versions
+
+# Weekly grid
+PERIOD_MINUTES = int(os.environ.get('SCHEDULE_PERIOD_MINUTES', 60))
+DAY_START = timetable.to_minutes(os.environ.get('SCHEDULE_DAY_START', '09:00'))
+PERIODS_PER_DAY = int(os.environ.get('SCHEDULE_PERIODS_PER_DAY', 8))
+
+# Weekly lessons per credit (3.5 credits -> 4 lessons at 1.0)
+HOURS_PER_CREDIT = float(os.environ.get('SCHEDULE_HOURS_PER_CREDIT', 1.0))
+
+# Parallel restarts and the wall-clock budget each restart gets
+SCHEDULE_WORKERS = int(os.environ.get('SCHEDULE_WORKERS', os.cpu_count() or 2))
+SCHEDULE_TIME_LIMIT = float(os.environ.get('SCHEDULE_TIME_LIMIT', 30))
+
+# Upper bound on a job's requested time_limit
+MAX_TIME_LIMIT = 600
+
+# Term whose Enrollment defines the student cohorts
+CURRENT_TERM = os.environ.get('CURRENT_TERM', '2025-26')
+
+# Job state files (one JSON file per job; shared by the workers that serve the status route)
+SCHEDULE_JOB_DIR = os.environ.get('SCHEDULE_JOB_DIR',
+                                  os.path.join(os.path.dirname(__file__), 'exports', 'timetables'))
+
+# MySQL named lock held by the connection of the running job
+JOB_LOCK = 'timetable_generate'
+
+# Soft-constraint weights
+SAME_DAY_PENALTY = 10
+MAX_DAILY_LESSONS = 4
+OVERLOAD_PENALTY = 5
+
+# Iterations a lesson is kept out of a period it was evicted from
+TABU_TENURE = 10
+
+
+def hours_for_credits(credits, per_credit=HOURS_PER_CREDIT):
+    """Weekly one-period lessons for a subject worth `credits`."""
+    return max(1, math.ceil(float(credits) * per_credit - 1e-9))
+
+
+def slot_label(slot, periods=PERIODS_PER_DAY):
+    """Return (day_of_week, start 'HH:MM', end 'HH:MM') for a slot index."""
+    day, period = divmod(slot, periods)
+    start = DAY_START + period * PERIOD_MINUTES
+    return timetable.DAYS[day], timetable.format_minutes(start), timetable.format_minutes(start + PERIOD_MINUTES)
+
+
+def slots_overlapping(day, start, end, periods=PERIODS_PER_DAY):
+    """Slot indexes of one day whose period overlaps [start, end) minutes."""
+    base = timetable.DAYS.index(day) * periods
+    return [base + p for p in range(periods)
+            if DAY_START + p * PERIOD_MINUTES < end and start < DAY_START + (p + 1) * PERIOD_MINUTES]
+
+
+def slots_within(windows, periods=PERIODS_PER_DAY):
+    """
+    Slot indexes that lie entirely inside availability windows.
+
+    Args:
+        windows (list): Dicts with day, start and end ('HH:MM')
+    """
+    allowed = set()
+    for window in windows:
+        start, end = timetable.to_minutes(window['start']), timetable.to_minutes(window['end'])
+        base = timetable.DAYS.index(window['day']) * periods
+        for p in range(periods):
+            if start <= DAY_START + p * PERIOD_MINUTES and DAY_START + (p + 1) * PERIOD_MINUTES <= end:
+                allowed.add(base + p)
+    return allowed
+
+
+def build_problem(sections, rooms, availability=None, fixed=None, periods=PERIODS_PER_DAY):
+    """
+    Assemble a solver input.
+
+    Args:
+        sections (list): Dicts with subject_id, faculty_id, dept_id, hours and groups
+                         (student-group keys that must not overlap); optional 'room'
+                         pins the section to one room
+        rooms (list): Room names
+        availability (dict): faculty_id -> list of windows (missing = always available)
+        fixed (list): Existing timetable rows kept as they are; they block their
+                      faculty, room and (optional 'groups' key) groups
+        periods (int): Periods per day
+
+    Returns:
+        dict: Problem passed to solve()
+    """
+    n_slots = len(timetable.DAYS) * periods
+    every_slot = list(range(n_slots))
+    availability = availability or {}
+    allowed_by_faculty = {}
+    lessons, allowed = [], []
+    for index, section in enumerate(sections):
+        faculty_id = section['faculty_id']
+        if faculty_id not in allowed_by_faculty:
+            windows = availability.get(faculty_id) or availability.get(str(faculty_id))
+            allowed_by_faculty[faculty_id] = sorted(slots_within(windows, periods)) if windows else every_slot
+        for _ in range(section['hours']):
+            lessons.append(index)
+            allowed.append(allowed_by_faculty[faculty_id])
+
+    blocked = set()
+    for row in fixed or ():
+        entry = timetable.normalize(row)
+        for slot in slots_overlapping(entry['day_of_week'], entry['start'], entry['end'], periods):
+            blocked.add(('f', entry['faculty_id'], slot))
+            if entry.get('location'):
+                blocked.add(('r', entry['location'], slot))
+            for group in entry.get('groups', ()):
+                blocked.add(('g', group, slot))
+
+    return {'sections': sections, 'rooms': list(rooms), 'lessons': lessons, 'allowed': allowed,
+            'blocked': blocked, 'periods': periods, 'n_slots': n_slots}
+
+
+class _Schedule:
+    """Mutable assignment of lessons to (slot, room) with occupancy maps."""
+
+    def __init__(self, problem, rng):
+        self.p = problem
+        self.rng = rng
+        self.sections = problem['sections']
+        self.rooms = problem['rooms']
+        self.lessons = problem['lessons']
+        self.periods = problem['periods']
+        self.blocked = problem['blocked']
+        self.assign = [None] * len(self.lessons)
+        self.busy = {}
+        self.room_free = [set(self.rooms) for _ in range(problem['n_slots'])]
+        for kind, value, slot in self.blocked:
+            if kind == 'r':
+                self.room_free[slot].discard(value)
+        self.section_day = {}
+        self.faculty_day = {}
+
+    def _keys(self, lesson, slot):
+        section = self.sections[self.lessons[lesson]]
+        keys = [('f', section['faculty_id'], slot)]
+        keys.extend(('g', group, slot) for group in section['groups'])
+        return keys
+
+    def _rooms_for(self, lesson, slot):
+        if not self.rooms:
+            return [None]
+        pinned = self.sections[self.lessons[lesson]].get('room')
+        free = self.room_free[slot]
+        if pinned:
+            return [pinned] if pinned in free else []
+        return free
+
+    def is_free(self, lesson, slot):
+        """True if `lesson` can take `slot` without moving anything."""
+        for key in self._keys(lesson, slot):
+            if key in self.blocked or key in self.busy:
+                return False
+        return bool(self._rooms_for(lesson, slot))
+
+    def blockers(self, lesson, slot):
+        """Lessons that must move for `lesson` to take `slot`, or None if it is impossible."""
+        found = set()
+        for key in self._keys(lesson, slot):
+            if key in self.blocked:
+                return None
+            other = self.busy.get(key)
+            if other is not None:
+                found.add(other)
+        if not self._rooms_for(lesson, slot):
+            pinned = self.sections[self.lessons[lesson]].get('room')
+            if pinned and ('r', pinned, slot) in self.blocked:
+                return None
+            # Free a room: evict one lesson holding it (the pinned room if there is one)
+            holders = [l for l in self.busy.get(('slot', slot), ())
+                       if pinned is None or self.assign[l][1] == pinned]
+            if not holders:
+                return None
+            found.add(self.rng.choice(holders))
+        return found
+
+    def soft_cost(self, lesson, slot):
+        """Soft penalty `lesson` would add in `slot`."""
+        section_index = self.lessons[lesson]
+        day = slot // self.periods
+        cost = SAME_DAY_PENALTY * self.section_day.get((section_index, day), 0)
+        load = self.faculty_day.get((self.sections[section_index]['faculty_id'], day), 0)
+        if load >= MAX_DAILY_LESSONS:
+            cost += OVERLOAD_PENALTY
+        return cost
+
+    def place(self, lesson, slot):
+        room = next(iter(self._rooms_for(lesson, slot)))
+        self.room_free[slot].discard(room)
+        self.assign[lesson] = (slot, room)
+        for key in self._keys(lesson, slot):
+            self.busy[key] = lesson
+        self.busy.setdefault(('slot', slot), set()).add(lesson)
+        section_index = self.lessons[lesson]
+        day = slot // self.periods
+        self.section_day[(section_index, day)] = self.section_day.get((section_index, day), 0) + 1
+        faculty_key = (self.sections[section_index]['faculty_id'], day)
+        self.faculty_day[faculty_key] = self.faculty_day.get(faculty_key, 0) + 1
+
+    def unplace(self, lesson):
+        slot, room = self.assign[lesson]
+        self.assign[lesson] = None
+        if room is not None:
+            self.room_free[slot].add(room)
+        for key in self._keys(lesson, slot):
+            del self.busy[key]
+        self.busy[('slot', slot)].discard(lesson)
+        section_index = self.lessons[lesson]
+        day = slot // self.periods
+        self.section_day[(section_index, day)] -= 1
+        self.faculty_day[(self.sections[section_index]['faculty_id'], day)] -= 1
+        return slot
+
+    def penalty(self):
+        """Total soft penalty of the current assignment."""
+        total = 0
+        for count in self.section_day.values():
+            total += SAME_DAY_PENALTY * count * (count - 1) // 2
+        for count in self.faculty_day.values():
+            total += OVERLOAD_PENALTY * max(0, count - MAX_DAILY_LESSONS)
+        return total
+
+
+def solve(problem, seed=0, time_limit=SCHEDULE_TIME_LIMIT):
+    """
+    Run one greedy + repair + improvement search.
+
+    Args:
+        problem (dict): Output of build_problem()
+        seed (int): Random seed for tie-breaking
+        time_limit (float): Wall-clock seconds for this restart
+
+    Returns:
+        dict: 'assign' (per lesson (slot, room) or None), 'unplaced', 'penalty', 'seed'
+    """
+    deadline = time.monotonic() + time_limit
+    rng = random.Random(seed)
+    state = _Schedule(problem, rng)
+    allowed = problem['allowed']
+
+    # 1. Greedy, most constrained lessons first (fewest allowed slots, busiest faculty/groups)
+    load = {}
+    for lesson, section_index in enumerate(problem['lessons']):
+        section = problem['sections'][section_index]
+        for key in [('f', section['faculty_id'])] + [('g', g) for g in section['groups']]:
+            load[key] = load.get(key, 0) + 1
+
+    def pressure(lesson):
+        section = problem['sections'][problem['lessons'][lesson]]
+        busiest = max([load[('f', section['faculty_id'])]] + [load[('g', g)] for g in section['groups']])
+        return (len(allowed[lesson]) - busiest, rng.random())
+
+    unplaced = []
+    for lesson in sorted(range(len(problem['lessons'])), key=pressure):
+        best, best_cost = None, None
+        for slot in allowed[lesson]:
+            if not state.is_free(lesson, slot):
+                continue
+            cost = state.soft_cost(lesson, slot) + rng.random()
+            if best_cost is None or cost < best_cost:
+                best, best_cost = slot, cost
+        if best is None:
+            unplaced.append(lesson)
+        else:
+            state.place(lesson, best)
+
+    # 2. Min-conflicts repair: place a leftover lesson where it evicts the fewest others
+    tabu = {}
+    iteration = 0
+    while unplaced and time.monotonic() < deadline:
+        iteration += 1
+        lesson = unplaced.pop(rng.randrange(len(unplaced)))
+        best, best_blockers, best_cost = None, None, None
+        for slot in allowed[lesson]:
+            if tabu.get((lesson, slot), 0) > iteration:
+                continue
+            blockers = state.blockers(lesson, slot)
+            if blockers is None:
+                continue
+            cost = len(blockers) * 100 + state.soft_cost(lesson, slot) + rng.random() * 50
+            if best_cost is None or cost < best_cost:
+                best, best_blockers, best_cost = slot, blockers, cost
+        if best is None:
+            unplaced.append(lesson)
+            continue
+        for other in best_blockers:
+            tabu[(other, state.unplace(other))] = iteration + TABU_TENURE
+            unplaced.append(other)
+        state.place(lesson, best)
+
+    # 3. Hill climbing on the soft penalty: move lessons to free slots that cost less
+    improved = True
+    while improved and not unplaced and time.monotonic() < deadline:
+        improved = False
+        for lesson in rng.sample(range(len(problem['lessons'])), len(problem['lessons'])):
+            current = state.unplace(lesson)
+            current_cost = state.soft_cost(lesson, current)
+            best, best_cost = current, current_cost
+            for slot in allowed[lesson]:
+                if slot != current and state.is_free(lesson, slot):
+                    cost = state.soft_cost(lesson, slot)
+                    if cost < best_cost:
+                        best, best_cost = slot, cost
+            state.place(lesson, best)
+            if best != current:
+                improved = True
+            if time.monotonic() >= deadline:
+                break
+
+    return {'assign': state.assign, 'unplaced': len(unplaced), 'penalty': state.penalty(), 'seed': seed}
+
+
+def generate(problem, restarts=SCHEDULE_WORKERS, workers=SCHEDULE_WORKERS, time_limit=SCHEDULE_TIME_LIMIT):
+    """
+    Run independent restarts (in parallel when workers > 1) and keep the best.
+
+    Returns:
+        dict: Best result of solve(), fewest unplaced lessons first, then lowest penalty
+    """
+    seeds = list(range(max(1, restarts)))
+    if workers > 1 and len(seeds) > 1:
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(seeds)), mp_context=ctx) as pool:
+            results = list(pool.map(solve, [problem] * len(seeds), seeds, [time_limit] * len(seeds)))
+    else:
+        results = [solve(problem, seed, time_limit) for seed in seeds]
+    return min(results, key=lambda r: (r['unplaced'], r['penalty']))
+
+
+def to_rows(problem, result):
+    """Convert a solve() result to Class_Timetable rows (unplaced lessons are skipped)."""
+    rows = []
+    for lesson, placed in enumerate(result['assign']):
+        if placed is None:
+            continue
+        slot, room = placed
+        section = problem['sections'][problem['lessons'][lesson]]
+        day, start, end = slot_label(slot, problem['periods'])
+        rows.append({'dept_id': section['dept_id'], 'faculty_id': section['faculty_id'],
+                     'subject_id': section['subject_id'], 'day_of_week': day,
+                     'start_time': start, 'end_time': end, 'location': room})
+    rows.sort(key=lambda r: (r['dept_id'], timetable.DAYS.index(r['day_of_week']), r['start_time'], r['location']))
+    return rows
+
+
+def student_cohorts(pairs):
+    """
+    Group students by the set of subjects they take.
+
+    A cohort whose subjects are a subset of another cohort's adds no constraint
+    and is dropped, as are single-subject cohorts.
+
+    Args:
+        pairs (iterable): (student_id, subject_id) enrollments
+
+    Returns:
+        dict: subject_id -> list of ('cohort', n) group keys
+    """
+    subjects_by_student = {}
+    for student_id, subject_id in pairs:
+        subjects_by_student.setdefault(student_id, set()).add(subject_id)
+
+    kept = []
+    for subjects in sorted({frozenset(s) for s in subjects_by_student.values()},
+                           key=lambda s: (-len(s), sorted(s))):
+        if len(subjects) > 1 and not any(subjects <= other for other in kept):
+            kept.append(subjects)
+
+    groups = {}
+    for n, subjects in enumerate(kept):
+        for subject_id in subjects:
+            groups.setdefault(subject_id, []).append(('cohort', n))
+    return groups
+
+
+def load_problem(db, dept_id=None, assignments=None, rooms=None, availability=None, term=CURRENT_TERM):
+    """
+    Build a problem from the database.
+
+    Args:
+        db: MySQL connection
+        dept_id (int): Only schedule this department; other classes stay fixed
+        assignments (list): Dicts with subject_id, faculty_id and optional hours; defaults
+                            to the (subject, faculty) pairs in the current timetable
+        rooms (list): Room names; defaults to the locations in the current timetable
+        availability (dict): faculty_id -> list of {day, start, end} windows
+        term (str): Term whose Enrollment defines the student cohorts
+
+    Returns:
+        dict: Problem passed to generate()
+    """
+    cursor = db.cursor(dictionary=True)
+    if not assignments:
+        cursor.execute("SELECT DISTINCT subject_id, faculty_id FROM Class_Timetable")
+        assignments = cursor.fetchall()
+
+    cursor.execute("SELECT subject_id, dept_id, credits FROM Subjects")
+    subjects = {row['subject_id']: row for row in cursor.fetchall()}
+
+    cursor.execute("SELECT student_id, subject_id FROM Enrollment WHERE term = %s", (term,))
+    cohorts = student_cohorts((row['student_id'], row['subject_id']) for row in cursor.fetchall())
+
+    sections = []
+    for item in assignments:
+        subject = subjects.get(int(item['subject_id']))
+        if subject is None or (dept_id and subject['dept_id'] != dept_id):
+            continue
+        sections.append({'subject_id': subject['subject_id'], 'faculty_id': int(item['faculty_id']),
+                         'dept_id': subject['dept_id'], 'groups': cohorts.get(subject['subject_id'], []),
+                         'hours': int(item.get('hours') or hours_for_credits(subject['credits'])),
+                         'room': item.get('room')})
+
+    if not rooms:
+        cursor.execute("SELECT DISTINCT location FROM Class_Timetable WHERE location IS NOT NULL AND location <> ''")
+        rooms = [row['location'] for row in cursor.fetchall()]
+
+    fixed = []
+    if dept_id:
+        cursor.execute(timetable.TIMETABLE_QUERY + " WHERE dept_id <> %s", (dept_id,))
+        fixed = [dict(row, groups=cohorts.get(row['subject_id'], [])) for row in cursor.fetchall()]
+    cursor.close()
+
+    return build_problem(sections, rooms, availability, fixed)
+
+
+def write_schedule(db, rows, dept_id=None):
+    """
+    Replace the timetable (or one department's part of it) in a single transaction.
+
+    Args:
+        db: MySQL connection
+        rows (list): Output of to_rows()
+        dept_id (int): Only replace this department's classes
+    """
+    cursor = db.cursor()
+    try:
+        # First, so the Table_Version row lock serializes this with the timetable write routes
+        bump_versions(cursor, 'Class_Timetable')
+        if dept_id:
+            cursor.execute("DELETE FROM Class_Timetable WHERE dept_id = %s", (dept_id,))
+        else:
+            cursor.execute("DELETE FROM Class_Timetable")
+        cursor.executemany("""
+            INSERT INTO Class_Timetable (dept_id, faculty_id, subject_id, day_of_week, start_time, end_time, location)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, [(r['dept_id'], r['faculty_id'], r['subject_id'], r['day_of_week'],
+               r['start_time'], r['end_time'], r['location']) for r in rows])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+# --- Background jobs ---
+
+class JobBusy(Exception):
+    """Another generation job holds JOB_LOCK."""
+
+
+def _job_path(job_id):
+    return os.path.join(SCHEDULE_JOB_DIR, f"{job_id}.json")
+
+
+def load_job(job_id, db=None):
+    """
+    Return the job's state dict, or None if the job does not exist.
+
+    With a connection, a queued/running job whose owner no longer holds
+    JOB_LOCK (its worker was recycled or killed) is marked failed.
+    """
+    if not job_id or not all(c.isalnum() for c in job_id):
+        return None
+    try:
+        with open(_job_path(job_id), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    if db is not None and state['status'] in ('queued', 'running'):
+        cursor = db.cursor()
+        cursor.execute("SELECT IS_USED_LOCK(%s)", (JOB_LOCK,))
+        holder = cursor.fetchone()[0]
+        cursor.close()
+        if holder != state['connection_id']:
+            # The owner saves its final state before releasing the lock: re-read first
+            with open(_job_path(job_id), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state['status'] in ('queued', 'running'):
+                state.update(status='failed', error='Job was interrupted (its worker stopped)',
+                             finished_at=datetime.now().isoformat())
+                _save_job(state)
+    return state
+
+
+def _save_job(state):
+    path = _job_path(state['job_id'])
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def run_job(job_id, db, options, writer=write_schedule):
+    """
+    Load, solve and (optionally) write one generation request.
+
+    Args:
+        job_id (str): Job created by start_job()
+        db: MySQL connection holding JOB_LOCK; closed (releasing the lock) at the end
+        options (dict): assignments, rooms and availability passed to load_problem()
+        writer (callable): writer(db, rows, dept_id) replaces the timetable
+    """
+    state = load_job(job_id)
+    state['status'] = 'running'
+    _save_job(state)
+
+    try:
+        problem = load_problem(db, state['dept_id'], options.get('assignments'), options.get('rooms'),
+                               options.get('availability'))
+        # Do not keep the read snapshot open while the solver runs
+        db.commit()
+        if not problem['lessons']:
+            raise ValueError('No subject/faculty assignments to schedule')
+
+        result = generate(problem, time_limit=state['time_limit'])
+        state.update(lessons=len(problem['lessons']), unplaced=result['unplaced'],
+                     penalty=result['penalty'], timetable=to_rows(problem, result))
+        if state['write']:
+            if result['unplaced']:
+                raise ValueError(f"{result['unplaced']} lessons could not be placed")
+            writer(db, state['timetable'], state['dept_id'])
+            state['written'] = True
+        state['status'] = 'completed'
+    except Exception as e:
+        print(f"Error in timetable job {job_id}: {e}")
+        state.update(status='failed', error=str(e))
+    finally:
+        state['finished_at'] = datetime.now().isoformat()
+        _save_job(state)
+        db.close()
+
+
+def start_job(connect, dept_id=None, time_limit=SCHEDULE_TIME_LIMIT, write=False, options=None,
+              writer=write_schedule):
+    """
+    Create a generation job and run it in a background thread.
+
+    The job's own connection takes the MySQL named lock JOB_LOCK, so only one
+    job runs at a time across all workers and hosts; the lock is released when
+    the job closes the connection, or by MySQL if its worker dies.
+
+    Args:
+        connect (callable): Returns a new MySQL connection
+        dept_id (int): Only reschedule this department
+        time_limit (float): Seconds per restart, capped at MAX_TIME_LIMIT
+        write (bool): Replace Class_Timetable with the result if every lesson is placed
+        options (dict): assignments, rooms and availability passed to load_problem()
+        writer (callable): writer(db, rows, dept_id) replaces the timetable
+
+    Returns:
+        dict: The job's state
+
+    Raises:
+        JobBusy: Another job is still running
+    """
+    db = connect()
+    try:
+        cursor = db.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, 0), CONNECTION_ID()", (JOB_LOCK,))
+        acquired, connection_id = cursor.fetchone()
+        cursor.close()
+        if acquired != 1:
+            raise JobBusy('A timetable job is already running')
+
+        job_id = uuid.uuid4().hex
+        os.makedirs(SCHEDULE_JOB_DIR, exist_ok=True)
+        state = {'job_id': job_id, 'dept_id': dept_id, 'time_limit': min(time_limit, MAX_TIME_LIMIT),
+                 'write': bool(write), 'status': 'queued', 'lessons': None, 'unplaced': None,
+                 'penalty': None, 'written': False, 'timetable': None, 'error': None,
+                 'connection_id': connection_id,
+                 'created_at': datetime.now().isoformat(), 'finished_at': None}
+        _save_job(state)
+    except Exception:
+        db.close()
+        raise
+    threading.Thread(target=run_job, args=(job_id, db, options or {}, writer), daemon=True).start()
+    return state
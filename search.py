@@ -0,0 +1,358 @@
+"""
+In-memory search index for ERP Cell system.
+Students, faculty and subjects are indexed by the words of their names,
+emails, usernames and codes so the admin search box can query one endpoint
+instead of downloading whole tables.
+
+Lookups use:
+    - a sorted list of distinct tokens, searched with bisect for prefixes
+    - per-token postings sorted by label, plus key sets for intersections
+    - a trigram -> tokens map over alphabetic tokens, a fuzzy fallback for typos
+
+The index is per process: admin write paths refresh the entity they
+touched, and a periodic rebuild picks up writes made by other workers.
+"""
+
+import heapq
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+# Seconds between full rebuilds (covers writes made by other worker processes)
+SEARCH_REBUILD_INTERVAL = int(os.environ.get('SEARCH_REBUILD_INTERVAL', 600))
+
+# Upper bound on results per query
+MAX_RESULTS = 50
+
+# Distinct tokens examined per query term for prefix matches. Words (name parts)
+# are a small vocabulary; tokens with digits (usernames, codes) are mostly unique
+MAX_PREFIX_WORDS = 1000
+MAX_PREFIX_TOKENS = 200
+
+# Minimum trigram similarity for a fuzzy match
+FUZZY_THRESHOLD = 0.3
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+ENTITY_QUERIES = {
+    'student': """
+        SELECT s.student_id, CONCAT(s.first_name, ' ', s.last_name), s.email,
+               GROUP_CONCAT(u.username SEPARATOR ' '), NULL
+        FROM Student_Info s
+        LEFT JOIN User_Credentials u ON u.student_ref_id = s.student_id
+        {where}
+        GROUP BY s.student_id
+    """,
+    'faculty': """
+        SELECT f.faculty_id, CONCAT(f.first_name, ' ', f.last_name), f.email,
+               GROUP_CONCAT(u.username SEPARATOR ' '), f.faculty_code
+        FROM Faculty_Info f
+        LEFT JOIN User_Credentials u ON u.faculty_ref_id = f.faculty_id
+        {where}
+        GROUP BY f.faculty_id
+    """,
+    'subject': """
+        SELECT subject_id, subject_name, NULL, NULL, subject_code
+        FROM Subjects
+        {where}
+    """,
+}
+
+ENTITY_KEYS = {'student': 's.student_id', 'faculty': 'f.faculty_id', 'subject': 'subject_id'}
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens."""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def trigrams(token):
+    """Return the set of padded trigrams of a token."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+
+class SearchIndex:
+    """Token index over (kind, id) entities with prefix and trigram lookup."""
+
+    def __init__(self, rebuild_interval=SEARCH_REBUILD_INTERVAL):
+        self.rebuild_interval = rebuild_interval
+        self._docs = {}
+        self._doc_tokens = {}
+        self._postings = {}
+        self._keysets = {}
+        self._sorted_words = []
+        self._sorted_tokens = []
+        self._trigrams = {}
+        self._built_at = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    # --- Maintenance -------------------------------------------------------
+
+    @staticmethod
+    def _entity(kind, entity_id, label, email=None, usernames=None, code=None):
+        """Return (key, tokens, result doc) for one entity."""
+        key = (kind, int(entity_id))
+        tokens = frozenset(tokenize(label) + tokenize(email) + tokenize(usernames) + tokenize(code))
+        doc = {'type': kind, 'id': int(entity_id), 'label': label, 'detail': code or email or ''}
+        return key, tokens, doc
+
+    def add(self, kind, entity_id, label, email=None, usernames=None, code=None):
+        """
+        Insert or replace one entity.
+
+        Args:
+            kind (str): 'student', 'faculty' or 'subject'
+            entity_id (int): Primary key of the entity
+            label (str): Display name (full name or subject name)
+            email (str): Email address, if any
+            usernames (str): Space-separated login usernames, if any
+            code (str): Faculty or subject code, if any
+        """
+        key, tokens, doc = self._entity(kind, entity_id, label, email, usernames, code)
+        entry = (label.lower(), key)
+        with self._lock:
+            self._remove(key)
+            self._docs[key] = doc
+            self._doc_tokens[key] = tokens
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is not None:
+                    insort(postings, entry)
+                    self._keysets[token].add(key)
+                    continue
+                self._postings[token] = [entry]
+                self._keysets[token] = {key}
+                if not token.isalpha():
+                    insort(self._sorted_tokens, token)
+                if token.isalpha():
+                    insort(self._sorted_words, token)
+                    for gram in trigrams(token):
+                        self._trigrams.setdefault(gram, set()).add(token)
+
+    def remove(self, kind, entity_id):
+        """Drop one entity; a no-op if it is not indexed."""
+        with self._lock:
+            self._remove((kind, int(entity_id)))
+
+    def _remove(self, key):
+        tokens = self._doc_tokens.pop(key, None)
+        if tokens is None:
+            return
+        entry = (self._docs.pop(key)['label'].lower(), key)
+        for token in tokens:
+            postings = self._postings[token]
+            del postings[bisect_left(postings, entry)]
+            self._keysets[token].discard(key)
+            if postings:
+                continue
+            del self._postings[token]
+            del self._keysets[token]
+            if not token.isalpha():
+                del self._sorted_tokens[bisect_left(self._sorted_tokens, token)]
+                continue
+            del self._sorted_words[bisect_left(self._sorted_words, token)]
+            for gram in trigrams(token):
+                grams = self._trigrams[gram]
+                grams.discard(token)
+                if not grams:
+                    del self._trigrams[gram]
+
+    def load(self, entities):
+        """
+        Replace the whole index in one bulk pass.
+
+        Args:
+            entities (iterable): (kind, id, label, email, usernames, code) tuples
+        """
+        docs, doc_tokens, postings, grams = {}, {}, {}, {}
+        for row in entities:
+            key, tokens, doc = self._entity(*row)
+            docs[key] = doc
+            doc_tokens[key] = tokens
+            entry = (doc['label'].lower(), key)
+            for token in tokens:
+                postings.setdefault(token, []).append(entry)
+        for token, entries in postings.items():
+            entries.sort()
+            if token.isalpha():
+                for gram in trigrams(token):
+                    grams.setdefault(gram, set()).add(token)
+        keysets = {token: {key for _label, key in entries} for token, entries in postings.items()}
+        sorted_words = sorted(token for token in postings if token.isalpha())
+        sorted_tokens = sorted(token for token in postings if not token.isalpha())
+
+        with self._lock:
+            self._docs, self._doc_tokens = docs, doc_tokens
+            self._postings, self._keysets = postings, keysets
+            self._sorted_words, self._sorted_tokens = sorted_words, sorted_tokens
+            self._trigrams = grams
+            self._built_at = time.monotonic()
+
+    def build(self, db):
+        """
+        Rebuild the whole index from MySQL.
+
+        Args:
+            db: MySQL connection
+        """
+        cursor = db.cursor()
+        rows = []
+        for kind, query in ENTITY_QUERIES.items():
+            cursor.execute(query.format(where=''))
+            rows.extend((kind, *row) for row in cursor.fetchall())
+        cursor.close()
+        self.load(rows)
+
+    def refresh(self, db, kind, entity_id):
+        """
+        Re-read one entity after a write; removes it if it no longer exists.
+
+        Args:
+            db: MySQL connection
+            kind (str): 'student', 'faculty' or 'subject'
+            entity_id (int): Primary key of the entity
+        """
+        if self._built_at is None:
+            return
+        cursor = db.cursor()
+        cursor.execute(ENTITY_QUERIES[kind].format(where=f"WHERE {ENTITY_KEYS[kind]} = %s"), (entity_id,))
+        row = cursor.fetchone()
+        cursor.close()
+        if row:
+            self.add(kind, *row)
+        else:
+            self.remove(kind, entity_id)
+
+    def ensure_fresh(self, db):
+        """Build the index on first use and rebuild it once it is older than the interval."""
+        if self._built_at is None or time.monotonic() - self._built_at > self.rebuild_interval:
+            self.build(db)
+
+    # --- Queries -----------------------------------------------------------
+
+    @staticmethod
+    def _prefix_scan(vocabulary, term, cap, scores):
+        """Score up to `cap` tokens of a sorted vocabulary that start with term."""
+        start = bisect_left(vocabulary, term)
+        for token in vocabulary[start:start + cap]:
+            if not token.startswith(term):
+                break
+            scores[token] = 1.0 + len(term) / len(token)
+
+    def _term_tokens(self, term):
+        """
+        Map the indexed tokens matching one query term to a score.
+
+        Exact matches score 2 and prefixes 1-2. Only a term with no prefix
+        match at all falls back to trigram similarity (scores below 1).
+        """
+        scores = {}
+        self._prefix_scan(self._sorted_words, term, MAX_PREFIX_WORDS, scores)
+        # Identifiers with digits (usernames, codes) are only searched for terms
+        # that look like one; "john" should not expand to every "john123"
+        if not scores or not term.isalpha():
+            self._prefix_scan(self._sorted_tokens, term, MAX_PREFIX_TOKENS, scores)
+
+        if not scores and len(term) >= 3 and term.isalpha():
+            grams = trigrams(term)
+            shared = {}
+            for gram in grams:
+                for token in self._trigrams.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            for token, count in shared.items():
+                similarity = count / (len(grams) + len(token) + 1 - count)
+                if similarity >= FUZZY_THRESHOLD and token not in scores:
+                    scores[token] = similarity
+        return scores
+
+    def _collect(self, terms, wanted, kinds):
+        """
+        Find entities matching every term, as a {key: score} dict.
+
+        A single term walks the postings of its best tokens in score order and
+        stops after `wanted` hits, so the cost does not grow with the number
+        of entities sharing a common name. Several terms start from the key
+        set of the rarest term and intersect it with each matching token of
+        the others, crediting every candidate with its best score per term.
+        """
+        term_tokens = [sorted(self._term_tokens(term).items(), key=lambda item: -item[1])
+                       for term in terms]
+        if not all(term_tokens):
+            return {}
+
+        if len(term_tokens) == 1:
+            found = {}
+            for token, score in term_tokens[0]:
+                for _label, key in self._postings[token]:
+                    if key in found or (kinds and key[0] not in kinds):
+                        continue
+                    found[key] = score
+                    if len(found) >= wanted:
+                        return found
+            return found
+
+        # Start from the rarest term and narrow it with each of the others
+        term_tokens.sort(key=lambda tokens: sum(len(self._keysets[t]) for t, _score in tokens))
+        first = [self._keysets[t] for t, _score in term_tokens[0]]
+        candidates = first[0] if len(first) == 1 else set().union(*first)
+        if kinds:
+            candidates = {key for key in candidates if key[0] in kinds}
+
+        found = {}
+        for tokens in term_tokens[1:]:
+            matched = {}
+            for token, score in tokens:
+                for key in candidates.intersection(self._keysets[token]):
+                    if key not in matched:
+                        matched[key] = score
+            for key, score in matched.items():
+                found[key] = found.get(key, 0.0) + score
+            candidates = set(matched)
+            if not candidates:
+                return {}
+
+        # Credit the rarest term last, now that only the final candidates remain
+        pending = set(candidates)
+        for token, score in term_tokens[0]:
+            hits = pending.intersection(self._keysets[token])
+            for key in hits:
+                found[key] += score
+            pending -= hits
+            if not pending:
+                break
+        return {key: found[key] for key in candidates}
+
+    def search(self, query, limit=10, kinds=None):
+        """
+        Return the top matches for a free-text query.
+
+        Every query word must match a word of the entity, as a prefix or (when
+        nothing starts with it) as a near-miss by trigram similarity.
+
+        Args:
+            query (str): User input, e.g. "jo smi" or "cse10"
+            limit (int): Number of results (capped at MAX_RESULTS)
+            kinds (set): Optional subset of {'student', 'faculty', 'subject'}
+
+        Returns:
+            list: Result dicts (type, id, label, detail, score), best first
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        limit = max(1, min(int(limit), MAX_RESULTS))
+        # Oversample so ties on the driving term can still be reordered by the others
+        wanted = limit * 3
+
+        with self._lock:
+            found = self._collect(terms, wanted, kinds)
+            best = heapq.nsmallest(limit, found.items(),
+                                   key=lambda item: (-item[1], self._docs[item[0]]['label']))
+            return [dict(self._docs[key], score=round(score, 3)) for key, score in best]
@@ -375,7 +375,7 @@ async function saveFaculty(event) {
         first_name: formData.get('first_name'),
         last_name: formData.get('last_name'),
         gender: formData.get('gender'),
-        department: formData.get('department'),
+        dept_id: parseInt(formData.get('dept_id')),
         email: formData.get('email'),
         phone_number: formData.get('phone_number'),
         hire_date: formData.get('hire_date'),
@@ -423,7 +423,7 @@ function editFaculty(facultyId) {
     form.first_name.value = f.first_name;
     form.last_name.value = f.last_name;
     form.gender.value = f.gender;
-    form.department.value = f.department;
+    form.dept_id.value = f.dept_id;
     form.email.value = f.email;
     form.phone_number.value = f.phone_number;
     form.hire_date.value = f.hire_date;
@@ -795,14 +795,14 @@ function viewFeeBreakdown(studentId, breakdown) {
 // ============================================
 async function loadDepartmentOptions(selectId) {
     try {
-        const response = await fetch('/api/admin/departments');
+        const response = await fetch('/api/admin/departments?fields=dept_id,dept_name');
         const data = await response.json();
         
         if (data.success) {
             const select = document.getElementById(selectId);
             select.innerHTML = '<option value="">Select Department</option>' +
                 data.departments.map(dept => 
-                    `<option value="${dept.dept_name}">${dept.dept_name}</option>`
+                    `<option value="${dept.dept_id}">${dept.dept_name}</option>`
                 ).join('');
         }
     } catch (error) {
@@ -874,32 +874,50 @@ function setupEventListeners() {
     // Student search
     const studentSearch = document.getElementById('student-search');
     if (studentSearch) {
-        studentSearch.addEventListener('input', function() {
-            const query = this.value.toLowerCase();
-            const filtered = students.filter(s => 
-                s.first_name.toLowerCase().includes(query) ||
-                s.last_name.toLowerCase().includes(query) ||
-                s.student_id.toString().includes(query)
-            );
-            renderStudentsTable(filtered);
-        });
+        studentSearch.addEventListener('input', debounce(async function() {
+            const ids = await searchIds(this.value, 'student');
+            renderStudentsTable(ids ? rankedSubset(students, 'student_id', ids) : students);
+        }, 200));
     }
     
     // Faculty search
     const facultySearch = document.getElementById('faculty-search');
     if (facultySearch) {
-        facultySearch.addEventListener('input', function() {
-            const query = this.value.toLowerCase();
-            const filtered = faculty.filter(f => 
-                f.first_name.toLowerCase().includes(query) ||
-                f.last_name.toLowerCase().includes(query) ||
-                f.faculty_code.toLowerCase().includes(query)
-            );
-            renderFacultyTable(filtered);
-        });
+        facultySearch.addEventListener('input', debounce(async function() {
+            const ids = await searchIds(this.value, 'faculty');
+            renderFacultyTable(ids ? rankedSubset(faculty, 'faculty_id', ids) : faculty);
+        }, 200));
+    }
+}
+
+// Ask the server-side search index for matching ids, best match first (null = no query)
+async function searchIds(query, type) {
+    query = query.trim();
+    if (!query) return null;
+    try {
+        const params = new URLSearchParams({ q: query, type: type, limit: 50 });
+        const response = await fetch(`/api/admin/search?${params}`);
+        const data = await response.json();
+        return data.success ? data.results.map(r => r.id) : [];
+    } catch (error) {
+        console.error('Error searching:', error);
+        return [];
     }
 }
 
+function rankedSubset(rows, idField, ids) {
+    const byId = new Map(rows.map(row => [row[idField], row]));
+    return ids.map(id => byId.get(id)).filter(Boolean);
+}
+
+function debounce(fn, wait) {
+    let timer;
+    return function(...args) {
+        clearTimeout(timer);
+        timer = setTimeout(() => fn.apply(this, args), wait);
+    };
+}
+
 // Close modals when clicking outside
 window.addEventListener('click', function(event) {
     if (event.target.classList.contains('modal')) {
@@ -4,6 +4,7 @@ let currentFacultyId = null;
 let currentSubjects = [];
 let attendanceData = [];
 let marksData = [];
+let gradingPolicy = null;
 
 // Initialize on page load
 document.addEventListener('DOMContentLoaded', function() {
@@ -23,15 +24,17 @@ async function getFacultyIdFromSession() {
             // Set today's date in attendance picker
             document.getElementById('attendance-date').valueAsDate = new Date();
             
-            // Load initial data
-            loadFacultyProfile();
-            loadDashboardStats();
+            // Load initial data (profile, stats and classes in one request)
+            loadInitialData();
             
             // Setup navigation
             setupNavigation();
             
             // Setup event listeners
             setupEventListeners();
+            
+            // Subscribe to live updates instead of polling
+            setupLiveUpdates();
         } else {
             showNotification('Error: Unable to load faculty information', 'error');
             console.error('Not a faculty user or failed to load user info');
@@ -42,6 +45,36 @@ async function getFacultyIdFromSession() {
     }
 }
 
+// Refresh dashboard stats when the server pushes a change notification
+function setupLiveUpdates() {
+    if (!window.EventSource) return;
+    
+    openLiveStream(source => {
+        ['marks', 'attendance', 'resync'].forEach(eventType => {
+            source.addEventListener(eventType, () => loadDashboardStats());
+        });
+    }, loadDashboardStats);
+}
+
+// Open /api/stream and keep it open. EventSource gives up for good on a
+// non-200 answer (503 when the worker is full), so reconnect with backoff and
+// resync after a reconnect, since events may have been missed meanwhile.
+function openLiveStream(subscribe, onReconnect, delay = 2000) {
+    const source = new EventSource('/api/stream');
+    let reconnected = false;
+    subscribe(source);
+    source.addEventListener('ready', () => {
+        if (reconnected || delay > 2000) onReconnect();
+        reconnected = true;
+        delay = 2000;
+    });
+    source.onerror = () => {
+        if (source.readyState !== EventSource.CLOSED) return;
+        const wait = delay * (0.5 + Math.random());
+        setTimeout(() => openLiveStream(subscribe, onReconnect, Math.min(delay * 2, 60000)), wait);
+    };
+}
+
 function setupNavigation() {
     const navItems = document.querySelectorAll('.nav-item');
     
@@ -129,44 +162,91 @@ function setupEventListeners() {
 
 // API Calls
 
-async function loadFacultyProfile() {
+// Run several GET calls in one round trip; resolves to their JSON bodies in order
+async function batchGet(paths) {
+    const response = await fetch('/api/batch', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ requests: paths })
+    });
+    const data = await response.json();
+    if (!data.success) throw new Error(data.message || 'Batch request failed');
+    return data.responses.map(r => r.body || {});
+}
+
+// POST JSON with an Idempotency-Key, retrying network failures; a retry of a
+// submission that already reached the server gets the stored response back
+async function postWithRetry(url, payload, attempts = 3) {
+    const key = (window.crypto && crypto.randomUUID)
+        ? crypto.randomUUID()
+        : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    for (let i = 1; ; i++) {
+        try {
+            return await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', 'Idempotency-Key': key },
+                body: JSON.stringify(payload)
+            });
+        } catch (error) {
+            if (i >= attempts) throw error;
+            await new Promise(resolve => setTimeout(resolve, 500 * i));
+        }
+    }
+}
+
+async function loadInitialData() {
     try {
-        const response = await fetch(`/api/profile/${currentFacultyId}/Faculty`);
-        const data = await response.json();
-        
-        if (data.first_name && data.last_name) {
-            document.getElementById('faculty-name').textContent = 
-                `${data.first_name} ${data.last_name}`;
+        const [profileData, statsData, classesData] = await batchGet([
+            `/api/profile/${currentFacultyId}/Faculty?fields=first_name,last_name`,
+            `/api/faculty/dashboard/stats/${currentFacultyId}`,
+            `/api/faculty/classes/${currentFacultyId}`
+        ]);
+        renderFacultyName(profileData);
+        renderDashboardStats(statsData);
+        if (classesData.success) {
+            currentSubjects = classesData.subjects || [];
+            displayClasses(currentSubjects);
         }
     } catch (error) {
-        console.error('Error loading faculty profile:', error);
+        console.error('Error loading dashboard:', error);
+        showNotification('Error loading dashboard data', 'error');
+    }
+}
+
+function renderFacultyName(data) {
+    const profile = data.data || {};
+    if (profile.first_name && profile.last_name) {
+        document.getElementById('faculty-name').textContent = 
+            `${profile.first_name} ${profile.last_name}`;
     }
 }
 
 async function loadDashboardStats() {
     try {
         const response = await fetch(`/api/faculty/dashboard/stats/${currentFacultyId}`);
-        const data = await response.json();
-        
-        if (data.success) {
-            document.getElementById('total-subjects').textContent = data.total_subjects || 0;
-            document.getElementById('total-students-taught').textContent = data.total_students || 0;
-            document.getElementById('classes-today').textContent = data.classes_today || 0;
-            document.getElementById('avg-attendance').textContent = 
-                (data.avg_attendance || 0) + '%';
-            
-            // Load today's classes
-            loadTodayClasses(data.today_classes || []);
-            
-            // Load recent activities
-            loadRecentActivities(data.recent_activities || []);
-        }
+        renderDashboardStats(await response.json());
     } catch (error) {
         console.error('Error loading dashboard stats:', error);
         showNotification('Error loading dashboard data', 'error');
     }
 }
 
+function renderDashboardStats(data) {
+    if (data.success) {
+        document.getElementById('total-subjects').textContent = data.total_subjects || 0;
+        document.getElementById('total-students-taught').textContent = data.total_students || 0;
+        document.getElementById('classes-today').textContent = data.classes_today || 0;
+        document.getElementById('avg-attendance').textContent = 
+            (data.avg_attendance || 0) + '%';
+        
+        // Load today's classes
+        loadTodayClasses(data.today_classes || []);
+        
+        // Load recent activities
+        loadRecentActivities(data.recent_activities || []);
+    }
+}
+
 function loadTodayClasses(classes) {
     const container = document.getElementById('today-classes');
     
@@ -238,10 +318,18 @@ function displayClasses(subjects) {
     `).join('');
 }
 
+// Subjects for the attendance/marks pickers; reuses the classes list when it is loaded
+async function loadSubjectOptions() {
+    if (currentSubjects.length > 0) {
+        return { success: true, subjects: currentSubjects };
+    }
+    const response = await fetch(`/api/faculty/classes/${currentFacultyId}?fields=subject_id,subject_code,subject_name`);
+    return response.json();
+}
+
 async function loadSubjectsForAttendance() {
     try {
-        const response = await fetch(`/api/faculty/classes/${currentFacultyId}`);
-        const data = await response.json();
+        const data = await loadSubjectOptions();
         
         if (data.success) {
             const select = document.getElementById('attendance-subject');
@@ -341,19 +429,26 @@ async function saveAttendance() {
     }
     
     try {
-        const response = await fetch('/api/faculty/attendance', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                subject_id: subjectId,
-                date: date,
-                attendance: attendanceData
-            })
+        const response = await postWithRetry('/api/faculty/attendance', {
+            subject_id: subjectId,
+            date: date,
+            attendance: attendanceData
         });
         
         const data = await response.json();
         
-        if (data.success) {
+        if (data.success && data.submission_id) {
+            // Group-commit mode: the server journaled it; wait for the database write
+            showNotification('Attendance queued, saving...', 'success');
+            const submission = await waitForSubmission(data.status_url);
+            if (submission && submission.status === 'failed') {
+                showNotification(`Attendance was not saved: ${submission.error}`, 'error');
+            } else if (!submission) {
+                showNotification('Attendance queued; it will be saved shortly', 'success');
+            } else {
+                showNotification('Attendance saved successfully', 'success');
+            }
+        } else if (data.success) {
             showNotification('Attendance saved successfully', 'success');
         } else {
             showNotification(data.message || 'Failed to save attendance', 'error');
@@ -364,10 +459,23 @@ async function saveAttendance() {
     }
 }
 
+async function waitForSubmission(statusUrl, attempts = 20) {
+    // Poll a queued submission until it is committed or failed (null if still queued)
+    for (let i = 0; i < attempts; i++) {
+        await new Promise(resolve => setTimeout(resolve, Math.min(250 * (i + 1), 2000)));
+        const response = await fetch(statusUrl);
+        if (!response.ok) continue;
+        const data = await response.json();
+        if (data.submission && data.submission.status !== 'queued') {
+            return data.submission;
+        }
+    }
+    return null;
+}
+
 async function loadSubjectsForMarks() {
     try {
-        const response = await fetch(`/api/faculty/classes/${currentFacultyId}`);
-        const data = await response.json();
+        const data = await loadSubjectOptions();
         
         if (data.success) {
             const select = document.getElementById('marks-subject');
@@ -403,8 +511,10 @@ async function loadStudentsForMarks() {
                 name: `${student.first_name} ${student.last_name}`,
                 roll_no: `STU${String(student.student_id).padStart(4, '0')}`,
                 theory_marks: student.theory_marks || 0,
-                practical_marks: student.practical_marks || 0
+                practical_marks: student.practical_marks || 0,
+                grade: student.grade
             }));
+            gradingPolicy = data.grading_policy;
             
             displayMarksTable();
         }
@@ -419,7 +529,7 @@ function displayMarksTable() {
     
     tbody.innerHTML = marksData.map((student, index) => {
         const total = parseInt(student.theory_marks) + parseInt(student.practical_marks);
-        const grade = calculateGrade(total);
+        const grade = calculateGrade(student, total);
         
         return `
             <tr>
@@ -452,16 +562,28 @@ function updateMarks(index, type, value) {
     } else {
         marksData[index].practical_marks = parseInt(value) || 0;
     }
+    marksData[index].grade = null;
     displayMarksTable();
 }
 
-function calculateGrade(total) {
-    if (total >= 90) return { grade: 'A+', class: 'a-plus' };
-    if (total >= 80) return { grade: 'A', class: 'a' };
-    if (total >= 70) return { grade: 'B+', class: 'b-plus' };
-    if (total >= 60) return { grade: 'B', class: 'b' };
-    if (total >= 50) return { grade: 'C', class: 'c' };
-    return { grade: 'F', class: 'fail' };
+const GRADE_CLASSES = {
+    'A+': 'a-plus', 'A': 'a', 'B+': 'b-plus', 'B': 'b', 'C+': 'c-plus', 'C': 'c', 'D': 'd', 'F': 'fail'
+};
+
+// Preview under an absolute policy (cut-offs are percentages of the 200-mark total).
+// Curved and relative grades depend on the whole class, so those show the saved
+// grade until the marks are saved and the server re-grades the subject.
+function calculateGrade(student, total) {
+    let grade = student.grade || '-';
+    if (gradingPolicy && gradingPolicy.kind === 'absolute') {
+        const percent = total * 100 / 200;
+        let best = null;
+        Object.entries(gradingPolicy.cutoffs).forEach(([name, cutoff]) => {
+            if (percent >= cutoff && (best === null || cutoff > gradingPolicy.cutoffs[best])) best = name;
+        });
+        grade = best || 'F';
+    }
+    return { grade, class: GRADE_CLASSES[grade] || '' };
 }
 
 async function saveMarks() {
@@ -479,20 +601,17 @@ async function saveMarks() {
     }
     
     try {
-        const response = await fetch('/api/faculty/marks', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                subject_id: subjectId,
-                exam_type: examType,
-                marks: marksData
-            })
+        const response = await postWithRetry('/api/faculty/marks', {
+            subject_id: subjectId,
+            exam_type: examType,
+            marks: marksData
         });
         
         const data = await response.json();
         
         if (data.success) {
-            showNotification('Marks saved successfully', 'success');
+            showNotification(data.message, 'success');
+            loadStudentsForMarks();
         } else {
             showNotification(data.message || 'Failed to save marks', 'error');
         }
@@ -20,8 +20,58 @@ document.addEventListener('DOMContentLoaded', async function() {
   
   // Close modals when clicking outside
   setupModalCloseOnOutsideClick();
+  
+  // Subscribe to live updates instead of polling
+  if (currentStudent) {
+    setupLiveUpdates();
+  }
 });
 
+// Reload the affected section when the server pushes a change notification
+function setupLiveUpdates() {
+  if (!window.EventSource) return;
+  
+  const reloaders = {
+    marks: loadMarks,
+    attendance: loadAttendance,
+    fees: loadFees,
+    library: loadLibrary
+  };
+  const resync = () => {
+    const active = document.querySelector('.nav-item.active');
+    loadSectionData(active ? active.dataset.section : 'dashboard');
+  };
+  
+  openLiveStream(source => {
+    Object.keys(reloaders).forEach(eventType => {
+      source.addEventListener(eventType, () => {
+        reloaders[eventType]();
+        loadDashboardData();
+      });
+    });
+    source.addEventListener('resync', resync);
+  }, resync);
+}
+
+// Open /api/stream and keep it open. EventSource gives up for good on a
+// non-200 answer (503 when the worker is full), so reconnect with backoff and
+// resync after a reconnect, since events may have been missed meanwhile.
+function openLiveStream(subscribe, onReconnect, delay = 2000) {
+  const source = new EventSource('/api/stream');
+  let reconnected = false;
+  subscribe(source);
+  source.addEventListener('ready', () => {
+    if (reconnected || delay > 2000) onReconnect();
+    reconnected = true;
+    delay = 2000;
+  });
+  source.onerror = () => {
+    if (source.readyState !== EventSource.CLOSED) return;
+    const wait = delay * (0.5 + Math.random());
+    setTimeout(() => openLiveStream(subscribe, onReconnect, Math.min(delay * 2, 60000)), wait);
+  };
+}
+
 // Get current logged-in student
 async function getCurrentUser() {
   try {
@@ -103,14 +153,29 @@ async function loadSectionData(section) {
   }
 }
 
+// Run several GET calls in one round trip; resolves to their JSON bodies in order
+async function batchGet(paths) {
+  const response = await fetch('/api/batch', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ requests: paths })
+  });
+  const data = await response.json();
+  if (!data.success) throw new Error(data.message || 'Batch request failed');
+  return data.responses.map(r => r.body || {});
+}
+
 // Load dashboard data
 async function loadDashboardData() {
   if (!studentId) return;
   
   try {
-    // Load stats
-    const statsResponse = await fetch(`/api/student/quick-stats/${studentId}`);
-    const statsData = await statsResponse.json();
+    // Stats, academic overview and recent activities in one request
+    const [statsData, profileData, activityData] = await batchGet([
+      `/api/student/quick-stats/${studentId}`,
+      `/api/profile/${studentId}/Student?fields=department_name`,
+      `/api/student/recent-activity/${studentId}`
+    ]);
     
     if (statsData.success) {
       const stats = statsData.data;
@@ -120,34 +185,15 @@ async function loadDashboardData() {
       document.getElementById('library-books').textContent = stats.library_books || '0';
     }
     
-    // Load academic overview
-    const profileResponse = await fetch(`/api/profile/${studentId}/Student`);
-    const profileData = await profileResponse.json();
-    
     if (profileData.success) {
       const profile = profileData.data;
-      // Try to get department from first subject
-      const subjectsResponse = await fetch(`/api/student/subjects/${studentId}`);
-      const subjectsData = await subjectsResponse.json();
-      
-      let department = 'Technology';
-      if (subjectsData.success && subjectsData.data && subjectsData.data.length > 0) {
-        // Get department from Student_Results
-        const resultsResponse = await fetch(`/api/results/${studentId}`);
-        const resultsData = await resultsResponse.json();
-        if (resultsData.success && resultsData.data && resultsData.data.length > 0) {
-          department = resultsData.data[0].department || 'Technology';
-        }
-      }
-      
-      document.getElementById('dept-name').textContent = department;
+      document.getElementById('dept-name').textContent = profile.department_name || 'N/A';
       document.getElementById('semester').textContent = '6'; // Default semester
       document.getElementById('year').textContent = '2024-25';
       document.getElementById('roll-no').textContent = `STU${String(studentId).padStart(4, '0')}`;
     }
     
-    // Load recent activities
-    loadRecentActivities();
+    renderRecentActivities(activityData);
     
   } catch (error) {
     console.error('Error loading dashboard:', error);
@@ -155,30 +201,23 @@ async function loadDashboardData() {
   }
 }
 
-// Load recent activities
-async function loadRecentActivities() {
-  try {
-    const response = await fetch(`/api/student/recent-activity/${studentId}`);
-    const data = await response.json();
-    
-    const activitiesList = document.getElementById('recent-activities');
-    
-    if (data.success && data.data && data.data.length > 0) {
-      activitiesList.innerHTML = data.data.map(activity => `
-        <div class="activity-item">
-          <i class="fas fa-${activity.icon || 'circle'}"></i> ${activity.message}
-        </div>
-      `).join('');
-    } else {
-      activitiesList.innerHTML = `
-        <div class="empty-state">
-          <i class="fas fa-inbox"></i>
-          <p>No recent activities</p>
-        </div>
-      `;
-    }
-  } catch (error) {
-    console.error('Error loading activities:', error);
+// Render recent activities
+function renderRecentActivities(data) {
+  const activitiesList = document.getElementById('recent-activities');
+  
+  if (data.success && data.data && data.data.length > 0) {
+    activitiesList.innerHTML = data.data.map(activity => `
+      <div class="activity-item">
+        <i class="fas fa-${activity.icon || 'circle'}"></i> ${activity.message}
+      </div>
+    `).join('');
+  } else {
+    activitiesList.innerHTML = `
+      <div class="empty-state">
+        <i class="fas fa-inbox"></i>
+        <p>No recent activities</p>
+      </div>
+    `;
   }
 }
 
@@ -473,7 +512,7 @@ async function loadLibrary() {
     
     if (data.success && data.data && data.data.length > 0) {
       libraryTable.innerHTML = data.data.map(book => {
-        const isOverdue = new Date(book.due_date) < new Date() && book.status === 'Issued';
+        const isOverdue = book.status === 'Overdue';
         const statusClass = isOverdue ? 'danger' : (book.status === 'Returned' ? 'success' : 'info');
         
         return `
@@ -484,7 +523,7 @@ async function loadLibrary() {
             <td>${book.due_date || 'N/A'}</td>
             <td>
               <span class="grade-badge ${statusClass}">
-                ${isOverdue ? 'Overdue' : book.status}
+                ${book.status}${book.fine_amount > 0 ? ` (₹${book.fine_amount.toFixed(2)} fine)` : ''}
               </span>
             </td>
           </tr>
@@ -0,0 +1,130 @@
+"""
+Login throttling for ERP Cell system.
+Token buckets per client IP and per username, checked before any database
+or bcrypt work so a credential-stuffing burst or a runaway client retry loop
+is turned away for the price of a dict lookup.
+
+Each bucket is stored as a single float, the time at which it will be full
+again (the GCRA form of a token bucket): a request is allowed while that
+time is less than `burst` intervals ahead of now, and pushes it one interval
+further. A key whose time has passed is a full bucket and can be dropped,
+so eviction is a periodic sweep of expired floats.
+
+Buckets are per process; with several workers the effective limit is
+multiplied by the worker count.
+"""
+
+import heapq
+import os
+import threading
+import time
+
+# Per client IP: burst size and sustained attempts per minute (campus NAT shares an IP)
+LOGIN_IP_BURST = int(os.environ.get('LOGIN_IP_BURST', 30))
+LOGIN_IP_PER_MINUTE = float(os.environ.get('LOGIN_IP_PER_MINUTE', 30))
+
+# Per username: a few quick retries, then a slow trickle
+LOGIN_USER_BURST = int(os.environ.get('LOGIN_USER_BURST', 5))
+LOGIN_USER_PER_MINUTE = float(os.environ.get('LOGIN_USER_PER_MINUTE', 1))
+
+# Seconds between sweeps of expired buckets
+EVICT_INTERVAL = 60
+
+# Keys kept per table; past this the buckets closest to full are dropped first
+MAX_KEYS = 100000
+
+
+class TokenBuckets:
+    """Token buckets keyed by string, one float per key."""
+
+    def __init__(self, burst, per_minute, max_keys=MAX_KEYS, evict_interval=EVICT_INTERVAL):
+        self.burst = max(1, int(burst))
+        self.interval = 60.0 / per_minute
+        self.max_keys = max_keys
+        self.evict_interval = evict_interval
+        self._full_at = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + evict_interval
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._full_at)
+
+    def take(self, key, now=None):
+        """
+        Spend one token.
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now >= self._next_sweep or len(self._full_at) >= self.max_keys:
+                self._sweep(now)
+            full_at = max(self._full_at.get(key, now), now)
+            wait = full_at - now - (self.burst - 1) * self.interval
+            if wait > 0:
+                return wait
+            self._full_at[key] = full_at + self.interval
+            return 0.0
+
+    def reset(self, key):
+        """Refill one bucket (e.g. after a successful login)."""
+        with self._lock:
+            self._full_at.pop(key, None)
+
+    def _sweep(self, now):
+        before = len(self._full_at)
+        for key in [key for key, full_at in self._full_at.items() if full_at <= now]:
+            del self._full_at[key]
+        excess = len(self._full_at) - int(self.max_keys * 0.9)
+        if excess > 0:
+            for key, _full_at in heapq.nsmallest(excess, self._full_at.items(), key=lambda item: item[1]):
+                del self._full_at[key]
+        self.evicted += before - len(self._full_at)
+        self._next_sweep = now + self.evict_interval
+
+
+class LoginThrottle:
+    """Per-IP and per-username login buckets with counters."""
+
+    def __init__(self, ip_burst=LOGIN_IP_BURST, ip_per_minute=LOGIN_IP_PER_MINUTE,
+                 user_burst=LOGIN_USER_BURST, user_per_minute=LOGIN_USER_PER_MINUTE):
+        self.by_ip = TokenBuckets(ip_burst, ip_per_minute)
+        self.by_user = TokenBuckets(user_burst, user_per_minute)
+        self.allowed = 0
+        self.throttled_ip = 0
+        self.throttled_user = 0
+
+    def check(self, ip, username):
+        """
+        Admit or reject one login attempt. A rejected IP does not spend the username's token.
+
+        Args:
+            ip (str): Client address
+            username (str): Submitted username (compared case-insensitively)
+
+        Returns:
+            int: 0 if the attempt may proceed, otherwise Retry-After seconds
+        """
+        wait = self.by_ip.take(ip or '-')
+        if wait:
+            self.throttled_ip += 1
+            return int(wait) + 1
+        wait = self.by_user.take(username.lower())
+        if wait:
+            self.throttled_user += 1
+            return int(wait) + 1
+        self.allowed += 1
+        return 0
+
+    def succeeded(self, username):
+        """Forget a username's failed attempts once it logs in."""
+        self.by_user.reset(username.lower())
+
+    def stats(self):
+        """Counters and table sizes for this process."""
+        return {'allowed': self.allowed, 'throttled_ip': self.throttled_ip,
+                'throttled_user': self.throttled_user,
+                'tracked_ips': len(self.by_ip), 'tracked_usernames': len(self.by_user),
+                'evicted': self.by_ip.evicted + self.by_user.evicted}
@@ -0,0 +1,262 @@
+"""
+Timetable clash detection for ERP Cell system.
+Class_Timetable rows are kept in sorted interval lists, one per
+(resource, day), where a resource is a faculty member, a room (location) or a
+department's slot. A valid list never overlaps, so a new class only needs to
+be compared with its neighbours after a bisect: O(log n) per check.
+
+The index is cached per process. A write route first calls lock_for_write(),
+which bumps Class_Timetable's row in Table_Version inside the route's
+transaction: the row lock serializes check + write across every worker until
+commit, and the version tells this worker whether another one changed the
+timetable since its index was loaded. validate() checks a whole timetable in a
+single sort-and-sweep, independent of the index.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from querycache import bump_versions
+
+DAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+
+# Resources that cannot be double-booked; add 'dept' only where a department is a single
+# class of students (the generator keeps student cohorts apart, not whole departments)
+CLASH_RESOURCES = tuple(r.strip() for r in os.environ.get('TIMETABLE_CLASH_RESOURCES', 'faculty,location').split(',')
+                        if r.strip())
+
+# Seconds before the cached index is rebuilt anyway (fallback for writes that skip Table_Version)
+TIMETABLE_INDEX_TTL = int(os.environ.get('TIMETABLE_INDEX_TTL', 300))
+
+TIMETABLE_QUERY = """
+    SELECT timetable_id, dept_id, faculty_id, subject_id, day_of_week, start_time, end_time, location
+    FROM Class_Timetable
+"""
+
+
+def to_minutes(value):
+    """
+    Convert a TIME value to minutes after midnight.
+
+    Args:
+        value: timedelta (as returned by mysql-connector), 'HH:MM[:SS]' string or int minutes
+
+    Returns:
+        int: Minutes after midnight
+    """
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    if isinstance(value, int):
+        return value
+    hours, minutes = str(value).split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def format_minutes(minutes):
+    """Format minutes after midnight as 'HH:MM'."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def resource_keys(entry, resources=CLASH_RESOURCES):
+    """
+    Return the (resource, value, day) lists a class occupies.
+
+    Args:
+        entry (dict): Timetable row with faculty_id, location, dept_id and day_of_week
+        resources (tuple): Resource kinds to check
+
+    Returns:
+        list: Keys such as ('faculty', 4, 'Monday'); rooms are compared case-insensitively
+    """
+    keys = []
+    for resource in resources:
+        if resource == 'faculty':
+            value = entry.get('faculty_id')
+        elif resource == 'location':
+            value = (entry.get('location') or '').strip().lower() or None
+        elif resource == 'dept':
+            value = entry.get('dept_id')
+        else:
+            continue
+        if value is not None:
+            keys.append((resource, value, entry['day_of_week']))
+    return keys
+
+
+def normalize(row):
+    """Return a copy of a timetable row with start/end converted to minutes."""
+    entry = dict(row)
+    entry['start'] = to_minutes(row['start_time'])
+    entry['end'] = to_minutes(row['end_time'])
+    return entry
+
+
+class TimetableIndex:
+    """Sorted, non-overlapping interval lists per (resource, value, day)."""
+
+    def __init__(self, resources=CLASH_RESOURCES, ttl=TIMETABLE_INDEX_TTL):
+        self.resources = resources
+        self.ttl = ttl
+        self._lists = {}
+        self._entries = {}
+        self._loaded_at = None
+        # Table_Version of Class_Timetable the index reflects (None = unknown)
+        self._version = None
+        # Held by write routes across check + INSERT/UPDATE + commit, after lock_for_write()
+        self.lock = threading.RLock()
+
+    def load(self, rows, version=None):
+        """Replace the index with the given timetable rows (at a Table_Version, if known)."""
+        lists, entries = {}, {}
+        for row in rows:
+            entry = normalize(row)
+            entries[entry['timetable_id']] = entry
+            for key in resource_keys(entry, self.resources):
+                lists.setdefault(key, []).append((entry['start'], entry['end'], entry['timetable_id']))
+        for intervals in lists.values():
+            intervals.sort()
+        with self.lock:
+            self._lists, self._entries = lists, entries
+            self._loaded_at = time.monotonic()
+            self._version = version
+
+    def invalidate(self):
+        """Reload on the next write (after a bulk replace committed elsewhere)."""
+        with self.lock:
+            self._version = None
+
+    def lock_for_write(self, db):
+        """
+        Serialize a timetable write across workers and bring the index up to date.
+
+        Bumps Class_Timetable in Table_Version in the caller's transaction, which
+        holds that row locked until the caller commits or rolls back; call it
+        before taking self.lock. The index is reloaded (with a locking read, so
+        an older snapshot of the request cannot hide another worker's commit)
+        unless it already reflects the version just before the bump.
+
+        Returns:
+            int: Version to pass to add()/remove() once the write has committed
+        """
+        cursor = db.cursor(dictionary=True)
+        try:
+            bump_versions(cursor, 'Class_Timetable')
+            cursor.execute("SELECT version FROM Table_Version WHERE table_name = 'Class_Timetable'")
+            version = cursor.fetchone()['version']
+            with self.lock:
+                fresh = (self._version == version - 1
+                         and time.monotonic() - self._loaded_at <= self.ttl)
+            if not fresh:
+                cursor.execute(TIMETABLE_QUERY + " FOR SHARE")
+                self.load(cursor.fetchall(), version - 1)
+        finally:
+            cursor.close()
+        return version
+
+    def clashes(self, entry, ignore_id=None):
+        """
+        Find existing classes that overlap a proposed one on any resource.
+
+        Args:
+            entry (dict): Proposed row (start_time/end_time or start/end minutes)
+            ignore_id (int): timetable_id being updated, excluded from the check
+
+        Returns:
+            list: Clash dicts (resource, value, day_of_week, timetable_id, start_time, end_time)
+        """
+        entry = entry if 'start' in entry else normalize(entry)
+        start, end = entry['start'], entry['end']
+        found = []
+        with self.lock:
+            for key in resource_keys(entry, self.resources):
+                intervals = self._lists.get(key)
+                if not intervals:
+                    continue
+                # Classes starting before `end` are candidates; because the list does not
+                # overlap, walking back from there stops at the first one that ends by `start`
+                i = bisect_left(intervals, (end,)) - 1
+                while i >= 0 and intervals[i][1] > start:
+                    other_start, other_end, other_id = intervals[i]
+                    if other_id != ignore_id:
+                        found.append({'resource': key[0], 'value': key[1], 'day_of_week': key[2],
+                                      'timetable_id': other_id,
+                                      'start_time': format_minutes(other_start),
+                                      'end_time': format_minutes(other_end)})
+                    i -= 1
+        return found
+
+    def add(self, timetable_id, row, version=None):
+        """Record a committed class (version: from lock_for_write())."""
+        entry = normalize(row)
+        entry['timetable_id'] = timetable_id
+        with self.lock:
+            self.remove(timetable_id, version)
+            self._entries[timetable_id] = entry
+            for key in resource_keys(entry, self.resources):
+                intervals = self._lists.setdefault(key, [])
+                intervals.insert(bisect_right(intervals, (entry['start'], entry['end'], timetable_id)),
+                                 (entry['start'], entry['end'], timetable_id))
+
+    def remove(self, timetable_id, version=None):
+        """Forget a class; a no-op if it is not indexed (version: from lock_for_write())."""
+        with self.lock:
+            if version is not None and self._version == version - 1:
+                self._version = version
+            entry = self._entries.pop(timetable_id, None)
+            if entry is None:
+                return
+            item = (entry['start'], entry['end'], timetable_id)
+            for key in resource_keys(entry, self.resources):
+                intervals = self._lists[key]
+                i = bisect_left(intervals, item)
+                if i < len(intervals) and intervals[i] == item:
+                    del intervals[i]
+                if not intervals:
+                    del self._lists[key]
+
+
+def validate(rows, resources=CLASH_RESOURCES):
+    """
+    Report every clash and invalid row in a whole timetable in one sweep.
+
+    All (resource, day, start) keys are sorted once; each list is then swept
+    left to right keeping the classes still running, so the cost is
+    O(n log n + number of clashes).
+
+    Args:
+        rows (list): Timetable rows (dicts as selected by TIMETABLE_QUERY)
+        resources (tuple): Resource kinds to check
+
+    Returns:
+        dict: 'clashes' (pairs of timetable_ids per resource), 'invalid' (rows whose
+              end is not after start or whose day is unknown) and 'checked' (row count)
+    """
+    invalid = []
+    items = []
+    for row in rows:
+        entry = normalize(row)
+        if entry['end'] <= entry['start'] or entry['day_of_week'] not in DAYS:
+            invalid.append({'timetable_id': entry['timetable_id'], 'day_of_week': entry['day_of_week'],
+                            'start_time': format_minutes(entry['start']), 'end_time': format_minutes(entry['end'])})
+            continue
+        for key in resource_keys(entry, resources):
+            items.append((key[0], key[1], DAYS.index(key[2]), entry['start'], entry['end'], entry['timetable_id']))
+    items.sort()
+
+    clashes = []
+    active = []
+    current = None
+    for resource, value, day, start, end, timetable_id in items:
+        if (resource, value, day) != current:
+            current, active = (resource, value, day), []
+        active = [a for a in active if a[1] > start]
+        for other_start, other_end, other_id in active:
+            clashes.append({'resource': resource, 'value': value, 'day_of_week': DAYS[day],
+                            'timetable_ids': [other_id, timetable_id],
+                            'overlap': [format_minutes(start), format_minutes(min(end, other_end))]})
+        active.append((start, end, timetable_id))
+
+    return {'checked': len(rows), 'clashes': clashes, 'invalid': invalid}
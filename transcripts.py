@@ -0,0 +1,403 @@
+"""
+Batch transcript / report-card generation for ERP Cell system.
+
+A job streams Student_Results for a cohort in one ordered cursor pass, groups
+rows per student, and renders transcripts (HTML, CSV or PDF) across a process
+pool. Each finished chunk of students is written as its own part-NNNNN.zip and
+recorded in a JSON checkpoint, so an interrupted job resumes after the last
+finished student instead of starting again. The download endpoint streams a
+single zip built from the parts.
+"""
+
+import csv
+import html
+import io
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import groupby
+
+try:
+    from fpdf import FPDF  # Optional: pure-Python PDF renderer (pip install fpdf2)
+except ImportError:
+    FPDF = None
+
+EXPORT_DIR = os.environ.get('TRANSCRIPT_EXPORT_DIR',
+                            os.path.join(os.path.dirname(__file__), 'exports', 'transcripts'))
+TRANSCRIPT_WORKERS = int(os.environ.get('TRANSCRIPT_WORKERS', os.cpu_count() or 2))
+
+# Students rendered per pool task (and per part file / checkpoint)
+CHUNK_SIZE = 200
+
+FORMATS = ('html', 'csv', 'pdf')
+
+# Rows fetched from the unbuffered cursor per round trip
+FETCH_SIZE = 1000
+
+# job_id -> running thread, for jobs started by this process
+_running = {}
+_running_lock = threading.Lock()
+
+
+# --- Rendering (runs in pool workers) ---
+
+RESULT_COLUMNS = ('subject_code', 'subject_name', 'exam_date', 'theory_marks',
+                  'practical_marks', 'total', 'credits', 'grade', 'status_exam')
+
+
+def _total(row):
+    return (row['theory_marks'] or 0) + (row['practical_marks'] or 0)
+
+
+def render_csv(student, rows):
+    """Render one transcript as CSV text."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['Student ID', student['student_id']])
+    writer.writerow(['Name', student['name']])
+    writer.writerow(['Department', student['dept_name'] or ''])
+    writer.writerow([])
+    writer.writerow(RESULT_COLUMNS)
+    for row in rows:
+        writer.writerow([row['subject_code'], row['subject_name'], row['exam_date'],
+                         row['theory_marks'], row['practical_marks'], _total(row),
+                         row['credits'], row['grade'], row['status_exam']])
+    return out.getvalue().encode('utf-8')
+
+
+def render_html(student, rows):
+    """Render one transcript as a standalone HTML page."""
+    body = ''.join(
+        '<tr>' + ''.join(f'<td>{html.escape(str(value if value is not None else "-"))}</td>'
+                         for value in (row['subject_code'], row['subject_name'], row['exam_date'],
+                                       row['theory_marks'], row['practical_marks'], _total(row),
+                                       row['credits'], row['grade'], row['status_exam'])) + '</tr>'
+        for row in rows
+    )
+    credits_earned = sum(float(r['credits']) for r in rows if r['status_exam'] == 'PASS')
+    page = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Transcript - {html.escape(student['name'])}</title>
+<style>body{{font-family:sans-serif}}table{{border-collapse:collapse}}td,th{{border:1px solid #999;padding:4px 8px}}</style>
+</head><body>
+<h1>Academic Transcript</h1>
+<p><strong>{html.escape(student['name'])}</strong> (ID {student['student_id']})<br>
+Department: {html.escape(student['dept_name'] or 'N/A')}</p>
+<table><thead><tr>{''.join(f'<th>{c.replace("_", " ").title()}</th>' for c in RESULT_COLUMNS)}</tr></thead>
+<tbody>{body}</tbody></table>
+<p>Credits earned: {credits_earned:g}</p>
+</body></html>"""
+    return page.encode('utf-8')
+
+
+def render_pdf(student, rows):
+    """Render one transcript as PDF (requires fpdf2)."""
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Helvetica', 'B', 16)
+    pdf.cell(0, 10, 'Academic Transcript', new_x='LMARGIN', new_y='NEXT')
+    pdf.set_font('Helvetica', '', 11)
+    pdf.cell(0, 7, f"{student['name']} (ID {student['student_id']})", new_x='LMARGIN', new_y='NEXT')
+    pdf.cell(0, 7, f"Department: {student['dept_name'] or 'N/A'}", new_x='LMARGIN', new_y='NEXT')
+    pdf.ln(4)
+    widths = (22, 50, 24, 16, 18, 14, 14, 14, 18)
+    pdf.set_font('Helvetica', 'B', 8)
+    for width, title in zip(widths, ('Code', 'Subject', 'Exam date', 'Theory', 'Practical',
+                                     'Total', 'Credits', 'Grade', 'Status')):
+        pdf.cell(width, 7, title, border=1)
+    pdf.ln()
+    pdf.set_font('Helvetica', '', 8)
+    for row in rows:
+        values = (row['subject_code'], row['subject_name'], row['exam_date'], row['theory_marks'],
+                  row['practical_marks'], _total(row), row['credits'], row['grade'], row['status_exam'])
+        for width, value in zip(widths, values):
+            pdf.cell(width, 7, str(value if value is not None else '-')[:32], border=1)
+        pdf.ln()
+    return bytes(pdf.output())
+
+
+RENDERERS = {'html': render_html, 'csv': render_csv, 'pdf': render_pdf}
+
+
+def render_chunk(fmt, students):
+    """
+    Render a chunk of transcripts (pool task).
+
+    Args:
+        fmt (str): One of FORMATS
+        students (list): (student dict, result rows) pairs
+
+    Returns:
+        list: (filename, bytes) pairs
+    """
+    render = RENDERERS[fmt]
+    return [(f"transcript_{student['student_id']}.{fmt}", render(student, rows))
+            for student, rows in students]
+
+
+# --- Job state ---
+
+def _job_dir(job_id):
+    return os.path.join(EXPORT_DIR, job_id)
+
+
+def _checkpoint_path(job_id):
+    return os.path.join(_job_dir(job_id), 'checkpoint.json')
+
+
+def load_checkpoint(job_id):
+    """Return the job's checkpoint dict, or None if the job does not exist."""
+    if not job_id or not all(c.isalnum() for c in job_id):
+        return None
+    try:
+        with open(_checkpoint_path(job_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(state):
+    path = _checkpoint_path(state['job_id'])
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _write_part(job_id, index, files):
+    """Write one finished chunk atomically as part-NNNNN.zip."""
+    name = f"part-{index:05d}.zip"
+    path = os.path.join(_job_dir(job_id), name)
+    with zipfile.ZipFile(path + '.tmp', 'w', zipfile.ZIP_DEFLATED) as zf:
+        for filename, data in files:
+            zf.writestr(filename, data)
+    os.replace(path + '.tmp', path)
+    return name
+
+
+# --- Cohort streaming ---
+
+def _count_students(db, dept_id):
+    cursor = db.cursor()
+    if dept_id:
+        cursor.execute("""
+            SELECT COUNT(DISTINCT sr.student_id)
+            FROM Student_Results sr JOIN Student_Info si ON si.student_id = sr.student_id
+            WHERE si.dept_id = %s
+        """, (dept_id,))
+    else:
+        cursor.execute("SELECT COUNT(DISTINCT student_id) FROM Student_Results")
+    total = cursor.fetchone()[0]
+    cursor.close()
+    return total
+
+
+def iter_cohort(db, dept_id=None, after_student_id=0):
+    """
+    Stream (student, rows) pairs for a cohort in one ordered, unbuffered cursor pass.
+
+    Args:
+        db: MySQL connection dedicated to this job
+        dept_id (int): Restrict to students of one department (None for all)
+        after_student_id (int): Resume point; students with a lower or equal id are skipped
+
+    Yields:
+        tuple: (student dict, list of result row dicts), in student_id order
+    """
+    cursor = db.cursor(dictionary=True, buffered=False)
+    params = [after_student_id]
+    dept_filter = ''
+    if dept_id:
+        dept_filter = 'AND si.dept_id = %s'
+        params.append(dept_id)
+    cursor.execute(f"""
+        SELECT sr.student_id, CONCAT(si.first_name, ' ', si.last_name) AS name, d.dept_name,
+               s.subject_code, sr.subject_name, sr.exam_date, sr.theory_marks,
+               sr.practical_marks, sr.credits, sr.grade, sr.status_exam
+        FROM Student_Results sr
+        JOIN Student_Info si ON si.student_id = sr.student_id
+        JOIN Subjects s ON s.subject_id = sr.subject_id
+        LEFT JOIN Departments d ON d.dept_id = si.dept_id
+        WHERE sr.student_id > %s {dept_filter}
+        ORDER BY sr.student_id, sr.exam_date, s.subject_code
+    """, params)
+
+    def rows():
+        while True:
+            batch = cursor.fetchmany(FETCH_SIZE)
+            if not batch:
+                return
+            for row in batch:
+                row['exam_date'] = str(row['exam_date'])
+                row['credits'] = str(row['credits'])
+                yield row
+
+    try:
+        for student_id, group in groupby(rows(), key=lambda r: r['student_id']):
+            group = list(group)
+            student = {'student_id': student_id, 'name': group[0]['name'],
+                       'dept_name': group[0]['dept_name']}
+            yield student, group
+    finally:
+        cursor.close()
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# --- Job execution ---
+
+def run_job(job_id, connect, workers=TRANSCRIPT_WORKERS):
+    """
+    Run (or resume) a transcript job until the cohort is exhausted.
+
+    Chunks are rendered in parallel but written and checkpointed strictly in
+    order, so `last_student_id` always marks a fully written prefix.
+
+    Args:
+        job_id (str): Job created by start_job()
+        connect (callable): Returns a new MySQL connection
+        workers (int): Pool processes
+    """
+    state = load_checkpoint(job_id)
+    state.update(status='running', error=None)
+    _save_checkpoint(state)
+
+    db = connect()
+    try:
+        if state['total'] is None:
+            state['total'] = _count_students(db, state['dept_id'])
+            _save_checkpoint(state)
+
+        cohort = iter_cohort(db, state['dept_id'], state['last_student_id'])
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            in_flight = deque()
+            for chunk in _chunks(cohort, CHUNK_SIZE):
+                in_flight.append((chunk[-1][0]['student_id'], len(chunk),
+                                  pool.submit(render_chunk, state['format'], chunk)))
+                # Bound memory: keep at most two chunks per worker outstanding
+                while len(in_flight) >= workers * 2:
+                    _finish_chunk(state, *in_flight.popleft())
+            while in_flight:
+                _finish_chunk(state, *in_flight.popleft())
+
+        state.update(status='completed', finished_at=datetime.now().isoformat())
+    except Exception as e:
+        print(f"Error in transcript job {job_id}: {e}")
+        state.update(status='failed', error=str(e))
+    finally:
+        _save_checkpoint(state)
+        db.close()
+        with _running_lock:
+            _running.pop(job_id, None)
+
+
+def _finish_chunk(state, last_student_id, count, future):
+    files = future.result()
+    state['parts'].append(_write_part(state['job_id'], len(state['parts']) + 1, files))
+    state['done'] += count
+    state['last_student_id'] = last_student_id
+    _save_checkpoint(state)
+
+
+def start_job(connect, fmt='html', dept_id=None, job_id=None):
+    """
+    Create a new job (or resume an existing one) and run it in a background thread.
+
+    Args:
+        connect (callable): Returns a new MySQL connection
+        fmt (str): One of FORMATS
+        dept_id (int): Cohort department, None for every student
+        job_id (str): Existing job to resume
+
+    Returns:
+        dict: The job's checkpoint state
+
+    Raises:
+        ValueError: Unknown format, PDF renderer missing, or job not resumable
+    """
+    if job_id:
+        state = load_checkpoint(job_id)
+        if state is None:
+            raise ValueError('Job not found')
+        if state['status'] == 'completed':
+            raise ValueError('Job already completed')
+    else:
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+        if fmt == 'pdf' and FPDF is None:
+            raise ValueError('PDF output requires the fpdf2 package')
+        job_id = uuid.uuid4().hex
+        os.makedirs(_job_dir(job_id), exist_ok=True)
+        state = {'job_id': job_id, 'format': fmt, 'dept_id': dept_id, 'status': 'queued',
+                 'total': None, 'done': 0, 'last_student_id': 0, 'parts': [],
+                 'error': None, 'created_at': datetime.now().isoformat(), 'finished_at': None}
+        _save_checkpoint(state)
+
+    with _running_lock:
+        if job_id in _running:
+            raise ValueError('Job is already running')
+        thread = threading.Thread(target=run_job, args=(job_id, connect), daemon=True)
+        _running[job_id] = thread
+    thread.start()
+    return state
+
+
+def is_running(job_id):
+    """Check whether this process is currently running the job."""
+    with _running_lock:
+        return job_id in _running
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink that lets ZipFile emit bytes incrementally."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(job_id):
+    """
+    Yield one zip archive containing every transcript of a job, built from its parts.
+
+    Args:
+        job_id (str): Completed job
+
+    Yields:
+        bytes: Zip data in order
+    """
+    state = load_checkpoint(job_id)
+    sink = _StreamBuffer()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as out:
+        for part in state['parts']:
+            with zipfile.ZipFile(os.path.join(_job_dir(job_id), part)) as zf:
+                for info in zf.infolist():
+                    out.writestr(info.filename, zf.read(info))
+                    yield sink.drain()
+    yield sink.drain()
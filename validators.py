@@ -1,11 +1,87 @@
 """
 Input validation utilities for ERP Cell system.
 Validates user inputs before processing to prevent invalid data and SQL injection.
+
+Email addresses are checked in one of two modes:
+    - 'syntax' (default): format only, no network access
+    - 'deliverable': format plus a DNS MX/A lookup of the domain; results per
+      domain are kept in a small LRU cache with a TTL so repeated domains
+      (usually one or two per college) cost a single lookup
 """
 
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 from email_validator import validate_email, EmailNotValidError
+from email_validator.deliverability import validate_email_deliverability
+
+USERNAME_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+NAME_RE = re.compile(r"^[a-zA-Z\s\-'\.]+$")
+PHONE_SEPARATORS_RE = re.compile(r'[\s\-\(\)\+]')
+
+EMAIL_MODES = ('syntax', 'deliverable')
+
+# Default email check for the API: 'syntax', or opt in to 'deliverable' (DNS lookup)
+EMAIL_VALIDATION_MODE = os.environ.get('EMAIL_VALIDATION_MODE', 'syntax')
+
+# Per-domain deliverability results kept (0 disables the cache) and for how long
+EMAIL_DOMAIN_CACHE_SIZE = int(os.environ.get('EMAIL_DOMAIN_CACHE_SIZE', 1024))
+EMAIL_DOMAIN_CACHE_TTL = int(os.environ.get('EMAIL_DOMAIN_CACHE_TTL', 3600))
+
+# Undeliverable domains are re-checked sooner, in case the failure was a DNS hiccup
+EMAIL_DOMAIN_NEGATIVE_TTL = 300
+
+
+class DomainCache:
+    """Bounded LRU of domain -> error message (None = deliverable), with expiry."""
+
+    def __init__(self, max_size=EMAIL_DOMAIN_CACHE_SIZE, ttl=EMAIL_DOMAIN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, domain):
+        """
+        Look up a cached result.
+
+        Returns:
+            tuple: (found, error message or None)
+        """
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[domain]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(domain)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, domain, error):
+        """Store a definite result for a domain, evicting the least recently used."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            ttl = self.ttl if error is None else min(self.ttl, EMAIL_DOMAIN_NEGATIVE_TTL)
+            self._entries[domain] = (time.monotonic() + ttl, error)
+            self._entries.move_to_end(domain)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every cached domain."""
+        with self._lock:
+            self._entries.clear()
+
+
+domain_cache = DomainCache()
 
 
 def validate_username(username):
@@ -28,31 +104,54 @@ def validate_username(username):
         return False, "Username must be less than 50 characters"
     
     # Allow alphanumeric, underscore, dash
-    if not re.match(r'^[a-zA-Z0-9_-]+$', username):
+    if not USERNAME_RE.match(username):
         return False, "Username can only contain letters, numbers, underscores, and dashes"
     
     return True, None
 
 
-def validate_email_address(email):
+def validate_email_address(email, mode=None):
     """
-    Validate email format.
+    Validate email format, and optionally that its domain accepts mail.
     
     Args:
         email (str): Email to validate
+        mode (str): 'syntax' or 'deliverable'; defaults to EMAIL_VALIDATION_MODE
         
     Returns:
         tuple: (is_valid, error_message)
+
+    Raises:
+        ValueError: mode is neither 'syntax' nor 'deliverable'
     """
+    mode = mode or EMAIL_VALIDATION_MODE
+    if mode not in EMAIL_MODES:
+        raise ValueError(f"Unknown email check mode: {mode} (use {' or '.join(EMAIL_MODES)})")
+
     if not email or len(email.strip()) == 0:
         return False, "Email is required"
     
     try:
-        validate_email(email)
-        return True, None
+        result = validate_email(email, check_deliverability=False)
     except EmailNotValidError as e:
         return False, str(e)
 
+    if mode == 'syntax':
+        return True, None
+
+    found, error = domain_cache.get(result.ascii_domain)
+    if not found:
+        try:
+            info = validate_email_deliverability(result.ascii_domain, result.domain)
+            error = None
+            # Timeouts and resolver failures are not cached, so the next call retries
+            if 'unknown-deliverability' not in info:
+                domain_cache.put(result.ascii_domain, None)
+        except EmailNotValidError as e:
+            error = str(e)
+            domain_cache.put(result.ascii_domain, error)
+    return (False, error) if error else (True, None)
+
 
 def validate_password(password):
     """
@@ -97,7 +196,7 @@ def validate_name(name, field_name="Name"):
         return False, f"{field_name} must be less than 100 characters"
     
     # Allow letters, spaces, hyphens, apostrophes
-    if not re.match(r"^[a-zA-Z\s\-'\.]+$", name):
+    if not NAME_RE.match(name):
         return False, f"{field_name} can only contain letters, spaces, hyphens, and apostrophes"
     
     return True, None
@@ -117,7 +216,7 @@ def validate_phone(phone):
         return True, None  # Phone is optional
     
     # Remove common separators
-    cleaned = re.sub(r'[\s\-\(\)\+]', '', phone)
+    cleaned = PHONE_SEPARATORS_RE.sub('', phone)
     
     # Check if only digits remain
     if not cleaned.isdigit():
@@ -0,0 +1,33 @@
+"""
+Production WSGI entry point for ERP Cell system.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (see gunicorn.conf.py) this module is imported once, in the
+gunicorn master: the database is initialised and the search index built a
+single time, then workers are forked and share that memory copy-on-write.
+Each worker opens its own MySQL connection pool after the fork.
+
+`python app.py` remains the single-process development server.
+"""
+
+from app import app as flask_app, get_db, init_db, search_index
+
+
+def create_app():
+    """
+    Prepare the Flask app for multi-worker serving.
+
+    Runs the one-time start-up work (schema/seed check, search index build)
+    on a plain connection that is closed before any worker is forked.
+
+    Returns:
+        Flask: The application object
+    """
+    with flask_app.app_context():
+        init_db()
+        search_index.build(get_db())
+    return flask_app
+
+
+app = create_app()